@@ -3,16 +3,25 @@ CyanoManus File System Tools
 A module of tools that allow LLM operate filesystem.
 
 TOOLS_AVAILABLE:
-1. read_file: Read file contents
+1. read_file: Read file contents (whole file, byte range, line range, head or tail), detecting encoding and binary files
 2. read_multiple_files: Read multiple files simultaneously
-3. write_file: Create or overwrite file
+3. write_file: Create or overwrite file (atomically), append to it or write at an offset
 4. edit_file: Edit file contents
 5. create_directory: Create directory
-6. list_directory: List directory contents
-7. move_file: Move or rename files/directories
+6. list_directory: List directory contents (sorted, filtered and paginated)
+7. move_file: Move or rename files/directories (zero-copy across filesystems)
 8. search_files: Recursively search files/directories
 9. get_file_info: Get file/directory metadata
 10. list_allowed_directories: List allowed directories for access
+11. file_find_by_name: Find files/directories by name glob, served from a persistent filename index
+12. file_find_in_content: Search file contents for text or a regex, with line numbers and context
+13. write_multiple_files: Atomically write many files, flushing each directory once per batch
+14. open_write_session / close_write_session: Keep a file open across chunked write_file calls
+15. directory_tree: Show a budgeted, breadth-first directory tree in one call
+16. get_multiple_files_info: Get metadata of many paths or a glob as one table
+
+Every tool also has an async variant named <tool>_async (e.g. read_file_async)
+that runs on a dedicated I/O thread pool, so slow disks never block the event loop.
 
 
 # file_read - 读取文件内容
@@ -24,15 +33,110 @@ TOOLS_AVAILABLE:
 
 from agents import function_tool
 
+from dotenv import find_dotenv, load_dotenv
+
 import os
+import asyncio
+import atexit
+import codecs
+import contextvars
+import errno
 import shutil
 import fnmatch
+import glob
 import difflib
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from functools import lru_cache, partial, wraps
+from itertools import accumulate
 from pathlib import Path
-from typing import List, Dict, Union, Optional, Any, Tuple
+from typing import List, Dict, Union, Optional, Any, Tuple, NamedTuple, Iterator, Literal, Callable
 from datetime import datetime
 import re
 
+from src.utils.budget import CHARS_PER_TOKEN, allocate_budget
+
+############# INITIALIZE #############
+
+_ = load_dotenv(find_dotenv())
+
+# Blocking file I/O of the async tools runs here, not on the loop's default executor
+FILE_IO_MAX_WORKERS = int(os.getenv("FILE_IO_MAX_WORKERS", "16"))
+
+_file_io_executor: Optional[ThreadPoolExecutor] = None
+_file_io_executor_lock = threading.Lock()
+
+# Undecorated tool functions and their function_tool options, from which the async variants are built
+_file_tool_functions: Dict[str, Callable[..., str]] = {}
+_file_tool_options: Dict[str, Dict[str, Any]] = {}
+
+
+def file_tool(func: Optional[Callable[..., str]] = None, *, strict_mode: bool = True):
+    """
+    Register a file tool and wrap it as a function_tool.
+    
+    Tools taking free-form dicts (List[Dict[str, str]]) need strict_mode=False:
+    their schema allows additional properties, which strict schemas reject.
+    
+    Args:
+        func: The tool function
+        strict_mode: Whether to build a strict JSON schema for the tool
+        
+    Returns:
+        The FunctionTool, or a decorator when called with options only
+    """
+    if func is None:
+        return partial(file_tool, strict_mode=strict_mode)
+    _file_tool_functions[func.__name__] = func
+    _file_tool_options[func.__name__] = {"strict_mode": strict_mode}
+    return function_tool(func, strict_mode=strict_mode)
+
+
+def get_file_io_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool used for the async file tools, creating it on first use.
+    
+    Returns:
+        The I/O thread pool
+    """
+    global _file_io_executor
+    with _file_io_executor_lock:
+        if _file_io_executor is None:
+            _file_io_executor = ThreadPoolExecutor(max_workers=FILE_IO_MAX_WORKERS, thread_name_prefix="file-io")
+        return _file_io_executor
+
+
+async def run_file_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function on the I/O thread pool, keeping the caller's context variables.
+    
+    Args:
+        func: The blocking function
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        The function's result
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_file_io_executor(), partial(context.run, func, *args, **kwargs))
+
+############# End of INITIALIZE #############
+
 
 ############# UTILS FUNCTIONS #############
 def normalize_path(path_str: str) -> str:
@@ -59,10 +163,161 @@ def expand_home(path_str: str) -> str:
         Path with tilde expanded to home directory
     """
     if path_str.startswith('~/') or path_str == '~':
-        return os.path.join(os.path.expanduser('~'), path_str[1:] if path_str.startswith('~') else '')
+        # Join the part after "~/": os.path.join drops the home directory before an absolute "/..."
+        return os.path.join(os.path.expanduser('~'), path_str[2:])
     return path_str
 
 
+PATH_CACHE_SIZE = 4096
+
+# Directories the tools may touch; empty means unrestricted
+_allowed_directories: List[str] = [
+    directory for directory in os.getenv("ALLOWED_DIRECTORIES", "").split(os.pathsep) if directory
+]
+# absolute path -> (real path, (st_dev, st_ino) of the file it resolved to)
+_real_path_cache: "OrderedDict[str, Tuple[str, Tuple[int, int]]]" = OrderedDict()
+_real_path_cache_lock = threading.Lock()
+
+
+def split_path_components(path_str: str) -> List[str]:
+    """
+    Split a normalized absolute path into its components, drive first.
+    
+    Args:
+        path_str: Normalized absolute path
+        
+    Returns:
+        Path components, compared case-insensitively where the OS does
+    """
+    drive, rest = os.path.splitdrive(os.path.normcase(path_str))
+    return [drive, *(part for part in rest.split(os.sep) if part)]
+
+
+@lru_cache(maxsize=32)
+def build_path_trie(allowed_directories: Tuple[str, ...]) -> Dict:
+    """
+    Build a trie of path components of the allowed directories.
+    
+    Both the given and the resolved (symlink-free) form of every directory are
+    added. A None key marks the end of an allowed directory.
+    
+    Args:
+        allowed_directories: Allowed directory paths
+        
+    Returns:
+        Nested dict keyed by path component
+    """
+    trie: Dict = {}
+    for directory in allowed_directories:
+        absolute = normalize_path(os.path.abspath(expand_home(directory)))
+        for form in {absolute, os.path.realpath(absolute)}:
+            node = trie
+            for part in split_path_components(form):
+                node = node.setdefault(part, {})
+            node[None] = True
+    return trie
+
+
+def is_path_in_trie(trie: Dict, path_str: str) -> bool:
+    """
+    Check whether a path is an allowed directory or lies below one.
+    
+    Matching whole components means /data allows /data/x but not /data2.
+    
+    Args:
+        trie: Trie from build_path_trie
+        path_str: Normalized absolute path
+        
+    Returns:
+        True if the path is allowed
+    """
+    node = trie
+    for part in split_path_components(path_str):
+        if None in node:
+            return True
+        node = node.get(part)
+        if node is None:
+            return False
+    return None in node
+
+
+def resolve_real_path(absolute_path: str) -> Tuple[str, bool]:
+    """
+    Resolve symlinks in a path, caching the result for existing paths.
+    
+    A path that does not exist yet is resolved through its parent directory.
+    A cached resolution is only reused while both the path and its resolution
+    still stat to the file they resolved to, so swapping a component for a
+    symlink outside the tools forces a fresh resolution.
+    
+    Args:
+        absolute_path: Normalized absolute path
+        
+    Returns:
+        Tuple of the resolved path and whether the path exists
+        
+    Raises:
+        ValueError: If neither the path nor its parent directory exists
+    """
+    with _real_path_cache_lock:
+        cached = _real_path_cache.get(absolute_path)
+    if cached is not None:
+        real_path, identity = cached
+        try:
+            requested_stats = os.stat(absolute_path)
+            real_stats = os.stat(real_path)
+            unchanged = (
+                (requested_stats.st_dev, requested_stats.st_ino) == identity
+                and (real_stats.st_dev, real_stats.st_ino) == identity
+            )
+        except OSError:
+            unchanged = False
+        if unchanged:
+            with _real_path_cache_lock:
+                if absolute_path in _real_path_cache:
+                    _real_path_cache.move_to_end(absolute_path)
+            return real_path, True
+    
+    try:
+        real_path = os.path.realpath(absolute_path, strict=True)
+        stats = os.stat(real_path)
+    except (FileNotFoundError, NotADirectoryError):
+        # For new files that don't exist yet, resolve the parent directory
+        parent_dir = os.path.dirname(absolute_path)
+        try:
+            real_parent_path = os.path.realpath(parent_dir, strict=True)
+        except (FileNotFoundError, NotADirectoryError):
+            raise ValueError(f"Parent directory does not exist: {parent_dir}")
+        return os.path.join(real_parent_path, os.path.basename(absolute_path)), False
+    
+    with _real_path_cache_lock:
+        _real_path_cache[absolute_path] = (real_path, (stats.st_dev, stats.st_ino))
+        while len(_real_path_cache) > PATH_CACHE_SIZE:
+            _real_path_cache.popitem(last=False)
+    return real_path, True
+
+
+def invalidate_path_cache(path_str: str) -> None:
+    """
+    Drop cached resolutions of a path and everything below it.
+    
+    Called after a path is created, moved or replaced.
+    
+    Args:
+        path_str: The path that changed
+    """
+    absolute = normalize_path(os.path.abspath(expand_home(path_str)))
+    prefixes = {absolute, os.path.realpath(absolute)}
+    
+    def is_affected(cached: str) -> bool:
+        return any(cached == prefix or cached.startswith(os.path.join(prefix, '')) for prefix in prefixes)
+    
+    with _real_path_cache_lock:
+        for key, (value, _) in list(_real_path_cache.items()):
+            if is_affected(key) or is_affected(value):
+                del _real_path_cache[key]
+
+
 def validate_path(requested_path: str, allowed_directories: List[str]) -> str:
     """
     Validate that a path is within allowed directories.
@@ -72,40 +327,70 @@ def validate_path(requested_path: str, allowed_directories: List[str]) -> str:
         allowed_directories: List of allowed directory paths
         
     Returns:
-        The validated absolute path
+        The validated absolute path, with symlinks resolved
         
     Raises:
         ValueError: If the path is outside allowed directories
     """
+    trie = build_path_trie(tuple(allowed_directories))
     expanded_path = expand_home(requested_path)
-    absolute_path = os.path.abspath(expanded_path)
-    normalized_requested = normalize_path(absolute_path)
+    absolute_path = normalize_path(os.path.abspath(expanded_path))
     
     # Check if path is within allowed directories
-    is_allowed = any(normalized_requested.startswith(dir_path) for dir_path in allowed_directories)
-    if not is_allowed:
+    if not is_path_in_trie(trie, absolute_path):
         raise ValueError(f"Access denied - path outside allowed directories: {absolute_path} not in {', '.join(allowed_directories)}")
     
     # Handle symlinks by checking their real path
-    try:
-        real_path = os.path.realpath(absolute_path)
-        normalized_real = normalize_path(real_path)
-        is_real_path_allowed = any(normalized_real.startswith(dir_path) for dir_path in allowed_directories)
-        if not is_real_path_allowed:
+    real_path, exists = resolve_real_path(absolute_path)
+    if not is_path_in_trie(trie, real_path):
+        if exists:
             raise ValueError("Access denied - symlink target outside allowed directories")
-        return real_path
-    except FileNotFoundError:
-        # For new files that don't exist yet, verify parent directory
-        parent_dir = os.path.dirname(absolute_path)
-        try:
-            real_parent_path = os.path.realpath(parent_dir)
-            normalized_parent = normalize_path(real_parent_path)
-            is_parent_allowed = any(normalized_parent.startswith(dir_path) for dir_path in allowed_directories)
-            if not is_parent_allowed:
-                raise ValueError("Access denied - parent directory outside allowed directories")
-            return absolute_path
-        except FileNotFoundError:
-            raise ValueError(f"Parent directory does not exist: {parent_dir}")
+        raise ValueError("Access denied - parent directory outside allowed directories")
+    return real_path
+
+
+def set_allowed_directories(directories: List[str]) -> None:
+    """
+    Restrict the file tools to the given directories (an empty list lifts the restriction).
+    
+    Defaults to the ALLOWED_DIRECTORIES environment variable, separated by os.pathsep.
+    
+    Args:
+        directories: Allowed directory paths
+    """
+    global _allowed_directories
+    _allowed_directories = list(directories)
+    with _real_path_cache_lock:
+        _real_path_cache.clear()
+
+
+def get_allowed_directories() -> List[str]:
+    """
+    Get the directories the file tools are restricted to.
+    
+    Returns:
+        Allowed directory paths, empty if unrestricted
+    """
+    return list(_allowed_directories)
+
+
+def check_path(path_str: str) -> str:
+    """
+    Validate a path passed to a file tool against the allowed directories.
+    
+    Args:
+        path_str: The requested path
+        
+    Returns:
+        The path to operate on: resolved if directories are restricted, otherwise
+        the requested path with ~ expanded
+        
+    Raises:
+        ValueError: If the path is outside allowed directories
+    """
+    if not _allowed_directories:
+        return expand_home(path_str)
+    return validate_path(path_str, _allowed_directories)
 
 
 def normalize_line_endings(text: str) -> str:
@@ -124,407 +409,3435 @@ def normalize_line_endings(text: str) -> str:
 
 
 ############# Read FILE #############
-@function_tool
-def read_file(path: str) -> str:
+# Every LINE_INDEX_STRIDE-th line start is remembered, so a line-range read
+# only has to scan forward from the nearest checkpoint.
+LINE_INDEX_STRIDE = 1024
+LINE_INDEX_CHUNK_SIZE = 1024 * 1024
+LINE_INDEX_CACHE_SIZE = 64
+
+_line_index_cache: "OrderedDict[Tuple[str, int, int], LineIndex]" = OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+class LineIndex(NamedTuple):
+    """Sparse line index of a file: byte offsets of every LINE_INDEX_STRIDE-th line start."""
+    checkpoints: array
+    line_count: int
+
+
+# Whole-file reads are cached in memory, validated against (mtime, size, inode)
+CONTENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CONTENT_CACHE_MAX_FILE_BYTES = 4 * 1024 * 1024
+
+_content_cache: "OrderedDict[str, CachedContent]" = OrderedDict()
+_content_cache_bytes = 0
+_content_cache_lock = threading.Lock()
+
+
+class CachedContent(NamedTuple):
+    """Text of a file as last read or written, with its line-ending-normalized form."""
+    mtime_ns: int
+    size: int
+    inode: int
+    codec: Tuple[str, str]
+    lossless: bool
+    text: str
+    normalized: str
+    cost: int
+
+    def serves(self, encoding: str, errors: str) -> bool:
+        """Whether reading the file with (encoding, errors) would return this text."""
+        # Text that decoded without errors is the same under any error handler
+        return self.codec[0] == encoding and (self.lossless or self.codec[1] == errors)
+
+
+def store_cached_content(
+    real_path: str,
+    stats: os.stat_result,
+    text: str,
+    codec: Tuple[str, str] = ('utf-8', 'strict'),
+    lossless: bool = True,
+) -> None:
+    """
+    Put a file's text into the content cache, evicting least recently used entries.
+    
+    Args:
+        real_path: Resolved path of the file
+        stats: Stat result of the file matching text
+        text: The file contents as read in text mode
+        codec: (encoding, errors) the text was decoded with
+        lossless: Whether the bytes decoded without hitting the error handler
+    """
+    global _content_cache_bytes
+    
+    normalized = normalize_line_endings(text)
+    # str.replace returns the same object when there is nothing to replace
+    cost = stats.st_size + (len(normalized) if normalized is not text else 0)
+    
+    with _content_cache_lock:
+        previous = _content_cache.pop(real_path, None)
+        if previous is not None:
+            _content_cache_bytes -= previous.cost
+        if stats.st_size > CONTENT_CACHE_MAX_FILE_BYTES:
+            return
+        _content_cache[real_path] = CachedContent(stats.st_mtime_ns, stats.st_size, stats.st_ino, codec, lossless, text, normalized, cost)
+        _content_cache_bytes += cost
+        while _content_cache_bytes > CONTENT_CACHE_MAX_BYTES:
+            _, evicted = _content_cache.popitem(last=False)
+            _content_cache_bytes -= evicted.cost
+
+
+def invalidate_content_cache(path: str) -> None:
+    """
+    Drop a file from the content cache.
+    
+    Args:
+        path: The path of the file
+    """
+    global _content_cache_bytes
+    
+    with _content_cache_lock:
+        previous = _content_cache.pop(os.path.realpath(path), None)
+        if previous is not None:
+            _content_cache_bytes -= previous.cost
+
+
+def update_content_cache(path: str, content: str) -> None:
     """
-    Read complete contents of a file.
+    Record content just written to a file, so the next read is served from memory.
+    
+    Args:
+        path: The path of the written file
+        content: The content that was written
+    """
+    real_path = os.path.realpath(path)
+    if '\r' in content:
+        # Text-mode reads translate \r, so the written text is not what a read returns
+        invalidate_content_cache(real_path)
+        return
+    try:
+        store_cached_content(real_path, os.stat(real_path), content)
+    except OSError:
+        invalidate_content_cache(real_path)
+
+
+def read_text_cached(path: str, normalized: bool = False, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+    """
+    Read a whole file as text, served from the content cache when it is unchanged.
+    
+    An entry decoded without errors serves every error handler of its encoding,
+    so text recorded by a write serves both edits (strict) and reads (replace).
     
     Args:
         path: The path to the file to read
+        normalized: Return the text with line endings normalized to \n
+        encoding: Encoding of the file (default: UTF-8)
+        errors: How to handle undecodable bytes, as for open() (default: 'strict')
         
     Returns:
-        The complete contents of the file with UTF-8 encoding
+        The file contents
+    """
+    real_path = os.path.realpath(path)
+    stats = os.stat(real_path)
+    
+    with _content_cache_lock:
+        entry = _content_cache.get(real_path)
+        if (entry is not None and entry.serves(encoding, errors)
+                and (entry.mtime_ns, entry.size, entry.inode) == (stats.st_mtime_ns, stats.st_size, stats.st_ino)):
+            _content_cache.move_to_end(real_path)
+            return entry.normalized if normalized else entry.text
+    
+    with open(real_path, 'rb') as file:
+        data = file.read()
+        # Stat the open file after reading, so a concurrent write can only make the entry stale
+        stats = os.fstat(file.fileno())
+    try:
+        text = data.decode(encoding)
+        lossless = True
+    except UnicodeDecodeError:
+        if errors == 'strict':
+            raise
+        text = data.decode(encoding, errors=errors)
+        lossless = False
+    # Translate newlines as a text-mode read would
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    store_cached_content(real_path, stats, text, (encoding, errors), lossless)
+    return normalize_line_endings(text) if normalized else text
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Optional[mmap.mmap]]:
+    """
+    Memory-map a file read-only.
+    
+    Args:
+        path: The path to the file to map
         
-    Raises:
-        FileNotFoundError: If the file does not exist
-        PermissionError: If the file cannot be read due to permissions
+    Yields:
+        The mmap object, or None for an empty file (which cannot be mapped)
     """
-    with open(path, 'r', encoding='utf-8') as file:
-        return file.read()
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def build_line_index(mm: mmap.mmap) -> LineIndex:
+    """
+    Scan a mapped file once and record the byte offset of every LINE_INDEX_STRIDE-th line.
     
-############# End of READ FILE #############
+    Args:
+        mm: The mapped file
+        
+    Returns:
+        LineIndex with the checkpoints and the total number of lines
+    """
+    size = len(mm)
+    checkpoints = array('Q', [0])
+    newlines = 0
+    next_mark = LINE_INDEX_STRIDE
+    
+    for pos in range(0, size, LINE_INDEX_CHUNK_SIZE):
+        chunk = mm[pos:pos + LINE_INDEX_CHUNK_SIZE]
+        count = chunk.count(b'\n')
+        if newlines + count >= next_mark:
+            # ends[k] + k + 1 is the chunk offset just past the k-th newline
+            ends = list(accumulate(map(len, chunk.split(b'\n'))))
+            for k in range(next_mark - newlines - 1, count, LINE_INDEX_STRIDE):
+                checkpoints.append(pos + ends[k] + k + 1)
+                next_mark += LINE_INDEX_STRIDE
+        newlines += count
+    
+    line_count = newlines + (1 if size and mm[size - 1:size] != b'\n' else 0)
+    return LineIndex(checkpoints, line_count)
 
 
-############# READ  MULTIPLE FILES  #############
+def get_line_index(path: str, mm: mmap.mmap) -> LineIndex:
+    """
+    Get the line index of a file, building it on first use.
+    
+    The index is cached per (realpath, mtime, size), so repeated range reads of
+    an unchanged file never rescan it from the start.
+    
+    Args:
+        path: The path of the mapped file
+        mm: The mapped file
+        
+    Returns:
+        LineIndex for the file
+    """
+    stats = os.stat(path)
+    key = (os.path.realpath(path), stats.st_mtime_ns, stats.st_size)
+    
+    with _line_index_lock:
+        index = _line_index_cache.get(key)
+        if index is not None:
+            _line_index_cache.move_to_end(key)
+            return index
+    
+    index = build_line_index(mm)
+    
+    with _line_index_lock:
+        _line_index_cache[key] = index
+        while len(_line_index_cache) > LINE_INDEX_CACHE_SIZE:
+            _line_index_cache.popitem(last=False)
+    return index
 
-def format_multiple_files_result(results: Dict[str, str]) -> str:
+
+def find_line_start(mm: mmap.mmap, index: LineIndex, line: int) -> int:
     """
-    Format the results of reading multiple files into a LLM-friendly string.
+    Get the byte offset where a 1-based line starts.
     
     Args:
-        results: Dictionary mapping file paths to either their contents or error messages
+        mm: The mapped file
+        index: The line index of the file
+        line: 1-based line number
         
     Returns:
-        Formatted string with file contents or error messages
+        Byte offset of the line start, or the file size if the line is past the end
+    """
+    if line > index.line_count:
+        return len(mm)
+    
+    checkpoint = (line - 1) // LINE_INDEX_STRIDE
+    offset = index.checkpoints[checkpoint]
+    for _ in range((line - 1) - checkpoint * LINE_INDEX_STRIDE):
+        offset = mm.find(b'\n', offset) + 1
+    return offset
+
+
+def decode_bytes(data: bytes, encoding: str = 'utf-8') -> str:
     """
-    formatted_output = []
+    Decode a slice of a file, replacing characters cut by the slice boundaries.
     
-    for file_path, content in results.items():
-        formatted_output.append(f"File: {file_path}")
-        formatted_output.append("-" * 40)
+    Args:
+        data: Raw bytes
+        encoding: Encoding of the file (default: UTF-8)
         
-        if content.startswith("Error"):
-            formatted_output.append(f"[ERROR] {content}")
-        else:
-            formatted_output.append(content)
+    Returns:
+        Decoded text
+    """
+    return data.decode(encoding, errors='replace')
+
+
+def decode_lines(data: bytes, encoding: str = 'utf-8') -> str:
+    """
+    Decode whole lines of a file, translating newlines like the whole-file read does.
+    
+    Args:
+        data: Raw bytes of complete lines
+        encoding: Encoding of the file (default: UTF-8)
         
-        formatted_output.append("\n")
+    Returns:
+        Decoded text with \r\n and \r turned into \n
+    """
+    return decode_bytes(data, encoding).replace('\r\n', '\n').replace('\r', '\n')
+
+
+SNIFF_SIZE = 8192
+# Share of control bytes above which a BOM-less sample is treated as binary
+SNIFF_CONTROL_RATIO = 0.1
+# Tried in order on a sample that is not valid UTF-8; latin-1 decodes anything
+SNIFF_FALLBACK_ENCODINGS = ('gb18030', 'cp1252', 'latin-1')
+# Share of non-ASCII characters that must be common GB2312 characters for a sample to be read as gb18030
+GB18030_MIN_COMMON_SHARE = 0.5
+
+# Checked longest first, so UTF-32 LE is not mistaken for UTF-16 LE
+BYTE_ORDER_MARKS = (
+    (b'\xff\xfe\x00\x00', 'utf-32'),
+    (b'\x00\x00\xfe\xff', 'utf-32'),
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+)
+
+MAGIC_NUMBERS = (
+    (b'%PDF-', 'PDF document'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG image'),
+    (b'\xff\xd8\xff', 'JPEG image'),
+    (b'GIF87a', 'GIF image'),
+    (b'GIF89a', 'GIF image'),
+    (b'PK\x03\x04', 'ZIP archive (also docx/xlsx/pptx)'),
+    (b'PAR1', 'Parquet file'),
+    (b'\x1f\x8b', 'gzip archive'),
+    (b'\x7fELF', 'ELF executable'),
+    (b'SQLite format 3\x00', 'SQLite database'),
+    (b'\x93NUMPY', 'NumPy array'),
+    (b'\x89HDF\r\n\x1a\n', 'HDF5 file'),
+)
+
+# Bytes below 0x20 that plain text commonly contains: \b \t \n \f \r and ESC
+TEXT_CONTROL_BYTES = bytes([8, 9, 10, 12, 13, 27])
+CONTROL_BYTES = bytes(b for b in range(32) if b not in TEXT_CONTROL_BYTES) + b'\x7f'
+
+
+# Encodings whose newline is not the single byte 0x0A
+WIDE_ENCODINGS = {'utf-16', 'utf-32'}
+
+
+class FileSniff(NamedTuple):
+    """What the first block of a file says about how to read it."""
+    is_binary: bool
+    encoding: str
+    kind: Optional[str]
+
+
+def looks_like_chinese(text: str) -> bool:
+    """
+    Tell Chinese text decoded as gb18030 from single-byte text that merely decodes.
     
-    return "\n".join(formatted_output)
+    Nearly every non-ASCII character of Chinese text is in GB2312, whose bytes
+    are all >= 0xA1. cp1252 text such as "naïve" decodes instead to characters
+    pairing an accented letter with the ASCII byte after it.
+    
+    Args:
+        text: The sample decoded as gb18030
+        
+    Returns:
+        True if enough of the non-ASCII characters are common GB2312 characters
+    """
+    wide = [char.encode('gb18030') for char in text if ord(char) >= 0x80]
+    common = sum(1 for encoded in wide if len(encoded) == 2 and encoded[1] >= 0xA1)
+    return common >= GB18030_MIN_COMMON_SHARE * len(wide)
+
+
+def guess_encoding(sample: bytes, complete: bool) -> str:
+    """
+    Guess the encoding of a BOM-less text sample.
+    
+    Args:
+        sample: The first bytes of the file
+        complete: Whether the sample is the whole file
+        
+    Returns:
+        The first encoding in UTF-8 and SNIFF_FALLBACK_ENCODINGS that decodes the sample,
+        gb18030 only if the result looks like Chinese
+    """
+    for encoding in ('utf-8', *SNIFF_FALLBACK_ENCODINGS):
+        try:
+            # A multi-byte character cut at the end of the sample is not an error
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final=complete)
+        except UnicodeDecodeError:
+            continue
+        if encoding == 'gb18030' and not looks_like_chinese(text):
+            continue
+        return encoding
+    return 'latin-1'
+
+
+def sniff_file(path: str) -> FileSniff:
+    """
+    Classify a file from its first SNIFF_SIZE bytes: binary or text, and which encoding.
+    
+    Args:
+        path: The path to the file
+        
+    Returns:
+        FileSniff for the file
+    """
+    with open(path, 'rb') as file:
+        sample = file.read(SNIFF_SIZE)
+        complete = len(sample) < SNIFF_SIZE
+    
+    for magic, kind in MAGIC_NUMBERS:
+        if sample.startswith(magic):
+            return FileSniff(True, 'binary', kind)
+    
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(bom):
+            return FileSniff(False, encoding, None)
+    
+    if b'\0' in sample:
+        return FileSniff(True, 'binary', None)
+    if sample and len(sample) - len(sample.translate(None, CONTROL_BYTES)) > SNIFF_CONTROL_RATIO * len(sample):
+        return FileSniff(True, 'binary', None)
+    
+    return FileSniff(False, guess_encoding(sample, complete), None)
+
+
+def describe_binary_file(path: str, sniff: FileSniff) -> str:
+    """
+    Describe a binary file in one line instead of returning its contents.
+    
+    Args:
+        path: The path to the file
+        sniff: The sniff result of the file
+        
+    Returns:
+        Short descriptor with the file type and size
+    """
+    kind = sniff.kind or "binary data"
+    return f"[Binary file: {os.path.basename(path)}, {kind}, {format_size(os.path.getsize(path))}; contents not shown]"
+
+
+def read_byte_range(path: str, offset: int = 0, length: Optional[int] = None, encoding: str = 'utf-8') -> str:
+    """
+    Read a byte range of a file without loading the rest of it.
+    
+    Args:
+        path: The path to the file to read
+        offset: Byte offset to start reading from
+        length: Number of bytes to read (default: to the end of the file)
+        encoding: Encoding of the file (default: UTF-8)
+        
+    Returns:
+        The decoded contents of the range
+    """
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset and length must be non-negative")
+    
+    with map_file(path) as mm:
+        if mm is None:
+            return ""
+        end = len(mm) if length is None else offset + length
+        return decode_bytes(mm[offset:end], encoding)
+
+
+def read_line_range(path: str, start_line: int = 1, end_line: Optional[int] = None, encoding: str = 'utf-8') -> str:
+    """
+    Read an inclusive, 1-based range of lines from a file.
+    
+    Args:
+        path: The path to the file to read
+        start_line: First line to return (default: 1)
+        end_line: Last line to return (default: the last line of the file)
+        encoding: Encoding of the file, which must be ASCII-compatible (default: UTF-8)
+        
+    Returns:
+        The decoded lines
+    """
+    if start_line < 1 or (end_line is not None and end_line < start_line):
+        raise ValueError("start_line must be >= 1 and end_line must be >= start_line")
+    
+    with map_file(path) as mm:
+        if mm is None:
+            return ""
+        index = get_line_index(path, mm)
+        start = find_line_start(mm, index, start_line)
+        end = len(mm) if end_line is None else find_line_start(mm, index, end_line + 1)
+        return decode_lines(mm[start:end], encoding)
+
+
+def read_head(path: str, lines: int, encoding: str = 'utf-8') -> str:
+    """
+    Read the first lines of a file, scanning only as far as needed.
+    
+    Args:
+        path: The path to the file to read
+        lines: Number of lines to return
+        encoding: Encoding of the file, which must be ASCII-compatible (default: UTF-8)
+        
+    Returns:
+        The decoded lines
+    """
+    if lines < 0:
+        raise ValueError("head must be non-negative")
+    
+    with map_file(path) as mm:
+        if mm is None:
+            return ""
+        end = 0
+        for _ in range(lines):
+            newline = mm.find(b'\n', end)
+            if newline == -1:
+                end = len(mm)
+                break
+            end = newline + 1
+        return decode_lines(mm[:end], encoding)
+
+
+def read_tail(path: str, lines: int, encoding: str = 'utf-8') -> str:
+    """
+    Read the last lines of a file, scanning backwards from the end.
+    
+    Args:
+        path: The path to the file to read
+        lines: Number of lines to return
+        encoding: Encoding of the file, which must be ASCII-compatible (default: UTF-8)
+        
+    Returns:
+        The decoded lines
+    """
+    if lines < 0:
+        raise ValueError("tail must be non-negative")
+    
+    with map_file(path) as mm:
+        if mm is None or lines == 0:
+            return ""
+        size = len(mm)
+        # A trailing newline terminates the last line rather than starting a new one
+        search_end = size - 1 if mm[size - 1:size] == b'\n' else size
+        start = search_end
+        for _ in range(lines):
+            newline = mm.rfind(b'\n', 0, start)
+            if newline == -1:
+                start = 0
+                break
+            start = newline
+        else:
+            start += 1
+        return decode_lines(mm[start:], encoding)
+
+
+def select_text_lines(
+    text: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+) -> str:
+    """
+    Select a line range, head or tail from decoded text, for files the byte-level readers cannot split.
+    
+    Args:
+        text: The decoded file contents
+        start_line: First line to return (1-based, inclusive)
+        end_line: Last line to return (1-based, inclusive)
+        head: Number of lines from the start
+        tail: Number of lines from the end
+        
+    Returns:
+        The selected lines
+    """
+    if any(value is not None and value < 0 for value in (head, tail)):
+        raise ValueError("head and tail must be non-negative")
+    if start_line is not None and start_line < 1 or end_line is not None and end_line < (start_line or 1):
+        raise ValueError("start_line must be >= 1 and end_line must be >= start_line")
+    
+    lines = text.split('\n')
+    lines = [line + '\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+    if head is not None:
+        return ''.join(lines[:head])
+    if tail is not None:
+        return ''.join(lines[len(lines) - tail:]) if tail else ''
+    return ''.join(lines[(start_line or 1) - 1:end_line])
+
+
+def read_file_contents(
+    path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+) -> str:
+    """
+    Read a file, either completely or only the requested part of it.
+    
+    At most one of the byte-range (offset/length), line-range (start_line/end_line),
+    head and tail modes may be used at a time.
+    
+    Args:
+        path: The path to the file to read
+        offset: Byte offset to start reading from
+        length: Number of bytes to read
+        start_line: First line to read (1-based, inclusive)
+        end_line: Last line to read (1-based, inclusive)
+        head: Number of lines to read from the start of the file
+        tail: Number of lines to read from the end of the file
+        
+    Returns:
+        The requested contents of the file
+        
+    Raises:
+        ValueError: If several read modes are combined or a bound is invalid
+    """
+    modes = [
+        offset is not None or length is not None,
+        start_line is not None or end_line is not None,
+        head is not None,
+        tail is not None,
+    ]
+    if sum(modes) > 1:
+        raise ValueError("Use only one of offset/length, start_line/end_line, head or tail")
+    
+    sniff = sniff_file(path)
+    if sniff.is_binary:
+        return describe_binary_file(path, sniff)
+    encoding = sniff.encoding
+    
+    if modes[0]:
+        return read_byte_range(path, offset or 0, length, encoding)
+    
+    if encoding in WIDE_ENCODINGS and any(modes):
+        # A newline is not a single 0x0A byte here, so lines are cut from the decoded text
+        return select_text_lines(read_text_cached(path, encoding=encoding, errors='replace'), start_line, end_line, head, tail)
+    
+    if modes[1]:
+        return read_line_range(path, start_line or 1, end_line, encoding)
+    if modes[2]:
+        return read_head(path, head, encoding)
+    if modes[3]:
+        return read_tail(path, tail, encoding)
+    
+    return read_text_cached(path, encoding=encoding, errors='replace')
+
+
+@file_tool
+def read_file(
+    path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+) -> str:
+    """
+    Read contents of a file. Prefer a partial read for large files.
+    
+    The encoding is detected from the first few KB (BOM, UTF-8 or a legacy
+    encoding). Binary files such as PDFs, images or parquet files are not
+    read; a one-line descriptor with their type and size is returned instead.
+    
+    Args:
+        path: The path to the file to read
+        offset: Byte offset to start reading from (use with length)
+        length: Number of bytes to read from offset
+        start_line: First line to read, 1-based and inclusive (use with end_line)
+        end_line: Last line to read, 1-based and inclusive
+        head: Read only the first N lines
+        tail: Read only the last N lines
+        
+    Returns:
+        The requested contents of the file, or a descriptor for a binary file
+        
+    Raises:
+        FileNotFoundError: If the file does not exist
+        PermissionError: If the file cannot be read due to permissions
+        ValueError: If several read modes are combined
+    """
+    return read_file_contents(check_path(path), offset, length, start_line, end_line, head, tail)
+    
+############# End of READ FILE #############
+
+
+############# READ  MULTIPLE FILES  #############
+READ_MULTIPLE_FILES_MAX_WORKERS = 8
+READ_MULTIPLE_FILES_MAX_BYTES = 512 * 1024
+
+
+def format_file_result(file_path: str, content: str) -> str:
+    """
+    Format the result of reading one file into a LLM-friendly block.
+    
+    Args:
+        file_path: The path of the file
+        content: The file contents or an error message
+        
+    Returns:
+        Formatted block with the file contents or error message
+    """
+    formatted_output = [f"File: {file_path}", "-" * 40]
+    
+    if content.startswith("Error"):
+        formatted_output.append(f"[ERROR] {content}")
+    else:
+        formatted_output.append(content)
+    
+    formatted_output.append("\n")
+    
+    return "\n".join(formatted_output)
+
+
+def format_multiple_files_result(results: Dict[str, str]) -> str:
+    """
+    Format the results of reading multiple files into a LLM-friendly string.
+    
+    Args:
+        results: Dictionary mapping file paths to either their contents or error messages
+        
+    Returns:
+        Formatted string with file contents or error messages
+    """
+    return "\n".join(format_file_result(file_path, content) for file_path, content in results.items())
+
+
+def read_file_within_budget(path: str, size: int, allowance: int) -> str:
+    """
+    Read a file, truncating it to its share of the batch budget.
+    
+    Args:
+        path: The path to the file to read
+        size: Size of the file in bytes
+        allowance: Maximum number of bytes to read
+        
+    Returns:
+        The file contents, with a truncation note if it was cut
+    """
+    sniff = sniff_file(path)
+    if sniff.is_binary:
+        return describe_binary_file(path, sniff)
+    if allowance >= size:
+        return read_text_cached(path, encoding=sniff.encoding, errors='replace')
+    
+    content = read_byte_range(path, 0, allowance, sniff.encoding)
+    return f"{content}\n[Truncated: showing first {allowance} of {size} bytes]"
+
+
+def read_multiple_files_results(paths: List[str], max_total_bytes: int = READ_MULTIPLE_FILES_MAX_BYTES) -> List[str]:
+    """
+    Read files concurrently and format one block per file.
+    
+    Args:
+        paths: List of file paths to read
+        max_total_bytes: Byte budget shared by all files
+        
+    Returns:
+        Formatted block per file, in request order
+    """
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return []
+    
+    sizes = []
+    for file_path in paths:
+        try:
+            sizes.append(os.stat(check_path(file_path)).st_size)
+        except (OSError, ValueError):
+            # The read itself reports the error
+            sizes.append(0)
+    allowances = allocate_budget(sizes, max_total_bytes)
+    
+    def read_one(file_path: str, size: int, allowance: int) -> str:
+        try:
+            content = read_file_within_budget(check_path(file_path), size, allowance)
+        except Exception as e:
+            content = f"Error - {str(e)}"
+        return format_file_result(file_path, content)
+    
+    max_workers = min(READ_MULTIPLE_FILES_MAX_WORKERS, len(paths))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_one, paths, sizes, allowances))
+
+
+@file_tool
+def read_multiple_files(paths: List[str], max_total_bytes: int = READ_MULTIPLE_FILES_MAX_BYTES) -> str:
+    """
+    Read multiple files simultaneously.
+    
+    Files are read concurrently. When together they exceed max_total_bytes, each
+    file is truncated to a fair share of the budget.
+    
+    Args:
+        paths: List of file paths to read
+        max_total_bytes: Maximum number of bytes to return across all files (default: 512 KB)
+        
+    Returns:
+        Formatted string with file contents or error messages
+    """
+    return "\n".join(read_multiple_files_results(paths, max_total_bytes))
+
+############# End of READ  MULTIPLE FILES  #############
+
+
+############# WRITE FILE  #############
+# mkstemp creates files as 0600; new files get the usual umask-based mode instead
+_umask = os.umask(0)
+os.umask(_umask)
+
+# Temporary files of a write_multiple_files batch are written and fsync-ed in parallel
+ATOMIC_WRITE_MAX_WORKERS = 8
+
+
+def fsync_directory(directory: str) -> None:
+    """
+    Flush a directory entry to disk, making renames inside it durable.
+    
+    Args:
+        directory: The directory to flush
+    """
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp_file(path: str, content: str, fsync: bool) -> str:
+    """
+    Write content to a temporary file next to path, ready to be renamed over it.
+    
+    Args:
+        path: Final location of the file
+        content: Content to write
+        fsync: Flush the file data to disk before returning
+        
+    Returns:
+        Path of the temporary file
+    """
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(content)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_umask
+        os.chmod(temp_path, mode)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path
+
+
+def atomic_write_text(path: str, content: str, fsync: bool = True) -> None:
+    """
+    Replace a file's content atomically.
+    
+    The content goes to a temporary file in the same directory, which is then
+    renamed over the target with os.replace. Readers and concurrent writers see
+    either the old or the new file, never a partial one. Symlinks are written through.
+    
+    Args:
+        path: File location to write to
+        content: Content to write
+        fsync: Flush the file and its directory to disk (default: True)
+    """
+    path = os.path.realpath(path)
+    temp_path = write_temp_file(path, content, fsync)
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    if fsync:
+        fsync_directory(os.path.dirname(path))
+
+
+def atomic_write_files(files: List[Tuple[str, str]], fsync: bool = True) -> None:
+    """
+    Atomically replace many files, paying for directory flushes once per batch.
+    
+    All temporary files are written and fsync-ed in parallel first, then renamed
+    into place, and then each affected directory is fsync-ed once.
+    
+    Args:
+        files: (path, content) pairs
+        fsync: Make the batch durable before returning (default: True)
+    """
+    if not files:
+        return
+    
+    paths = [os.path.realpath(path) for path, _ in files]
+    max_workers = min(ATOMIC_WRITE_MAX_WORKERS, len(files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(write_temp_file, path, content, fsync) for path, (_, content) in zip(paths, files)]
+    
+    pending = []
+    error: Optional[BaseException] = None
+    for future, path in zip(futures, paths):
+        try:
+            pending.append((future.result(), path))
+        except BaseException as e:
+            error = error or e
+    try:
+        if error is not None:
+            raise error
+        while pending:
+            temp_path, path = pending[0]
+            os.replace(temp_path, path)
+            pending.pop(0)
+    finally:
+        for temp_path, _ in pending:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+    
+    if fsync:
+        for directory in {os.path.dirname(path) for path in paths}:
+            fsync_directory(directory)
+
+
+WRITE_SESSION_MAX = 32
+
+_write_sessions: Dict[str, "WriteSession"] = {}
+_write_sessions_lock = threading.Lock()
+
+
+class WriteSession(NamedTuple):
+    """A file kept open across write_file calls."""
+    path: str
+    # Positional writes go through fd; appends through append_fd, opened with O_APPEND
+    # (on Linux, pwrite on an O_APPEND descriptor ignores the offset)
+    fd: int
+    append_fd: int
+    lock: threading.Lock
+
+
+def write_all(fd: int, data: bytes, offset: Optional[int] = None) -> None:
+    """
+    Write all of data to a file descriptor, at offset or at the current position.
+    
+    Args:
+        fd: Open file descriptor
+        data: Bytes to write
+        offset: Byte offset to write at (default: the current position)
+    """
+    view = memoryview(data)
+    while view:
+        if offset is None:
+            written = os.write(fd, view)
+        else:
+            written = os.pwrite(fd, view, offset)
+            offset += written
+        view = view[written:]
+
+
+def write_chunk(fd: int, content: str, mode: str, offset: Optional[int], fsync: bool) -> int:
+    """
+    Append content to an open file, or write it at a byte offset.
+    
+    Appends rely on O_APPEND, so the kernel moves to the end of the file and
+    writes in one step and concurrent appenders never overwrite each other.
+    
+    Args:
+        fd: File descriptor opened for writing, with O_APPEND for "append"
+        content: Content to write
+        mode: "append" or "at_offset"
+        offset: Byte offset for "at_offset"
+        fsync: Flush the write to disk
+        
+    Returns:
+        Number of bytes written
+    """
+    data = content.encode('utf-8')
+    if mode == "append":
+        write_all(fd, data)
+    else:
+        if offset is None or offset < 0:
+            raise ValueError("mode 'at_offset' needs a non-negative offset")
+        write_all(fd, data, offset)
+    if fsync:
+        os.fsync(fd)
+    return len(data)
+
+
+def open_write_session_fd(path: str, truncate: bool = False) -> str:
+    """
+    Open a file for repeated chunked writes and register it as a session.
+    
+    Args:
+        path: File to open, created if missing
+        truncate: Empty the file first
+        
+    Returns:
+        Session id
+        
+    Raises:
+        RuntimeError: If too many sessions are open
+    """
+    with _write_sessions_lock:
+        if len(_write_sessions) >= WRITE_SESSION_MAX:
+            raise RuntimeError(f"Too many open write sessions (max {WRITE_SESSION_MAX}); close one first")
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if truncate else 0)
+        fd = os.open(path, flags, 0o666)
+        try:
+            append_fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        except OSError:
+            os.close(fd)
+            raise
+        session_id = uuid.uuid4().hex[:12]
+        _write_sessions[session_id] = WriteSession(os.path.realpath(path), fd, append_fd, threading.Lock())
+    return session_id
+
+
+def close_write_session_fd(session_id: str) -> str:
+    """
+    Flush and close a write session.
+    
+    Args:
+        session_id: Id returned when the session was opened
+        
+    Returns:
+        Path of the file the session wrote to
+        
+    Raises:
+        KeyError: If there is no such session
+    """
+    with _write_sessions_lock:
+        session = _write_sessions.pop(session_id)
+    with session.lock:
+        try:
+            os.fsync(session.fd)
+        finally:
+            os.close(session.fd)
+            os.close(session.append_fd)
+    return session.path
+
+
+@atexit.register
+def close_all_write_sessions() -> None:
+    """Close every write session left open when the process exits."""
+    for session_id in list(_write_sessions):
+        try:
+            close_write_session_fd(session_id)
+        except (KeyError, OSError):
+            pass
+
+
+@file_tool
+def write_file(
+    path: str,
+    content: str,
+    mode: Literal["overwrite", "append", "at_offset"] = "overwrite",
+    offset: Optional[int] = None,
+    session_id: Optional[str] = None,
+    fsync: bool = True,
+) -> str:
+    """
+    Create new file or overwrite existing file with content, or add a chunk to it.
+    
+    "overwrite" replaces the file atomically, so a crash never leaves it half-written.
+    "append" adds content at the end and "at_offset" writes it at a byte offset; both
+    cost only the size of the chunk. To write a long document section by section,
+    open a session with open_write_session and pass its session_id.
+    
+    Args:
+        path: File location to write to
+        content: Content to write to the file
+        mode: "overwrite" (default), "append" or "at_offset"
+        offset: Byte offset to write at, for mode "at_offset"
+        session_id: Write session from open_write_session, keeping the file open between calls
+        fsync: Flush the write to disk before returning (default: True)
+        
+    Returns:
+        Success message
+        
+    Raises:
+        PermissionError: If the file cannot be written due to permissions
+        ValueError: If the mode, offset or session is invalid
+    """
+    path = check_path(path)
+    invalidate_path_cache(path)
+    
+    if session_id is not None:
+        session = _write_sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"Unknown write session: {session_id}")
+        if session.path != os.path.realpath(path):
+            raise ValueError(f"Write session {session_id} is for {session.path}, not {path}")
+        if mode == "overwrite":
+            raise ValueError("Write sessions only support mode 'append' or 'at_offset'")
+        with session.lock:
+            fd = session.append_fd if mode == "append" else session.fd
+            written = write_chunk(fd, content, mode, offset, fsync)
+        invalidate_content_cache(path)
+        return f"Successfully wrote {written} bytes to {path} ({mode})"
+    
+    if mode == "overwrite":
+        atomic_write_text(path, content, fsync)
+        update_content_cache(path, content)
+        return f"Successfully wrote to {path}"
+    
+    if mode not in ("append", "at_offset"):
+        raise ValueError(f"Unknown write mode: {mode}")
+    
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | (os.O_APPEND if mode == "append" else 0), 0o666)
+    try:
+        written = write_chunk(fd, content, mode, offset, fsync)
+    finally:
+        os.close(fd)
+    invalidate_content_cache(path)
+    return f"Successfully wrote {written} bytes to {path} ({mode})"
+
+
+@file_tool
+def open_write_session(path: str, truncate: bool = False) -> str:
+    """
+    Keep a file open for writing across several write_file calls.
+    
+    Use it to write a long document section by section with write_file(mode="append").
+    Close the session with close_write_session when done.
+    
+    Args:
+        path: File to write, created if missing
+        truncate: Empty the file first (default: False)
+        
+    Returns:
+        Message with the session id to pass to write_file
+    """
+    session_id = open_write_session_fd(check_path(path), truncate)
+    invalidate_path_cache(path)
+    return f"Opened write session {session_id} for {path}"
+
+
+@file_tool
+def close_write_session(session_id: str) -> str:
+    """
+    Flush and close a write session opened with open_write_session.
+    
+    Args:
+        session_id: The session id
+        
+    Returns:
+        Success message
+    """
+    try:
+        path = close_write_session_fd(session_id)
+    except KeyError:
+        raise ValueError(f"Unknown write session: {session_id}")
+    return f"Closed write session {session_id} for {path}"
+
+
+@file_tool(strict_mode=False)
+def write_multiple_files(files: List[Dict[str, str]], fsync: bool = True) -> str:
+    """
+    Create or overwrite many files in one call, e.g. to scaffold a project.
+    
+    Every file is replaced atomically. The files are flushed to disk in parallel,
+    and each directory is flushed once per batch rather than once per file.
+    
+    Args:
+        files: List of files to write, each containing 'path' and 'content'
+        fsync: Flush the writes to disk before returning (default: True)
+        
+    Returns:
+        Success message
+        
+    Raises:
+        KeyError: If a file entry lacks 'path' or 'content'
+        PermissionError: If a file cannot be written due to permissions
+    """
+    paths = [check_path(file['path']) for file in files]
+    atomic_write_files([(path, file['content']) for path, file in zip(paths, files)], fsync)
+    for path, file in zip(paths, files):
+        invalidate_path_cache(path)
+        update_content_cache(path, file['content'])
+    
+    return f"Successfully wrote {len(files)} files"
+############# End of WRITE FILE  #############
+
+############# EDIT FILE  #############
+DIFF_CONTEXT_LINES = 3
+DIFF_MAX_LINES = 500
+# Regions without unique common lines are diffed with difflib only if they are this small
+DIFF_SMALL_REGION_CELLS = 10_000
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def patience_opcodes(a: List[str], b: List[str]) -> List[Opcode]:
+    """
+    Diff two lists of lines with the patience algorithm.
+    
+    Lines that occur exactly once on both sides anchor the diff (picked by a
+    longest increasing subsequence), and the gaps between anchors are diffed
+    recursively. Unlike difflib it stays fast on inputs with many repeated lines.
+    
+    Args:
+        a: Original lines
+        b: New lines
+        
+    Returns:
+        difflib-style opcodes, with adjacent changes merged into 'replace'
+    """
+    raw: List[Opcode] = []
+    stack: List[Tuple] = [('segment', 0, len(a), 0, len(b))]
+    
+    while stack:
+        item = stack.pop()
+        if item[0] != 'segment':
+            raw.append(item)
+            continue
+        _, alo, ahi, blo, bhi = item
+        
+        start_a, start_b = alo, blo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start_a:
+            raw.append(('equal', start_a, alo, start_b, blo))
+        
+        end_a, end_b = ahi, bhi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if ahi < end_a:
+            stack.append(('equal', ahi, end_a, bhi, end_b))
+        
+        if alo == ahi or blo == bhi:
+            if alo < ahi:
+                raw.append(('delete', alo, ahi, blo, blo))
+            elif blo < bhi:
+                raw.append(('insert', alo, alo, blo, bhi))
+            continue
+        
+        counts: Dict[str, List[int]] = {}
+        for i in range(alo, ahi):
+            entry = counts.setdefault(a[i], [0, 0, i, 0])
+            entry[0] += 1
+        for j in range(blo, bhi):
+            entry = counts.get(b[j])
+            if entry is not None:
+                entry[1] += 1
+                entry[3] = j
+        pairs = sorted((i, j) for count_a, count_b, i, j in counts.values() if count_a == 1 and count_b == 1)
+        anchors = longest_increasing_pairs(pairs)
+        
+        if not anchors:
+            if (ahi - alo) * (bhi - blo) <= DIFF_SMALL_REGION_CELLS:
+                matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                    raw.append((tag, alo + i1, alo + i2, blo + j1, blo + j2))
+            else:
+                raw.append(('replace', alo, ahi, blo, bhi))
+            continue
+        
+        # Push the pieces in reverse so they are processed left to right
+        pieces: List[Tuple] = []
+        prev_i, prev_j = alo, blo
+        for i, j in anchors:
+            pieces.append(('segment', prev_i, i, prev_j, j))
+            pieces.append(('equal', i, i + 1, j, j + 1))
+            prev_i, prev_j = i + 1, j + 1
+        pieces.append(('segment', prev_i, ahi, prev_j, bhi))
+        stack.extend(reversed(pieces))
+    
+    opcodes: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in raw:
+        if i1 == i2 and j1 == j2:
+            continue
+        if opcodes and (opcodes[-1][0] == 'equal') == (tag == 'equal'):
+            last = opcodes[-1]
+            i1, j1 = last[1], last[3]
+            if tag != 'equal':
+                tag = 'replace' if i1 < i2 and j1 < j2 else ('delete' if i1 < i2 else 'insert')
+            opcodes[-1] = (tag, i1, i2, j1, j2)
+        else:
+            opcodes.append((tag, i1, i2, j1, j2))
+    return opcodes
+
+
+def longest_increasing_pairs(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Longest subsequence of (i, j) pairs, sorted by i, whose j is increasing (patience sorting).
+    
+    Args:
+        pairs: Pairs sorted by their first element
+        
+    Returns:
+        The longest chain of pairs increasing in both elements
+    """
+    tails: List[int] = []
+    tail_js: List[int] = []
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect_left(tail_js, j)
+        if pile > 0:
+            previous[k] = tails[pile - 1]
+        if pile == len(tails):
+            tails.append(k)
+            tail_js.append(j)
+        else:
+            tails[pile] = k
+            tail_js[pile] = j
+    
+    chain = []
+    k = tails[-1] if tails else -1
+    while k != -1:
+        chain.append(pairs[k])
+        k = previous[k]
+    chain.reverse()
+    return chain
+
+
+def group_opcodes(opcodes: List[Opcode], n: int = DIFF_CONTEXT_LINES) -> Iterator[List[Opcode]]:
+    """
+    Group opcodes into hunks with n lines of context, like difflib.SequenceMatcher.get_grouped_opcodes.
+    
+    Args:
+        opcodes: Opcodes covering both sequences
+        n: Lines of context
+        
+    Yields:
+        Lists of opcodes, one per hunk
+    """
+    codes = list(opcodes)
+    if not codes:
+        return
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > n + n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def format_unified_range(start: int, stop: int) -> str:
+    """Format a hunk range the way difflib.unified_diff does."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def format_unified_hunks(a: List[str], b: List[str], a_offset: int, b_offset: int, output: List[str], max_lines: int) -> bool:
+    """
+    Append the unified diff hunks between two lists of lines to output.
+    
+    Args:
+        a: Original lines
+        b: New lines
+        a_offset: Line number of a[0] in the original file (0-based)
+        b_offset: Line number of b[0] in the new file (0-based)
+        output: List that diff lines are appended to
+        max_lines: Stop once output holds this many lines
+        
+    Returns:
+        False if output reached max_lines and the diff was cut short
+    """
+    for group in group_opcodes(patience_opcodes(a, b)):
+        first, last = group[0], group[-1]
+        a_range = format_unified_range(a_offset + first[1], a_offset + last[2])
+        b_range = format_unified_range(b_offset + first[3], b_offset + last[4])
+        output.append(f"@@ -{a_range} +{b_range} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                output.extend(' ' + line for line in a[i1:i2])
+                continue
+            if tag in ('replace', 'delete'):
+                output.extend('-' + line for line in a[i1:i2])
+            if tag in ('replace', 'insert'):
+                output.extend('+' + line for line in b[j1:j2])
+        if len(output) >= max_lines:
+            return False
+    return True
+
+
+def finish_diff(output: List[str], filepath: str, complete: bool, max_lines: int) -> str:
+    """
+    Add the file header to diff hunks and cap their length.
+    
+    Args:
+        output: Hunk lines
+        filepath: Name of the file for the diff header
+        complete: Whether all hunks were generated
+        max_lines: Maximum number of hunk lines to keep
+        
+    Returns:
+        Unified diff as a string
+    """
+    if not output:
+        return ''
+    
+    lines = [f"--- {filepath} (original)", f"+++ {filepath} (modified)", *output[:max_lines]]
+    if not complete or len(output) > max_lines:
+        lines.append(f"... [Diff truncated after {max_lines} lines]")
+    return '\n'.join(lines)
+
+
+def create_unified_diff(original_content: str, new_content: str, filepath: str = 'file', max_lines: int = DIFF_MAX_LINES) -> str:
+    """
+    Create a unified diff between original and new content.
+    
+    Args:
+        original_content: Original file content
+        new_content: Modified file content
+        filepath: Name of the file for the diff header
+        max_lines: Maximum number of diff lines to emit
+        
+    Returns:
+        Unified diff as a string
+    """
+    # Ensure consistent line endings for diff
+    original_lines = normalize_line_endings(original_content).splitlines()
+    new_lines = normalize_line_endings(new_content).splitlines()
+    
+    output: List[str] = []
+    complete = format_unified_hunks(original_lines, new_lines, 0, 0, output, max_lines)
+    return finish_diff(output, filepath, complete, max_lines)
+
+
+def create_edit_diff(content: str, spans: List["EditSpan"], filepath: str = 'file', max_lines: int = DIFF_MAX_LINES) -> str:
+    """
+    Create a unified diff for located edits, looking only at the edited regions.
+    
+    Each span is widened to whole lines plus DIFF_CONTEXT_LINES of context,
+    overlapping regions are merged, and only those regions are diffed, so the
+    cost does not depend on the size of the file.
+    
+    Args:
+        content: Original content with normalized line endings
+        spans: Edit spans sorted by position
+        filepath: Name of the file for the diff header
+        max_lines: Maximum number of diff lines to emit
+        
+    Returns:
+        Unified diff as a string
+    """
+    # [start char, end char, first line, spans]
+    regions: List[list] = []
+    cursor_pos = cursor_line = 0
+    
+    for span in spans:
+        line = cursor_line + content.count('\n', cursor_pos, span.start)
+        cursor_pos, cursor_line = span.start, line
+        
+        start = span.start
+        found = 0
+        for _ in range(DIFF_CONTEXT_LINES + 1):
+            newline = content.rfind('\n', 0, start)
+            if newline == -1:
+                start = -1
+                break
+            start = newline
+            found += 1
+        first_line = line - DIFF_CONTEXT_LINES if found == DIFF_CONTEXT_LINES + 1 else 0
+        start += 1
+        
+        end = max(span.start, span.end - 1)
+        for k in range(DIFF_CONTEXT_LINES + 1):
+            newline = content.find('\n', end if k == 0 else end + 1)
+            if newline == -1:
+                end = len(content)
+                break
+            end = newline
+        
+        if regions and start <= regions[-1][1] + 1:
+            regions[-1][1] = max(regions[-1][1], end)
+            regions[-1][3].append(span)
+        else:
+            regions.append([start, end, first_line, [span]])
+    
+    output: List[str] = []
+    delta = 0
+    for start, end, first_line, region_spans in regions:
+        old_text = content[start:end]
+        new_text = splice_edits(old_text, [
+            EditSpan(span.start - start, span.end - start, span.text) for span in region_spans
+        ])
+        old_lines = old_text.splitlines()
+        new_lines = new_text.splitlines()
+        if not format_unified_hunks(old_lines, new_lines, first_line, first_line + delta, output, max_lines):
+            return finish_diff(output, filepath, False, max_lines)
+        delta += len(new_lines) - len(old_lines)
+    
+    return finish_diff(output, filepath, True, max_lines)
+
+
+def reindent_new_lines(first_content_line: str, old_lines: List[str], new_text: str) -> List[str]:
+    """
+    Re-indent replacement lines for a whitespace-insensitive match.
+    
+    The first line takes the indentation of the matched content line; later lines
+    keep their indentation relative to the corresponding old lines.
+    
+    Args:
+        first_content_line: First line of the matched content
+        old_lines: Lines of the edit's oldText
+        new_text: The edit's newText
+        
+    Returns:
+        Replacement lines
+    """
+    original_indent_match = re.match(r'^\s*', first_content_line)
+    original_indent = original_indent_match.group(0) if original_indent_match else ''
+    
+    new_lines = []
+    for j, line in enumerate(new_text.split('\n')):
+        if j == 0:
+            # For first line, preserve original indentation
+            new_lines.append(original_indent + line.lstrip())
+        else:
+            # For subsequent lines, try to preserve relative indentation
+            if j < len(old_lines):
+                old_indent_match = re.match(r'^\s*', old_lines[j])
+                old_indent = old_indent_match.group(0) if old_indent_match else ''
+                
+                new_indent_match = re.match(r'^\s*', line)
+                new_indent = new_indent_match.group(0) if new_indent_match else ''
+                
+                if old_indent and new_indent:
+                    relative_indent = len(new_indent) - len(old_indent)
+                    new_lines.append(original_indent + ' ' * max(0, relative_indent) + line.lstrip())
+                else:
+                    new_lines.append(line)
+            else:
+                new_lines.append(line)
+    
+    return new_lines
+
+
+def apply_edits_sequentially(content: str, edits: List[Dict[str, str]]) -> str:
+    """
+    Apply edits one after another, each to the result of the previous one.
+    
+    Used when edits depend on each other, e.g. an edit matches text that an
+    earlier edit inserted.
+    
+    Args:
+        content: File content with normalized line endings
+        edits: List of edit operations, each containing 'oldText' and 'newText'
+        
+    Returns:
+        Modified content
+        
+    Raises:
+        ValueError: If an edit cannot be applied
+    """
+    modified_content = content
+    for edit in edits:
+        normalized_old = normalize_line_endings(edit['oldText'])
+        normalized_new = normalize_line_endings(edit['newText'])
+        
+        # If exact match exists, use it
+        if normalized_old in modified_content:
+            modified_content = modified_content.replace(normalized_old, normalized_new)
+            continue
+        
+        # Otherwise, try line-by-line matching with flexibility for whitespace
+        old_lines = normalized_old.split('\n')
+        content_lines = modified_content.split('\n')
+        match_found = False
+        
+        for i in range(len(content_lines) - len(old_lines) + 1):
+            potential_match = content_lines[i:i + len(old_lines)]
+            
+            # Compare lines with normalized whitespace
+            is_match = all(old_line.strip() == content_line.strip() 
+                          for old_line, content_line in zip(old_lines, potential_match))
+            
+            if is_match:
+                # Replace the matched lines with the new lines
+                content_lines[i:i + len(old_lines)] = reindent_new_lines(content_lines[i], old_lines, normalized_new)
+                modified_content = '\n'.join(content_lines)
+                match_found = True
+                break
+        
+        if not match_found:
+            raise ValueError(f"Could not find exact match for edit:\n{edit['oldText']}")
+    
+    return modified_content
+
+
+class EditSpan(NamedTuple):
+    """A located edit: replace content[start:end] with text."""
+    start: int
+    end: int
+    text: str
+
+
+# Beyond this many matches, checking every match for dependencies costs more
+# than applying the edits one after another with str.replace
+LOCATE_EDITS_MAX_SPANS = 1000
+
+
+def new_text_may_feed(new_text: str, old_text: str) -> bool:
+    """
+    Check whether text inserted by one edit could be part of a later edit's match.
+    
+    A match overlapping the inserted text shares at least one character with it.
+    Deletions and whitespace-only insertions can join or re-indent lines, so
+    they always count.
+    
+    Args:
+        new_text: The earlier edit's normalized newText
+        old_text: The later edit's normalized oldText
+        
+    Returns:
+        False if no match of old_text can overlap new_text
+    """
+    return not new_text.strip() or not set(new_text).isdisjoint(old_text)
+
+
+def edit_touches_span(
+    content: str,
+    spans: List[EditSpan],
+    starts: List[int],
+    span: EditSpan,
+    old_text: str,
+    stripped_old: List[str],
+    fuzzy: bool,
+) -> bool:
+    """
+    Check whether an edit could match text around an earlier edit.
+    
+    Applied one after another, a later edit sees the text an earlier edit inserted.
+    This looks for matches of old_text in the few lines around span, as they read
+    after span is applied, that overlap the inserted text.
+    
+    Args:
+        content: Original content
+        spans: All spans located so far, sorted by start
+        starts: Start of each span in spans, for bisecting
+        span: The earlier span to check around
+        old_text: The edit's normalized oldText
+        stripped_old: The stripped lines of old_text
+        fuzzy: Also look for whitespace-insensitive line matches
+        
+    Returns:
+        True if the edit may match there (or nearby edits make it unclear)
+    """
+    n = len(stripped_old)
+    
+    window_start = span.start
+    for _ in range(n):
+        window_start = content.rfind('\n', 0, window_start)
+        if window_start == -1:
+            break
+    window_start += 1
+    
+    window_end = span.end
+    for k in range(n):
+        newline = content.find('\n', window_end if k == 0 else window_end + 1)
+        if newline == -1:
+            window_end = len(content)
+            break
+        window_end = newline
+    
+    # Only the spans starting inside the window, and the one just before it, can reach into it
+    for j in range(max(bisect_left(starts, window_start) - 1, 0), bisect_right(starts, window_end)):
+        other = spans[j]
+        if other is not span and other.start <= window_end and other.end >= window_start:
+            return True
+    
+    left = content[window_start:span.start]
+    text = left + span.text + content[span.end:window_end]
+    inserted_start, inserted_end = len(left), len(left) + len(span.text)
+    
+    position = text.find(old_text)
+    while position != -1:
+        end = position + len(old_text)
+        if position < inserted_end and end > inserted_start:
+            return True
+        if inserted_start == inserted_end and position < inserted_start < end:
+            return True
+        position = text.find(old_text, position + 1)
+    
+    if fuzzy:
+        lines = [line.strip() for line in text.split('\n')]
+        first_modified = text.count('\n', 0, inserted_start)
+        last_modified = text.count('\n', 0, inserted_end)
+        for i in range(len(lines) - n + 1):
+            if i <= last_modified and i + n > first_modified and lines[i:i + n] == stripped_old:
+                return True
+    
+    return False
+
+
+def locate_edits(content: str, edits: List[Dict[str, str]]) -> Optional[List[EditSpan]]:
+    """
+    Locate every edit in the original content in a single pass.
+    
+    Exact matches are found with str.find. For whitespace-insensitive matches the
+    content is split and stripped once, and a map from stripped line to line
+    numbers gives the candidate positions of each edit, starting from its rarest line.
+    
+    Args:
+        content: File content with normalized line endings
+        edits: List of edit operations, each containing 'oldText' and 'newText'
+        
+    Returns:
+        Edit spans sorted by position, or None if the edits overlap or depend on
+        each other and must be applied sequentially
+    """
+    # Kept sorted by start, so neighbouring spans are found by bisecting
+    spans: List[EditSpan] = []
+    starts: List[int] = []
+    lines: Optional[List[str]] = None
+    
+    def add_span(span: EditSpan) -> None:
+        i = bisect_right(starts, span.start)
+        starts.insert(i, span.start)
+        spans.insert(i, span)
+    
+    for index, edit in enumerate(edits):
+        normalized_old = normalize_line_endings(edit['oldText'])
+        normalized_new = normalize_line_endings(edit['newText'])
+        if not normalized_old:
+            return None
+        old_lines = normalized_old.split('\n')
+        stripped_old = [line.strip() for line in old_lines]
+        exact = normalized_old in content
+        
+        # An earlier edit may have inserted the text this edit is looking for
+        earlier_new = {normalize_line_endings(earlier['newText']) for earlier in edits[:index]}
+        if any(new_text_may_feed(new_text, normalized_old) for new_text in earlier_new):
+            if any(edit_touches_span(content, spans, starts, span, normalized_old, stripped_old, not exact)
+                   for span in spans if new_text_may_feed(span.text, normalized_old)):
+                return None
+        
+        if exact:
+            start = content.find(normalized_old)
+            while start != -1:
+                if len(spans) >= LOCATE_EDITS_MAX_SPANS:
+                    return None
+                add_span(EditSpan(start, start + len(normalized_old), normalized_new))
+                start = content.find(normalized_old, start + len(normalized_old))
+            continue
+        
+        if lines is None:
+            lines = content.split('\n')
+            stripped_lines = [line.strip() for line in lines]
+            positions: Dict[str, List[int]] = {}
+            for number, line in enumerate(stripped_lines):
+                positions.setdefault(line, []).append(number)
+            line_starts = [0, *accumulate(len(line) + 1 for line in lines)]
+        
+        # Anchor on the old line with the fewest occurrences in the file
+        anchor = min(range(len(old_lines)), key=lambda k: len(positions.get(stripped_old[k], ())))
+        match = None
+        for number in positions.get(stripped_old[anchor], ()):
+            i = number - anchor
+            if i < 0 or i + len(old_lines) > len(lines):
+                continue
+            if stripped_lines[i:i + len(old_lines)] == stripped_old:
+                match = i
+                break
+        
+        if match is None:
+            return None
+        
+        if len(spans) >= LOCATE_EDITS_MAX_SPANS:
+            return None
+        new_lines = reindent_new_lines(lines[match], old_lines, normalized_new)
+        add_span(EditSpan(
+            line_starts[match],
+            line_starts[match + len(old_lines)] - 1,
+            '\n'.join(new_lines),
+        ))
+    
+    for previous, current in zip(spans, spans[1:]):
+        if current.start <= previous.end:
+            return None
+    return spans
+
+
+def splice_edits(content: str, spans: List[EditSpan]) -> str:
+    """
+    Apply sorted, non-overlapping edit spans in one pass.
+    
+    Args:
+        content: Original content
+        spans: Edit spans sorted by position
+        
+    Returns:
+        Modified content
+    """
+    parts = []
+    position = 0
+    for span in spans:
+        parts.append(content[position:span.start])
+        parts.append(span.text)
+        position = span.end
+    parts.append(content[position:])
+    return ''.join(parts)
+
+
+def apply_file_edits(path: str, edits: List[Dict[str, str]], dry_run: bool = False) -> str:
+    """
+    Make selective edits using advanced pattern matching and formatting.
+    
+    Features:
+    - Line-based and multi-line content matching
+    - Whitespace normalization with indentation preservation
+    - Multiple simultaneous edits with correct positioning
+    - Indentation style detection and preservation
+    - Git-style diff output with context
+    - Preview changes with dry run mode
+    
+    All edits are located against the original content and spliced in at once,
+    so the cost grows linearly with file size. Edits that overlap or depend on
+    each other fall back to being applied one after another.
+    
+    Args:
+        path: File to edit
+        edits: List of edit operations, each containing 'oldText' and 'newText'
+        dry_run: Preview changes without applying (default: False)
+        
+    Returns:
+        Detailed diff and match information
+        
+    Raises:
+        ValueError: If an edit cannot be applied
+        FileNotFoundError: If the file does not exist
+    """
+    # Read file content and normalize line endings
+    content = read_text_cached(path, normalized=True)
+    
+    spans = locate_edits(content, edits)
+    if spans is not None:
+        modified_content = splice_edits(content, spans)
+    else:
+        modified_content = apply_edits_sequentially(content, edits)
+    
+    # Create unified diff, only over the edited regions when they are known
+    if spans is not None:
+        diff = create_edit_diff(content, spans, path)
+    else:
+        diff = create_unified_diff(content, modified_content, path)
+    
+    # Format diff with appropriate number of backticks
+    num_backticks = 3
+    while '`' * num_backticks in diff:
+        num_backticks += 1
+    formatted_diff = f"{'`' * num_backticks}diff\n{diff}{'`' * num_backticks}\n\n"
+    
+    if not dry_run:
+        atomic_write_text(path, modified_content)
+        update_content_cache(path, modified_content)
+    
+    return formatted_diff
+
+@file_tool(strict_mode=False)
+def edit_file(path: str, edits: List[Dict[str, str]], dry_run: bool = False) -> str:
+    """
+    Make selective edits using advanced pattern matching and formatting.
+    
+    This is a wrapper around apply_file_edits that provides a simpler interface.
+    
+    Args:
+        path: File to edit
+        edits: List of edit operations, each containing 'oldText' and 'newText'
+        dry_run: Preview changes without applying (default: False)
+        
+    Returns:
+        Detailed diff and match information
+    """
+    return apply_file_edits(check_path(path), edits, dry_run)
+############# End of EDIT FILE  #############
+
+
+############# CREATE DIRECTORY  #############
+@file_tool
+def create_directory(path: str) -> str:
+    """
+    Create new directory or ensure it exists.
+    
+    Args:
+        path: Directory path to create
+        
+    Returns:
+        Success message
+        
+    Raises:
+        PermissionError: If the directory cannot be created due to permissions
+    """
+    os.makedirs(check_path(path), exist_ok=True)
+    invalidate_path_cache(path)
+    return f"Successfully created directory {path}"
+############# End of CREATE DIRECTORY  #############
+
+############# LIST DIRECTORY  #############
+LIST_DIRECTORY_LIMIT = 1000
+
+
+def format_size(size_bytes: int) -> str:
+    """
+    Format a size in bytes with appropriate units.
+    
+    Args:
+        size_bytes: Size in bytes
+        
+    Returns:
+        Human-readable size
+    """
+    if size_bytes < 1024:
+        return f"{size_bytes} bytes"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    else:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+
+
+def format_directory_entry(entry: os.DirEntry, is_dir: bool, show_details: bool) -> str:
+    """
+    Format one directory entry with a [FILE] or [DIR] prefix.
+    
+    Args:
+        entry: The directory entry
+        is_dir: Whether the entry is a directory
+        show_details: Append size and modification time
+        
+    Returns:
+        Formatted line
+    """
+    line = f"{'[DIR]' if is_dir else '[FILE]'} {entry.name}"
+    if not show_details:
+        return line
+    
+    try:
+        stats = entry.stat()
+    except OSError:
+        return f"{line}  (stat failed)"
+    size = "-" if is_dir else format_size(stats.st_size)
+    modified = datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{line}  {size}  {modified}"
+
+
+@file_tool
+def list_directory(
+    path: str,
+    pattern: Optional[str] = None,
+    entry_type: Literal["all", "files", "dirs"] = "all",
+    sort_by: Literal["name", "size", "mtime", "none"] = "name",
+    reverse: bool = False,
+    offset: int = 0,
+    limit: int = LIST_DIRECTORY_LIMIT,
+    show_details: bool = False,
+) -> str:
+    """
+    List directory contents with [FILE] or [DIR] prefixes, one page at a time.
+    
+    Sorting by name or not at all needs no per-entry stat; sorting by size or
+    mtime stats every entry. show_details only stats the entries on the page.
+    
+    Args:
+        path: Directory path to list
+        pattern: Only list entries whose name matches this glob, e.g. "*.csv"
+        entry_type: "all" (default), "files" or "dirs"
+        sort_by: "name" (default), "size", "mtime" or "none" (directory order, fastest)
+        reverse: Reverse the sort order (default: False)
+        offset: Number of entries to skip (default: 0)
+        limit: Maximum number of entries to list (default: 1000)
+        show_details: Show size and modification time of each entry (default: False)
+        
+    Returns:
+        Formatted string with directory contents
+        
+    Raises:
+        FileNotFoundError: If the directory does not exist
+        NotADirectoryError: If the path is not a directory
+        ValueError: If offset or limit is negative
+    """
+    if offset < 0 or limit < 0:
+        raise ValueError("offset and limit must be non-negative")
+    path = check_path(path)
+    name_regex = re.compile(fnmatch.translate(pattern)) if pattern else None
+    # With no sort order, scanning can stop as soon as the page is full
+    stop_after = offset + limit + 1 if sort_by == "none" else None
+    
+    entries: List[Tuple[os.DirEntry, bool]] = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            if name_regex is not None and not name_regex.match(entry.name):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if (entry_type == "files" and is_dir) or (entry_type == "dirs" and not is_dir):
+                continue
+            entries.append((entry, is_dir))
+            if stop_after is not None and len(entries) >= stop_after:
+                break
+    
+    if sort_by == "name":
+        entries.sort(key=lambda item: item[0].name, reverse=reverse)
+    elif sort_by in ("size", "mtime"):
+        def sort_key(item: Tuple[os.DirEntry, bool]) -> float:
+            try:
+                stats = item[0].stat()
+            except OSError:
+                return -1
+            return stats.st_size if sort_by == "size" else stats.st_mtime
+        entries.sort(key=sort_key, reverse=reverse)
+    elif reverse:
+        entries.reverse()
+    
+    page = entries[offset:offset + limit]
+    formatted_entries = [format_directory_entry(entry, is_dir, show_details) for entry, is_dir in page]
+    
+    if offset or len(entries) > offset + limit:
+        first, last = offset + 1, offset + len(page)
+        if stop_after is not None and len(entries) >= stop_after:
+            formatted_entries.append(f"[Showing entries {first}-{last}; more available with offset={last}]")
+        elif len(entries) > last:
+            formatted_entries.append(f"[Showing entries {first}-{last} of {len(entries)}; more available with offset={last}]")
+        else:
+            formatted_entries.append(f"[Showing entries {first}-{last} of {len(entries)}]")
+    
+    return '\n'.join(formatted_entries)
+
+############# End of LIST DIRECTORY  #############
+
+############# DIRECTORY TREE  #############
+DIRECTORY_TREE_MAX_ENTRIES = 500
+DIRECTORY_TREE_MAX_TOKENS = 4000
+DIRECTORY_TREE_COLLAPSE_THRESHOLD = 100
+
+
+def build_directory_tree(
+    path: str,
+    exclude_patterns: Optional[List[str]] = None,
+    max_depth: Optional[int] = None,
+    max_entries: int = DIRECTORY_TREE_MAX_ENTRIES,
+    max_tokens: int = DIRECTORY_TREE_MAX_TOKENS,
+    collapse_threshold: int = DIRECTORY_TREE_COLLAPSE_THRESHOLD,
+) -> str:
+    """
+    Render a directory tree, walking breadth-first until the budget is spent.
+    
+    Breadth-first order spends the budget on the upper levels first, so a
+    large tree still yields an overview rather than one deep branch.
+    Directories with more than collapse_threshold entries are shown as counts.
+    
+    Args:
+        path: Root directory
+        exclude_patterns: Names or glob patterns to exclude
+        max_depth: Maximum depth to expand (1 lists only the root's entries)
+        max_entries: Maximum number of entries to list
+        max_tokens: Approximate maximum size of the output in tokens
+        collapse_threshold: Summarize directories with more entries than this
+        
+    Returns:
+        Indented tree, directories suffixed with "/"
+    """
+    is_excluded = compile_exclude_patterns(exclude_patterns)
+    prefix = os.path.join(path, '')
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    
+    children: Dict[str, List[Tuple[str, bool]]] = {}
+    hidden: Dict[str, int] = {}
+    collapsed: Dict[str, Tuple[int, int]] = {}
+    queue = deque([(path, 0)])
+    entries_used = chars_used = 0
+    budget_hit = False
+    
+    while queue and not budget_hit:
+        dir_path, depth = queue.popleft()
+        items = []
+        try:
+            with os.scandir(dir_path) as iterator:
+                for entry in iterator:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if not is_excluded(entry.name, entry.path[len(prefix):], is_dir):
+                        items.append((not is_dir, entry.name, entry.path))
+        except OSError:
+            children[dir_path] = []
+            continue
+        
+        if dir_path != path and len(items) > collapse_threshold:
+            dir_count = sum(1 for is_file, _, _ in items if not is_file)
+            collapsed[dir_path] = (len(items) - dir_count, dir_count)
+            continue
+        
+        # Directories first, then files, each by name
+        items.sort()
+        shown = []
+        for is_file, name, full_path in items:
+            cost = (depth + 1) * 2 + len(name) + 2
+            if entries_used >= max_entries or chars_used + cost > max_chars:
+                budget_hit = True
+                break
+            shown.append((name, not is_file))
+            entries_used += 1
+            chars_used += cost
+            if not is_file and (max_depth is None or depth + 1 < max_depth):
+                queue.append((full_path, depth + 1))
+        children[dir_path] = shown
+        hidden[dir_path] = len(items) - len(shown)
+    
+    unexpanded = {dir_path for dir_path, _ in queue}
+    
+    def render_children(dir_path: str, level: int) -> Iterator[Tuple[str, Optional[str], int]]:
+        indent = '  ' * level
+        for name, is_dir in children.get(dir_path, []):
+            full_path = os.path.join(dir_path, name)
+            if not is_dir:
+                yield f"{indent}{name}", None, level
+            elif full_path in collapsed:
+                files, dirs = collapsed[full_path]
+                yield f"{indent}{name}/ [{files} files, {dirs} dirs, collapsed]", None, level
+            elif full_path in unexpanded:
+                yield f"{indent}{name}/ [not expanded]", None, level
+            else:
+                yield f"{indent}{name}/", full_path, level
+        if hidden.get(dir_path):
+            yield f"{indent}... ({hidden[dir_path]} more entries)", None, level
+    
+    # Depth-first rendering with an explicit stack, so deep trees cannot hit the recursion limit
+    lines = [f"{path.rstrip(os.sep) or os.sep}/"]
+    stack = [render_children(path, 1)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            continue
+        line, child, level = item
+        lines.append(line)
+        if child is not None:
+            stack.append(render_children(child, level + 1))
+    
+    if budget_hit:
+        lines.append(f"[Budget reached after {entries_used} entries; narrow the path, exclude directories or raise max_entries]")
+    return '\n'.join(lines)
+
+
+@file_tool
+def directory_tree(
+    path: str,
+    exclude_patterns: List[str] = None,
+    max_depth: Optional[int] = None,
+    max_entries: int = DIRECTORY_TREE_MAX_ENTRIES,
+    max_tokens: int = DIRECTORY_TREE_MAX_TOKENS,
+) -> str:
+    """
+    Show a directory tree in one call instead of listing it level by level.
+    
+    Upper levels are listed first; large directories are collapsed into counts,
+    and the listing stops once the entry or token budget is spent.
+    
+    Args:
+        path: Root directory
+        exclude_patterns: Exclude any patterns. Plain names (e.g. "node_modules") and glob formats are supported.
+        max_depth: Maximum depth to expand, 1 for the root's entries only (default: unlimited)
+        max_entries: Maximum number of entries to list (default: 500)
+        max_tokens: Approximate maximum output size in tokens (default: 4000)
+        
+    Returns:
+        Indented tree, directories suffixed with "/"
+        
+    Raises:
+        FileNotFoundError: If the directory does not exist
+        NotADirectoryError: If the path is not a directory
+    """
+    path = check_path(path)
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Directory does not exist: {path}")
+        raise NotADirectoryError(f"Not a directory: {path}")
+    return build_directory_tree(path, exclude_patterns, max_depth, max_entries, max_tokens)
+
+############# End of DIRECTORY TREE  #############
+
+############# MOVE FILE  #############
+MOVE_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+MOVE_MAX_WORKERS = 8
+MOVE_PROGRESS_INTERVAL = 2.0
+# Errors meaning a zero-copy syscall is unsupported for this pair of files
+ZERO_COPY_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.EPERM}
+
+
+class CopyProgress:
+    """
+    Thread-safe byte counter for a copy, logging progress at most every MOVE_PROGRESS_INTERVAL seconds.
+    
+    Setting cancelled stops the copies sharing this counter at their next chunk.
+    """
+    
+    def __init__(self, total_bytes: int, label: str):
+        self.total_bytes = total_bytes
+        self.label = label
+        self.copied = 0
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.last_report = self.started
+    
+    def add(self, count: int) -> None:
+        with self.lock:
+            self.copied += count
+            now = time.monotonic()
+            if now - self.last_report < MOVE_PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+        percent = 100 * self.copied / self.total_bytes if self.total_bytes else 100
+        logging.info(f"Moving {self.label}: {format_size(self.copied)} of {format_size(self.total_bytes)} ({percent:.0f}%)")
+
+
+def check_link_path(path_str: str) -> str:
+    """
+    Validate a path without following a final symlink.
+    
+    A symlink is validated by its parent directory plus its name, so it is
+    allowed where it lives whatever it points to; other paths go through check_path.
+    
+    Args:
+        path_str: The requested path
+        
+    Returns:
+        The path to operate on, a final symlink left unresolved
+        
+    Raises:
+        ValueError: If the path (or a symlink's parent directory) is outside allowed directories
+    """
+    expanded = expand_home(path_str)
+    if not _allowed_directories or not os.path.islink(expanded):
+        return check_path(path_str)
+    parent = check_path(os.path.dirname(os.path.abspath(expanded)))
+    return os.path.join(parent, os.path.basename(os.path.normpath(expanded)))
+
+
+def check_entry_path(path_str: str) -> str:
+    """
+    Validate a path like check_path, but keep a final symlink unresolved so it refers to the link itself.
+    
+    Args:
+        path_str: The requested path
+        
+    Returns:
+        The path to operate on
+    """
+    check_path(path_str)
+    return check_link_path(path_str)
+
+
+def copy_file_zero_copy(source: str, destination: str, progress: CopyProgress) -> int:
+    """
+    Copy a file's data in the kernel where possible.
+    
+    Tries os.copy_file_range, then os.sendfile, and falls back to a buffered
+    copy when neither works for this pair of files. Metadata is copied as well.
+    
+    Args:
+        source: File to copy
+        destination: Path of the copy
+        progress: Progress counter to update
+        
+    Returns:
+        Number of bytes copied
+    """
+    methods = [name for name in ('copy_file_range', 'sendfile') if hasattr(os, name)]
+    
+    with open(source, 'rb') as fsrc, open(destination, 'wb') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(in_fd).st_size
+        copied = 0
+        
+        while copied < size:
+            if progress.cancelled.is_set():
+                raise OSError(errno.ECANCELED, f"Copy of {source} cancelled")
+            count = min(MOVE_COPY_CHUNK_SIZE, size - copied)
+            method = methods[0] if methods else None
+            try:
+                if method == 'copy_file_range':
+                    written = os.copy_file_range(in_fd, out_fd, count, copied)
+                elif method == 'sendfile':
+                    written = os.sendfile(out_fd, in_fd, copied, count)
+                else:
+                    fsrc.seek(copied)
+                    written = fdst.write(fsrc.read(count))
+            except OSError as e:
+                if method is not None and e.errno in ZERO_COPY_UNSUPPORTED_ERRNOS:
+                    methods.pop(0)
+                    continue
+                raise
+            if written == 0:
+                # The source shrank while copying; the size check catches it
+                break
+            copied += written
+            progress.add(written)
+    
+    shutil.copystat(source, destination)
+    return copied
+
+
+def move_across_devices(source: str, destination: str) -> int:
+    """
+    Move a file or directory tree to another filesystem.
+    
+    Files are copied with copy_file_zero_copy, those of a directory tree in
+    parallel. The source is deleted only after the size of every copy matches
+    its original; on failure the partial copy is removed and the source kept.
+    
+    Args:
+        source: Source file or directory path
+        destination: Destination path, which must not exist
+        
+    Returns:
+        Number of bytes copied
+        
+    Raises:
+        OSError: If a copy does not match its source
+    """
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), destination)
+        os.unlink(source)
+        return 0
+    
+    if not os.path.isdir(source):
+        progress = CopyProgress(os.stat(source).st_size, source)
+        try:
+            copy_file_zero_copy(source, destination, progress)
+            if os.stat(destination).st_size != os.stat(source).st_size:
+                raise OSError(f"Size mismatch after copying {source} to {destination}")
+        except BaseException:
+            if os.path.lexists(destination):
+                os.unlink(destination)
+            raise
+        os.unlink(source)
+        return progress.copied
+    
+    directories = []
+    files = []
+    links = []
+    for root, dir_names, file_names in os.walk(source):
+        relative_root = os.path.relpath(root, source)
+        directories.append(relative_root)
+        for name in dir_names:
+            if os.path.islink(os.path.join(root, name)):
+                links.append(os.path.join(relative_root, name))
+        for name in file_names:
+            path = os.path.join(root, name)
+            (links if os.path.islink(path) else files).append(os.path.join(relative_root, name))
+    
+    sizes = {relative: os.stat(os.path.join(source, relative)).st_size for relative in files}
+    progress = CopyProgress(sum(sizes.values()), source)
+    
+    try:
+        for relative in directories:
+            os.makedirs(os.path.normpath(os.path.join(destination, relative)), exist_ok=True)
+        for relative in links:
+            os.symlink(os.readlink(os.path.join(source, relative)), os.path.join(destination, relative))
+        
+        def copy_one(relative: str) -> None:
+            source_file = os.path.join(source, relative)
+            destination_file = os.path.join(destination, relative)
+            copy_file_zero_copy(source_file, destination_file, progress)
+            if os.stat(destination_file).st_size != sizes[relative]:
+                raise OSError(f"Size mismatch after copying {source_file}")
+        
+        executor = ThreadPoolExecutor(max_workers=MOVE_MAX_WORKERS)
+        try:
+            futures = [executor.submit(copy_one, relative) for relative in files]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+        except BaseException:
+            # Don't finish copying data that is about to be deleted
+            progress.cancelled.set()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        # Copy directory metadata last, since creating entries updates the mtimes
+        for relative in reversed(directories):
+            shutil.copystat(os.path.join(source, relative), os.path.normpath(os.path.join(destination, relative)))
+    except BaseException:
+        shutil.rmtree(destination, ignore_errors=True)
+        raise
+    
+    shutil.rmtree(source)
+    return progress.copied
+
+
+@file_tool
+def move_file(source: str, destination: str) -> str:
+    """
+    Move or rename files and directories.
+    
+    Within one filesystem this is a rename. Across filesystems the data is
+    copied in the kernel (directory trees in parallel), checked, and only then
+    removed from the source.
+    
+    Args:
+        source: Source file or directory path
+        destination: Destination file or directory path
+        
+    Returns:
+        Success message
+        
+    Raises:
+        FileNotFoundError: If the source does not exist
+        FileExistsError: If the destination already exists
+    """
+    source_path = check_entry_path(source)
+    destination_path = check_path(destination)
+    if os.path.lexists(destination_path):
+        raise FileExistsError(f"Destination already exists: {destination}")
+    if not os.path.lexists(source_path):
+        raise FileNotFoundError(f"Source does not exist: {source}")
+    
+    try:
+        os.rename(source_path, destination_path)
+        message = f"Successfully moved {source} to {destination}"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        started = time.monotonic()
+        copied = move_across_devices(source_path, destination_path)
+        elapsed = time.monotonic() - started
+        message = f"Successfully moved {source} to {destination} ({format_size(copied)} copied across filesystems in {elapsed:.1f}s)"
+    
+    invalidate_path_cache(source_path)
+    invalidate_path_cache(destination_path)
+    invalidate_content_cache(source_path)
+    return message
+############# End of MOVE FILE  #############
+
+############# FILE NAME INDEX  #############
+# On-disk filename index per search root, refreshed incrementally: only
+# directories whose mtime changed since the last refresh are listed again.
+FILE_INDEX_DIR = os.getenv("FILE_INDEX_DIR", os.path.join(os.path.expanduser('~'), '.cache', 'cyanomanus', 'file_index'))
+# Directories modified this recently are rescanned next time, in case they
+# change again within the same mtime tick
+FILE_INDEX_MTIME_SLACK_NS = 2_000_000_000
+
+_file_indexes: Dict[str, "FileNameIndex"] = {}
+_file_indexes_lock = threading.Lock()
+
+
+def escape_like(text: str) -> str:
+    """
+    Escape a string for use inside a SQL LIKE pattern with ESCAPE '\\'.
+    
+    Args:
+        text: The literal text
+        
+    Returns:
+        Escaped text
+    """
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def is_excluded_path(relative_path: str, is_dir: bool, is_excluded) -> bool:
+    """
+    Check a path and all of its ancestors against an exclude matcher.
+    
+    Args:
+        relative_path: Path relative to the search root
+        is_dir: Whether the path itself is a directory
+        is_excluded: Matcher returned by compile_exclude_patterns
+        
+    Returns:
+        True if the path or any of its parent directories is excluded
+    """
+    parts = relative_path.split(os.sep)
+    for i, name in enumerate(parts, 1):
+        if is_excluded(name, os.sep.join(parts[:i]), is_dir or i < len(parts)):
+            return True
+    return False
+
+
+class FileNameIndex:
+    """
+    SQLite index of every file and directory name below a root directory.
+    """
+    
+    def __init__(self, root: str, db_path: Optional[str] = None):
+        self.root = root
+        if db_path is None:
+            os.makedirs(FILE_INDEX_DIR, exist_ok=True)
+            digest = hashlib.sha1(root.encode('utf-8', errors='surrogateescape')).hexdigest()[:16]
+            db_path = os.path.join(FILE_INDEX_DIR, f"{digest}.sqlite3")
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                parent TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL,
+                depth INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+        """)
+    
+    def depth_of(self, path: str) -> int:
+        """Depth of path below the index root (the root itself is 0)."""
+        if path == self.root:
+            return 0
+        return path[len(self.root):].strip(os.sep).count(os.sep) + 1
+    
+    def subtree_range(self, path: str) -> Tuple[str, str]:
+        """
+        Key range of the paths strictly below path, for binary comparisons on a path column.
+        
+        LIKE would ignore ASCII case and match sibling directories.
+        """
+        prefix = os.path.join(path, '')
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    
+    def refresh(self, path: Optional[str] = None, max_depth: Optional[int] = None) -> None:
+        """
+        Bring the part of the index a search will read up to date with the filesystem.
+        
+        Every directory of the subtree is stat-ed, but only directories whose mtime
+        changed are listed again. Directories that disappeared are dropped with their entries.
+        
+        Args:
+            path: Root of the subtree to refresh, inside the index root (default: the index root)
+            max_depth: Only list directories this many levels below path (default: unlimited)
+        """
+        path = path or self.root
+        # Directories at this depth or deeper are not listed; their entries are not searched
+        depth_limit = None if max_depth is None else self.depth_of(path) + max_depth
+        
+        def in_scope(dir_path: str) -> bool:
+            if dir_path != path and not dir_path.startswith(os.path.join(path, '')):
+                return False
+            return depth_limit is None or self.depth_of(dir_path) < depth_limit
+        
+        with self.lock:
+            scan_started_ns = time.time_ns()
+            subtree = (path, *self.subtree_range(path))
+            known = {
+                dir_path: mtime_ns
+                for dir_path, mtime_ns in self.conn.execute(
+                    "SELECT path, mtime_ns FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", subtree
+                )
+                if in_scope(dir_path)
+            }
+            children: Dict[str, List[str]] = {}
+            for parent, child in self.conn.execute(
+                "SELECT parent, path FROM entries WHERE is_dir = 1 AND (parent = ? OR (parent >= ? AND parent < ?))", subtree
+            ):
+                if parent in known:
+                    children.setdefault(parent, []).append(child)
+            
+            seen = set()
+            stack = [path] if in_scope(path) else []
+            with self.conn:
+                while stack:
+                    dir_path = stack.pop()
+                    if not in_scope(dir_path):
+                        continue
+                    try:
+                        mtime_ns = os.stat(dir_path).st_mtime_ns
+                    except OSError:
+                        continue
+                    seen.add(dir_path)
+                    
+                    if known.get(dir_path) == mtime_ns:
+                        stack.extend(children.get(dir_path, []))
+                        continue
+                    
+                    rows = []
+                    depth = self.depth_of(dir_path) + 1
+                    try:
+                        with os.scandir(dir_path) as entries:
+                            for entry in entries:
+                                try:
+                                    is_dir = entry.is_dir(follow_symlinks=False)
+                                except OSError:
+                                    is_dir = False
+                                rows.append((entry.path, dir_path, entry.name, int(is_dir), depth))
+                                if is_dir:
+                                    stack.append(entry.path)
+                    except OSError:
+                        continue
+                    
+                    if mtime_ns > scan_started_ns - FILE_INDEX_MTIME_SLACK_NS:
+                        mtime_ns = -1
+                    self.conn.execute("DELETE FROM entries WHERE parent = ?", (dir_path,))
+                    self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+                    self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (dir_path, mtime_ns))
+                
+                removed = [(dir_path,) for dir_path in known if dir_path not in seen]
+                self.conn.executemany("DELETE FROM entries WHERE parent = ?", removed)
+                self.conn.executemany("DELETE FROM dirs WHERE path = ?", removed)
+    
+    def query(
+        self,
+        path: str,
+        pattern: str,
+        use_glob: bool = False,
+        exclude_patterns: Optional[List[str]] = None,
+        max_results: int = 1000,
+        max_depth: Optional[int] = None,
+    ) -> Tuple[List[str], bool]:
+        """
+        Find indexed entries below path whose name matches pattern (case-insensitive).
+        
+        Args:
+            path: Directory to search in, inside the index root
+            pattern: Substring of the name, or a glob on the name if use_glob is set
+            use_glob: Treat pattern as a glob instead of a substring
+            exclude_patterns: Names or glob patterns to exclude
+            max_results: Maximum number of results to return
+            max_depth: Maximum depth below path (1 for direct children only)
+            
+        Returns:
+            Tuple of the sorted matching paths and whether the limit was hit
+        """
+        if use_glob:
+            name_clause = "lower(name) GLOB ?"
+            name_arg = pattern.lower().replace('[!', '[^')
+        else:
+            name_clause = "name LIKE ? ESCAPE '\\'"
+            name_arg = f"%{escape_like(pattern)}%"
+        
+        sql = f"SELECT path, is_dir FROM entries WHERE {name_clause}"
+        args: List[Any] = [name_arg]
+        if path != self.root:
+            sql += " AND path >= ? AND path < ?"
+            args.extend(self.subtree_range(path))
+        if max_depth is not None:
+            sql += " AND depth <= ?"
+            args.append(self.depth_of(path) + max_depth)
+        sql += " ORDER BY path"
+        
+        is_excluded = compile_exclude_patterns(exclude_patterns)
+        prefix = os.path.join(path, '')
+        results = []
+        with self.lock:
+            for entry_path, is_dir in self.conn.execute(sql, args):
+                if exclude_patterns and is_excluded_path(entry_path[len(prefix):], bool(is_dir), is_excluded):
+                    continue
+                if len(results) >= max_results:
+                    return results, True
+                results.append(entry_path)
+        return results, False
+
+
+def get_file_index(path: str) -> FileNameIndex:
+    """
+    Get the filename index covering a directory, creating one if none does.
+    
+    A new index is rooted at the allowed directory containing path, or at path
+    itself when the tools are unrestricted.
+    
+    Args:
+        path: Directory that will be searched
+        
+    Returns:
+        FileNameIndex whose root contains path
+    """
+    with _file_indexes_lock:
+        for root, index in _file_indexes.items():
+            if path == root or path.startswith(os.path.join(root, '')):
+                return index
+        
+        # Prefer one index per allowed directory over one per searched subdirectory
+        root = path
+        for directory in get_allowed_directories():
+            real_directory = os.path.realpath(expand_home(directory))
+            if path.startswith(os.path.join(real_directory, '')):
+                root = real_directory
+                break
+        
+        index = FileNameIndex(root)
+        _file_indexes[root] = index
+        return index
+
+
+def search_file_index(
+    path: str,
+    pattern: str,
+    use_glob: bool = False,
+    exclude_patterns: Optional[List[str]] = None,
+    max_results: int = 1000,
+    max_depth: Optional[int] = None,
+) -> Tuple[List[str], bool]:
+    """
+    Refresh the index covering path and answer a name search from it.
+    
+    With exclude patterns the pruning walker answers instead: refreshing the
+    index would stat and list the excluded subtrees the caller wants skipped.
+    
+    Args:
+        path: Starting directory
+        pattern: Substring of the name, or a glob on the name if use_glob is set
+        use_glob: Treat pattern as a glob instead of a substring
+        exclude_patterns: Names or glob patterns to exclude
+        max_results: Maximum number of results to return
+        max_depth: Maximum depth to search (1 for direct children only)
+        
+    Returns:
+        Tuple of the sorted matching paths and whether the limit was hit
+        
+    Raises:
+        FileNotFoundError: If the starting directory does not exist
+        NotADirectoryError: If the path is not a directory
+    """
+    path = os.path.realpath(path)
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Directory does not exist: {path}")
+        raise NotADirectoryError(f"Not a directory: {path}")
+    
+    if any(exclude.strip() for exclude in exclude_patterns or []):
+        return find_matching_paths(path, pattern, exclude_patterns, max_results, max_depth, use_glob)
+    
+    index = get_file_index(path)
+    index.refresh(path, max_depth)
+    return index.query(path, pattern, use_glob, exclude_patterns, max_results, max_depth)
+
+############# End of FILE NAME INDEX  #############
+
+############# SEARCH FILES  #############
+SEARCH_FILES_MAX_WORKERS = 8
+SEARCH_FILES_MAX_RESULTS = 1000
+
+
+def format_search_results(results: List[str], truncated: bool = False) -> str:
+    """
+    Format search results into a LLM-friendly string.
+    
+    Args:
+        results: List of file paths found in the search
+        truncated: Whether the search stopped early at the result limit
+        
+    Returns:
+        Formatted string with search results
+    """
+    if not results:
+        return "No files or directories found matching the pattern."
+    
+    formatted_output = [f"Found {len(results)} matches:"]
+    
+    for i, path in enumerate(results, 1):
+        formatted_output.append(f"{i}. {path}")
+    
+    if truncated:
+        formatted_output.append(f"[Stopped at {len(results)} results; narrow the pattern or path to see more]")
+    
+    return "\n".join(formatted_output)
+
+
+def to_requested_paths(results: List[str], real_path: str, requested_path: str) -> List[str]:
+    """
+    Rewrite result paths found below a resolved directory to start with the path the caller gave.
+    
+    Args:
+        results: Paths below real_path
+        real_path: The searched directory, symlinks resolved
+        requested_path: The directory as the caller spelled it
+        
+    Returns:
+        The results below requested_path
+    """
+    requested_path = expand_home(requested_path)
+    if requested_path == real_path:
+        return results
+    requested_prefix = requested_path.rstrip(os.sep)
+    return [requested_prefix + result[len(real_path.rstrip(os.sep)):] for result in results]
+
+
+def compile_exclude_patterns(exclude_patterns: Optional[List[str]]):
+    """
+    Compile exclude patterns into a single matcher.
+    
+    A pattern without wildcards excludes every file or directory with exactly that
+    name (e.g. "node_modules"). A glob pattern is matched against the path relative
+    to the search root and against the entry name. All globs are merged into one regex.
+    
+    Args:
+        exclude_patterns: Exclude patterns, plain names or globs
+        
+    Returns:
+        Function (name, relative_path, is_dir) -> bool telling whether an entry is excluded
+    """
+    names = set()
+    globs = []
+    for exclude in exclude_patterns or []:
+        exclude = exclude.strip().rstrip('/\\')
+        if not exclude:
+            continue
+        if any(char in exclude for char in '*?['):
+            globs.append(fnmatch.translate(exclude))
+        else:
+            names.add(exclude)
+    
+    regex = re.compile('|'.join(globs)) if globs else None
+    
+    def is_excluded(name: str, relative_path: str, is_dir: bool) -> bool:
+        if name in names:
+            return True
+        if regex is None:
+            return False
+        if regex.match(name) or regex.match(relative_path):
+            return True
+        # Lets patterns such as "**/build/**" prune the build directory itself
+        return is_dir and regex.match(relative_path + '/') is not None
+    
+    return is_excluded
+
+
+def compile_name_matcher(pattern: str, use_glob: bool = False):
+    """
+    Compile a name pattern into a case-insensitive matcher.
+    
+    Args:
+        pattern: Substring of the name, or a glob on the name if use_glob is set
+        use_glob: Treat pattern as a glob instead of a substring
+        
+    Returns:
+        Function name -> bool telling whether a name matches
+    """
+    if use_glob:
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+    pattern = pattern.lower()
+    return lambda name: pattern in name.lower()
+
+
+def walk_matching_entries(
+    root: str,
+    root_depth: int,
+    prefix: str,
+    matches_name,
+    is_excluded,
+    max_depth: Optional[int],
+    results: List[str],
+    max_results: int,
+    stop: threading.Event,
+) -> None:
+    """
+    Walk a directory tree with os.scandir, collecting entries whose name matches.
+    
+    Excluded directories are pruned before they are descended into.
+    
+    Args:
+        root: Directory to walk
+        root_depth: Depth of root below the search root
+        prefix: Search root followed by a path separator, stripped to get relative paths
+        matches_name: Matcher returned by compile_name_matcher
+        is_excluded: Matcher returned by compile_exclude_patterns
+        max_depth: Maximum depth to descend to (None for unlimited)
+        results: Shared list that matching paths are appended to
+        max_results: Stop once this many results have been collected
+        stop: Event set when the result limit is reached
+    """
+    stack = [(root, root_depth)]
+    
+    while stack and not stop.is_set():
+        dir_path, depth = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+        
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                
+                if is_excluded(entry.name, entry.path[len(prefix):], is_dir):
+                    continue
+                
+                if matches_name(entry.name):
+                    results.append(entry.path)
+                    if len(results) >= max_results:
+                        stop.set()
+                        return
+                
+                if is_dir and (max_depth is None or depth + 1 < max_depth):
+                    stack.append((entry.path, depth + 1))
+
+
+def find_matching_paths(
+    path: str,
+    pattern: str,
+    exclude_patterns: Optional[List[str]] = None,
+    max_results: int = SEARCH_FILES_MAX_RESULTS,
+    max_depth: Optional[int] = None,
+    use_glob: bool = False,
+) -> Tuple[List[str], bool]:
+    """
+    Search a directory tree for entries whose name matches pattern (case-insensitive).
+    
+    Top-level subdirectories are walked in parallel and excluded subtrees are
+    never listed, so this beats the filename index when excludes prune much of the tree.
+    
+    Args:
+        path: Starting directory
+        pattern: Substring of the name, or a glob on the name if use_glob is set
+        exclude_patterns: Names or glob patterns to exclude
+        max_results: Maximum number of results to collect
+        max_depth: Maximum depth to search (1 searches only the direct children)
+        use_glob: Treat pattern as a glob instead of a substring
+        
+    Returns:
+        Tuple of the sorted matching paths and whether the limit was hit
+        
+    Raises:
+        FileNotFoundError: If the starting directory does not exist
+        NotADirectoryError: If the path is not a directory
+    """
+    is_excluded = compile_exclude_patterns(exclude_patterns)
+    matches_name = compile_name_matcher(pattern, use_glob)
+    prefix = os.path.join(path, '')
+    results: List[str] = []
+    stop = threading.Event()
+    
+    # Scan the first level here so its subdirectories can be walked in parallel
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            
+            if is_excluded(entry.name, entry.name, is_dir):
+                continue
+            
+            if matches_name(entry.name):
+                results.append(entry.path)
+                if len(results) >= max_results:
+                    stop.set()
+                    break
+            
+            if is_dir and (max_depth is None or max_depth > 1):
+                subdirs.append(entry.path)
+    
+    if subdirs and not stop.is_set():
+        max_workers = min(SEARCH_FILES_MAX_WORKERS, len(subdirs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    walk_matching_entries,
+                    subdir, 1, prefix, matches_name, is_excluded, max_depth, results, max_results, stop,
+                )
+                for subdir in subdirs
+            ]
+            for future in futures:
+                future.result()
+    
+    truncated = stop.is_set()
+    return sorted(results[:max_results]), truncated
+
+
+@file_tool
+def search_files(
+    path: str,
+    pattern: str,
+    exclude_patterns: List[str] = None,
+    max_results: int = SEARCH_FILES_MAX_RESULTS,
+    max_depth: Optional[int] = None,
+) -> str:
+    """
+    Recursively search for files/directories whose name contains pattern.
+    
+    Args:
+        path: Starting directory
+        pattern: Search pattern (case-insensitive substring of the name)
+        exclude_patterns: Exclude any patterns. Plain names (e.g. "node_modules") and glob formats are supported.
+        max_results: Maximum number of results to return (default: 1000)
+        max_depth: Maximum directory depth to search, 1 for direct children only (default: unlimited)
+        
+    Returns:
+        Formatted string with search results
+        
+    Raises:
+        FileNotFoundError: If the starting directory does not exist
+        NotADirectoryError: If the path is not a directory
+    """
+    real_path = check_path(path)
+    try:
+        results, truncated = search_file_index(real_path, pattern, False, exclude_patterns, max_results, max_depth)
+    except sqlite3.Error:
+        results, truncated = find_matching_paths(real_path, pattern, exclude_patterns, max_results, max_depth)
+    return format_search_results(to_requested_paths(results, real_path, path), truncated)
+
+
+@file_tool
+def file_find_by_name(
+    path: str,
+    pattern: str,
+    exclude_patterns: List[str] = None,
+    max_results: int = SEARCH_FILES_MAX_RESULTS,
+    max_depth: Optional[int] = None,
+) -> str:
+    """
+    Find files/directories in a directory tree by name pattern.
+    
+    Args:
+        path: Starting directory
+        pattern: Glob on the name, e.g. "*.py" or "test_*" (case-insensitive). Without wildcards it matches names containing pattern.
+        exclude_patterns: Exclude any patterns. Plain names (e.g. "node_modules") and glob formats are supported.
+        max_results: Maximum number of results to return (default: 1000)
+        max_depth: Maximum directory depth to search, 1 for direct children only (default: unlimited)
+        
+    Returns:
+        Formatted string with search results
+        
+    Raises:
+        FileNotFoundError: If the starting directory does not exist
+        NotADirectoryError: If the path is not a directory
+    """
+    use_glob = any(char in pattern for char in '*?[')
+    real_path = check_path(path)
+    results, truncated = search_file_index(real_path, pattern, use_glob, exclude_patterns, max_results, max_depth)
+    return format_search_results(to_requested_paths(results, real_path, path), truncated)
+############# End of SEARCH FILES  #############
+
+############# FIND IN CONTENT  #############
+CONTENT_SEARCH_MAX_RESULTS = 200
+CONTENT_SEARCH_MAX_LINE_LENGTH = 300
+# Below this many files the search runs in-process; above it, batches of
+# files are fanned out to a process pool
+CONTENT_SEARCH_PROCESS_MIN_FILES = 64
+CONTENT_SEARCH_BATCH_SIZE = 32
+
+_content_search_executor: Optional[ProcessPoolExecutor] = None
+_content_search_executor_lock = threading.Lock()
+
+
+def get_content_search_executor() -> ProcessPoolExecutor:
+    """
+    Get the process pool used for large content searches, creating it on first use.
+    
+    Workers are started with forkserver (or spawn where it is unavailable), never
+    fork: the agent process is multi-threaded, and forking it can deadlock.
+    
+    Returns:
+        The content search process pool
+    """
+    global _content_search_executor
+    with _content_search_executor_lock:
+        if _content_search_executor is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _content_search_executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method))
+        return _content_search_executor
+
 
-@function_tool
-def read_multiple_files(paths: List[str]) -> str:
+def sniff_binary(path: str) -> bool:
     """
-    Read multiple files simultaneously.
+    Guess whether a file is binary from its first block.
     
     Args:
-        paths: List of file paths to read
+        path: The path to the file
         
     Returns:
-        Formatted string with file contents or error messages
+        True if sniff_file classifies the file as binary
     """
-    results = {}
-    
-    for file_path in paths:
-        try:
-            results[file_path] = read_file(file_path)
-        except Exception as e:
-            results[file_path] = f"Error - {str(e)}"
-    
-    return format_multiple_files_result(results)
-
-############# End of READ  MULTIPLE FILES  #############
+    return sniff_file(path).is_binary
 
 
-############# WRITE FILE  #############
-@function_tool
-def write_file(path: str, content: str) -> str:
+def iter_tree_files(path: str, exclude_patterns: Optional[List[str]] = None, include_pattern: Optional[str] = None) -> Iterator[str]:
     """
-    Create new file or overwrite existing file with content.
+    Yield the regular files below a directory, pruning excluded subtrees.
     
     Args:
-        path: File location to write to
-        content: Content to write to the file
-        
-    Returns:
-        Success message
+        path: Starting directory, or a single file
+        exclude_patterns: Names or glob patterns to exclude
+        include_pattern: Optional glob that file names must match
         
-    Raises:
-        PermissionError: If the file cannot be written due to permissions
+    Yields:
+        File paths
     """
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
+    if os.path.isfile(path):
+        yield path
+        return
     
-    return f"Successfully wrote to {path}"
-############# End of WRITE FILE  #############
+    is_excluded = compile_exclude_patterns(exclude_patterns)
+    include = re.compile(fnmatch.translate(include_pattern)) if include_pattern else None
+    prefix = os.path.join(path, '')
+    stack = [path]
+    
+    while stack:
+        dir_path = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+        
+        subdirs = []
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    is_file = not is_dir and entry.is_file()
+                except OSError:
+                    continue
+                
+                if is_excluded(entry.name, entry.path[len(prefix):], is_dir):
+                    continue
+                if is_dir:
+                    subdirs.append(entry.path)
+                elif is_file and (include is None or include.match(entry.name)):
+                    yield entry.path
+        
+        # Reversed so directories are visited in listing order
+        stack.extend(reversed(subdirs))
 
-############# EDIT FILE  #############
-def create_unified_diff(original_content: str, new_content: str, filepath: str = 'file') -> str:
+
+def decode_line(data: Union[bytes, str]) -> str:
     """
-    Create a unified diff between original and new content.
+    Decode one line of a search hit, trimmed to CONTENT_SEARCH_MAX_LINE_LENGTH.
     
     Args:
-        original_content: Original file content
-        new_content: Modified file content
-        filepath: Name of the file for the diff header
+        data: Raw line without its newline, or the line itself when searching decoded text
         
     Returns:
-        Unified diff as a string
+        Decoded line
     """
-    # Ensure consistent line endings for diff
-    normalized_original = normalize_line_endings(original_content)
-    normalized_new = normalize_line_endings(new_content)
-    
-    # Split content into lines for difflib
-    original_lines = normalized_original.splitlines()
-    new_lines = normalized_new.splitlines()
-    
-    # Generate unified diff
-    diff = difflib.unified_diff(
-        original_lines,
-        new_lines,
-        fromfile=f"{filepath} (original)",
-        tofile=f"{filepath} (modified)",
-        lineterm=''
-    )
-    
-    return '\n'.join(diff)
+    line = (data if isinstance(data, str) else decode_bytes(data)).rstrip('\r')
+    if len(line) > CONTENT_SEARCH_MAX_LINE_LENGTH:
+        line = line[:CONTENT_SEARCH_MAX_LINE_LENGTH] + " ..."
+    return line
 
 
-def apply_file_edits(path: str, edits: List[Dict[str, str]], dry_run: bool = False) -> str:
+def search_file_content(
+    file_path: str,
+    regex_source: Union[bytes, str],
+    flags: int,
+    literal: Optional[bytes],
+    context_lines: int,
+    max_matches: int,
+) -> List[Tuple[int, str, bool]]:
     """
-    Make selective edits using advanced pattern matching and formatting.
+    Search one memory-mm file for a pattern.
     
-    Features:
-    - Line-based and multi-line content matching
-    - Whitespace normalization with indentation preservation
-    - Multiple simultaneous edits with correct positioning
-    - Indentation style detection and preservation
-    - Git-style diff output with context
-    - Preview changes with dry run mode
+    A bytes pattern runs on the mapping itself. A str pattern runs on the file's
+    text, decoded with its sniffed encoding.
     
     Args:
-        path: File to edit
-        edits: List of edit operations, each containing 'oldText' and 'newText'
-        dry_run: Preview changes without applying (default: False)
+        file_path: The file to search
+        regex_source: Regular expression to search for, as bytes or str
+        flags: Regular expression flags
+        literal: Literal that every match contains, checked with a fast find before the regex runs
+        context_lines: Number of lines of context around each match
+        max_matches: Maximum number of matching lines to return
         
     Returns:
-        Detailed diff and match information
-        
-    Raises:
-        ValueError: If an edit cannot be applied
-        FileNotFoundError: If the file does not exist
+        Sorted (line number, text, is_match) tuples for matching and context lines
     """
-    # Read file content and normalize line endings
-    with open(path, 'r', encoding='utf-8') as file:
-        content = normalize_line_endings(file.read())
+    sniff = sniff_file(file_path)
+    if sniff.is_binary:
+        return []
     
-    # Apply edits sequentially
-    modified_content = content
-    for edit in edits:
-        normalized_old = normalize_line_endings(edit['oldText'])
-        normalized_new = normalize_line_endings(edit['newText'])
-        
-        # If exact match exists, use it
-        if normalized_old in modified_content:
-            modified_content = modified_content.replace(normalized_old, normalized_new)
-            continue
+    with map_file(file_path) as mm:
+        if mm is None:
+            return []
+        if literal is not None and mm.find(literal) == -1:
+            return []
         
-        # Otherwise, try line-by-line matching with flexibility for whitespace
-        old_lines = normalized_old.split('\n')
-        content_lines = modified_content.split('\n')
-        match_found = False
+        if isinstance(regex_source, str):
+            content = decode_bytes(mm[:], sniff.encoding)
+            newline = '\n'
+        else:
+            content = mm
+            newline = b'\n'
+        regex = re.compile(regex_source, flags)
+        size = len(content)
+        lines: Dict[int, Tuple[str, bool]] = {}
+        matches = 0
+        line_no = 1
+        counted_to = 0
+        pos = 0
         
-        for i in range(len(content_lines) - len(old_lines) + 1):
-            potential_match = content_lines[i:i + len(old_lines)]
+        while matches < max_matches and pos <= size:
+            match = regex.search(content, pos)
+            if match is None:
+                break
             
-            # Compare lines with normalized whitespace
-            is_match = all(old_line.strip() == content_line.strip() 
-                          for old_line, content_line in zip(old_lines, potential_match))
+            start = content.rfind(newline, 0, match.start()) + 1
+            line_no += content[counted_to:start].count(newline)
+            counted_to = start
+            end = content.find(newline, match.start())
+            if end == -1:
+                end = size
+            lines[line_no] = (decode_line(content[start:end]), True)
+            matches += 1
             
-            if is_match:
-                # Preserve original indentation of first line
-                original_indent_match = re.match(r'^\s*', content_lines[i])
-                original_indent = original_indent_match.group(0) if original_indent_match else ''
-                
-                new_lines = []
-                for j, line in enumerate(normalized_new.split('\n')):
-                    if j == 0:
-                        # For first line, preserve original indentation
-                        new_lines.append(original_indent + line.lstrip())
-                    else:
-                        # For subsequent lines, try to preserve relative indentation
-                        if j < len(old_lines):
-                            old_indent_match = re.match(r'^\s*', old_lines[j])
-                            old_indent = old_indent_match.group(0) if old_indent_match else ''
-                            
-                            new_indent_match = re.match(r'^\s*', line)
-                            new_indent = new_indent_match.group(0) if new_indent_match else ''
-                            
-                            if old_indent and new_indent:
-                                relative_indent = len(new_indent) - len(old_indent)
-                                new_lines.append(original_indent + ' ' * max(0, relative_indent) + line.lstrip())
-                            else:
-                                new_lines.append(line)
-                        else:
-                            new_lines.append(line)
-                
-                # Replace the matched lines with the new lines
-                content_lines[i:i + len(old_lines)] = new_lines
-                modified_content = '\n'.join(content_lines)
-                match_found = True
-                break
-        
-        if not match_found:
-            raise ValueError(f"Could not find exact match for edit:\n{edit['oldText']}")
-    
-    # Create unified diff
-    diff = create_unified_diff(content, modified_content, path)
-    
-    # Format diff with appropriate number of backticks
-    num_backticks = 3
-    while '`' * num_backticks in diff:
-        num_backticks += 1
-    formatted_diff = f"{'`' * num_backticks}diff\n{diff}{'`' * num_backticks}\n\n"
-    
-    if not dry_run:
-        with open(path, 'w', encoding='utf-8') as file:
-            file.write(modified_content)
+            before = start
+            for k in range(1, context_lines + 1):
+                if before == 0:
+                    break
+                previous = content.rfind(newline, 0, before - 1) + 1
+                lines.setdefault(line_no - k, (decode_line(content[previous:before - 1]), False))
+                before = previous
+            
+            after = end
+            for k in range(1, context_lines + 1):
+                if after + 1 >= size:
+                    break
+                following = content.find(newline, after + 1)
+                if following == -1:
+                    following = size
+                lines.setdefault(line_no + k, (decode_line(content[after + 1:following]), False))
+                after = following
+            
+            # Report each line once, however many times it matches
+            pos = end + 1
     
-    return formatted_diff
+    return [(number, text, is_match) for number, (text, is_match) in sorted(lines.items())]
 
-@function_tool
-def edit_file(path: str, edits: List[Dict[str, str]], dry_run: bool = False) -> str:
+
+def search_content_batch(
+    file_paths: List[str],
+    regex_source: bytes,
+    flags: int,
+    literal: Optional[bytes],
+    context_lines: int,
+    max_matches: int,
+) -> List[Tuple[str, List[Tuple[int, str, bool]]]]:
     """
-    Make selective edits using advanced pattern matching and formatting.
+    Search a batch of files, stopping once max_matches matching lines were found.
     
-    This is a wrapper around apply_file_edits that provides a simpler interface.
+    Runs inside a worker process for large trees.
     
-    Args:
-        path: File to edit
-        edits: List of edit operations, each containing 'oldText' and 'newText'
-        dry_run: Preview changes without applying (default: False)
-        
     Returns:
-        Detailed diff and match information
+        (file path, lines) pairs for the files with matches
     """
-    return apply_file_edits(path, edits, dry_run)
-############# End of EDIT FILE  #############
+    results = []
+    for file_path in file_paths:
+        try:
+            lines = search_file_content(file_path, regex_source, flags, literal, context_lines, max_matches)
+        except (OSError, ValueError):
+            continue
+        if lines:
+            results.append((file_path, lines))
+            max_matches -= sum(1 for _, _, is_match in lines if is_match)
+            if max_matches <= 0:
+                break
+    return results
 
 
-############# CREATE DIRECTORY  #############
-@function_tool
-def create_directory(path: str) -> str:
+def format_content_search_results(results: List[Tuple[str, List[Tuple[int, str, bool]]]], truncated: bool) -> str:
     """
-    Create new directory or ensure it exists.
+    Format content search results into a LLM-friendly, grep-like string.
     
-    Args:
-        path: Directory path to create
-        
-    Returns:
-        Success message
-        
-    Raises:
-        PermissionError: If the directory cannot be created due to permissions
-    """
-    os.makedirs(path, exist_ok=True)
-    return f"Successfully created directory {path}"
-############# End of CREATE DIRECTORY  #############
-
-############# LIST DIRECTORY  #############
-@function_tool
-def list_directory(path: str) -> str:
-    """
-    List directory contents with [FILE] or [DIR] prefixes.
+    Matching lines are shown as "12: text", context lines as "13- text" and
+    gaps between hunks as "--".
     
     Args:
-        path: Directory path to list
+        results: (file path, lines) pairs
+        truncated: Whether the search stopped at the result limit
         
     Returns:
-        Formatted string with directory contents
-        
-    Raises:
-        FileNotFoundError: If the directory does not exist
-        NotADirectoryError: If the path is not a directory
+        Formatted string with search results
     """
-    entries = os.listdir(path)
-    formatted_entries = []
+    if not results:
+        return "No matches found."
     
-    for entry in entries:
-        entry_path = os.path.join(path, entry)
-        if os.path.isdir(entry_path):
-            formatted_entries.append(f"[DIR] {entry}")
-        else:
-            formatted_entries.append(f"[FILE] {entry}")
+    total = sum(1 for _, lines in results for _, _, is_match in lines if is_match)
+    formatted_output = [f"Found {total} matching lines in {len(results)} files:"]
     
-    return '\n'.join(formatted_entries)
+    for file_path, lines in results:
+        formatted_output.append(f"\nFile: {file_path}")
+        previous = None
+        for line_no, text, is_match in lines:
+            if previous is not None and line_no > previous + 1:
+                formatted_output.append("--")
+            formatted_output.append(f"{line_no}{':' if is_match else '-'} {text}")
+            previous = line_no
+    
+    if truncated:
+        formatted_output.append(f"\n[Stopped at {total} matching lines; narrow the pattern or path to see more]")
+    
+    return "\n".join(formatted_output)
 
-############# End of LIST DIRECTORY  #############
 
-############# MOVE FILE  #############
-@function_tool
-def move_file(source: str, destination: str) -> str:
+def find_in_content(
+    path: str,
+    pattern: str,
+    is_regex: bool = False,
+    case_sensitive: bool = True,
+    include_pattern: Optional[str] = None,
+    exclude_patterns: Optional[List[str]] = None,
+    context_lines: int = 2,
+    max_results: int = CONTENT_SEARCH_MAX_RESULTS,
+) -> Tuple[List[Tuple[str, List[Tuple[int, str, bool]]]], bool]:
     """
-    Move or rename files and directories.
+    Search the text files below path for a literal or regular expression.
     
     Args:
-        source: Source file or directory path
-        destination: Destination file or directory path
+        path: Directory to search, or a single file
+        pattern: Text or regular expression to look for
+        is_regex: Treat pattern as a regular expression
+        case_sensitive: Match case exactly
+        include_pattern: Optional glob that file names must match, e.g. "*.py"
+        exclude_patterns: Names or glob patterns to exclude
+        context_lines: Number of lines of context around each match
+        max_results: Maximum number of matching lines to return
         
     Returns:
-        Success message
+        Tuple of (file path, lines) pairs and whether the limit was hit
         
     Raises:
-        FileNotFoundError: If the source does not exist
-        FileExistsError: If the destination already exists
+        ValueError: If the pattern is empty or not a valid regular expression
     """
-    if os.path.exists(destination):
-        raise FileExistsError(f"Destination already exists: {destination}")
+    if not pattern:
+        raise ValueError("Search pattern must not be empty")
     
-    shutil.move(source, destination)
-    return f"Successfully moved {source} to {destination}"
-############# End of MOVE FILE  #############
-
-############# SEARCH FILES  #############
-def format_search_results(results: List[str]) -> str:
-    """
-    Format search results into a LLM-friendly string.
+    pattern_bytes = pattern.encode('utf-8')
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    literal = pattern_bytes if not is_regex and case_sensitive else None
+    if case_sensitive or pattern.isascii():
+        regex_source: Union[bytes, str] = pattern_bytes if is_regex else re.escape(pattern_bytes)
+    else:
+        # IGNORECASE only folds ASCII letters in bytes patterns, so match on decoded text
+        regex_source = pattern if is_regex else re.escape(pattern)
+    try:
+        re.compile(regex_source, flags)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression: {e}")
     
-    Args:
-        results: List of file paths found in the search
-        
-    Returns:
-        Formatted string with search results
-    """
-    if not results:
-        return "No files or directories found matching the pattern."
+    file_paths = list(iter_tree_files(path, exclude_patterns, include_pattern))
+    args = (regex_source, flags, literal, context_lines)
     
-    formatted_output = [f"Found {len(results)} matches:"]
+    if len(file_paths) < CONTENT_SEARCH_PROCESS_MIN_FILES:
+        results = search_content_batch(file_paths, *args, max_results + 1)
+    else:
+        batches = [
+            file_paths[i:i + CONTENT_SEARCH_BATCH_SIZE]
+            for i in range(0, len(file_paths), CONTENT_SEARCH_BATCH_SIZE)
+        ]
+        batch_results: Dict[int, List] = {}
+        found = 0
+        executor = get_content_search_executor()
+        futures = {
+            executor.submit(search_content_batch, batch, *args, max_results + 1): i
+            for i, batch in enumerate(batches)
+        }
+        try:
+            for future in as_completed(futures):
+                batch_results[futures[future]] = future.result()
+                found += sum(1 for _, lines in batch_results[futures[future]] for _, _, is_match in lines if is_match)
+                if found > max_results:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+        results = [item for i in sorted(batch_results) for item in batch_results[i]]
     
-    for i, path in enumerate(results, 1):
-        formatted_output.append(f"{i}. {path}")
+    # Trim to exactly max_results matching lines
+    trimmed = []
+    remaining = max_results
+    truncated = False
+    for file_path, lines in results:
+        if remaining <= 0:
+            truncated = True
+            break
+        kept = []
+        for line in lines:
+            if line[2]:
+                if remaining <= 0:
+                    truncated = True
+                    break
+                remaining -= 1
+            kept.append(line)
+        if truncated:
+            # Drop the leading context of the first match that was cut off
+            last_match = max(line_no for line_no, _, is_match in kept if is_match)
+            kept = [line for line in kept if line[0] <= last_match + context_lines]
+        trimmed.append((file_path, kept))
     
-    return "\n".join(formatted_output)
+    return trimmed, truncated
+
 
-@function_tool
-def search_files(path: str, pattern: str, exclude_patterns: List[str] = None) -> str:
+@file_tool
+def file_find_in_content(
+    path: str,
+    pattern: str,
+    is_regex: bool = False,
+    case_sensitive: bool = True,
+    include_pattern: Optional[str] = None,
+    exclude_patterns: List[str] = None,
+    context_lines: int = 2,
+    max_results: int = CONTENT_SEARCH_MAX_RESULTS,
+) -> str:
     """
-    Recursively search for files/directories.
+    Search file contents for text or a regular expression, like grep.
+    
+    Binary files are skipped. Each matching line is returned with its line number
+    and surrounding context.
     
     Args:
-        path: Starting directory
-        pattern: Search pattern
-        exclude_patterns: Exclude any patterns. Glob formats are supported.
+        path: Directory to search recursively, or a single file
+        pattern: Text to look for, or a regular expression if is_regex is set
+        is_regex: Treat pattern as a Python regular expression (default: False)
+        case_sensitive: Match case exactly (default: True)
+        include_pattern: Only search files whose name matches this glob, e.g. "*.py"
+        exclude_patterns: Exclude any patterns. Plain names (e.g. "node_modules") and glob formats are supported.
+        context_lines: Lines of context around each match (default: 2)
+        max_results: Maximum number of matching lines to return (default: 200)
         
     Returns:
-        Formatted string with search results
+        Formatted string with matching lines grouped by file
         
     Raises:
-        FileNotFoundError: If the starting directory does not exist
-        NotADirectoryError: If the path is not a directory
+        FileNotFoundError: If the path does not exist
+        ValueError: If the pattern is empty or an invalid regular expression
     """
-    if exclude_patterns is None:
-        exclude_patterns = []
-    
-    results = []
-    
-    for root, dirs, files in os.walk(path):
-        # Check directories
-        for dir_name in dirs:
-            full_path = os.path.join(root, dir_name)
-            relative_path = os.path.relpath(full_path, path)
-            
-            # Check if path matches any exclude pattern
-            should_exclude = any(
-                fnmatch.fnmatch(relative_path, pattern if '*' in pattern else f"**/{pattern}/**")
-                for pattern in exclude_patterns
-            )
-            
-            if should_exclude:
-                continue
-                
-            if pattern.lower() in dir_name.lower():
-                results.append(full_path)
-        
-        # Check files
-        for file_name in files:
-            full_path = os.path.join(root, file_name)
-            relative_path = os.path.relpath(full_path, path)
-            
-            # Check if path matches any exclude pattern
-            should_exclude = any(
-                fnmatch.fnmatch(relative_path, pattern if '*' in pattern else f"**/{pattern}/**")
-                for pattern in exclude_patterns
-            )
-            
-            if should_exclude:
-                continue
-                
-            if pattern.lower() in file_name.lower():
-                results.append(full_path)
+    path = check_path(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Path does not exist: {path}")
     
-    return format_search_results(results)
-############# End of SEARCH FILES  #############
+    results, truncated = find_in_content(
+        path, pattern, is_regex, case_sensitive, include_pattern, exclude_patterns, context_lines, max_results
+    )
+    return format_content_search_results(results, truncated)
+
+############# End of FIND IN CONTENT  #############
 
 ############# GET FILES INFO  #############
 def format_file_info(info: Dict[str, Any]) -> str:
@@ -540,15 +3853,7 @@ def format_file_info(info: Dict[str, Any]) -> str:
     formatted_output = [f"File Information:"]
     
     # Format size with appropriate units
-    size_bytes = info['size']
-    if size_bytes < 1024:
-        size_str = f"{size_bytes} bytes"
-    elif size_bytes < 1024 * 1024:
-        size_str = f"{size_bytes / 1024:.2f} KB"
-    else:
-        size_str = f"{size_bytes / (1024 * 1024):.2f} MB"
-    
-    formatted_output.append(f"Size: {size_str}")
+    formatted_output.append(f"Size: {format_size(info['size'])}")
     
     # Format timestamps
     date_format = "%Y-%m-%d %H:%M:%S"
@@ -563,7 +3868,7 @@ def format_file_info(info: Dict[str, Any]) -> str:
     
     return "\n".join(formatted_output)
 
-@function_tool
+@file_tool
 def get_file_info(path: str) -> str:
     """
     Get detailed file/directory metadata.
@@ -577,6 +3882,7 @@ def get_file_info(path: str) -> str:
     Raises:
         FileNotFoundError: If the file or directory does not exist
     """
+    path = check_path(path)
     stats = os.stat(path)
     
     info = {
@@ -584,12 +3890,115 @@ def get_file_info(path: str) -> str:
         'created': datetime.fromtimestamp(stats.st_ctime),
         'modified': datetime.fromtimestamp(stats.st_mtime),
         'accessed': datetime.fromtimestamp(stats.st_atime),
-        'isDirectory': os.path.isdir(path),
-        'isFile': os.path.isfile(path),
+        'isDirectory': stat.S_ISDIR(stats.st_mode),
+        'isFile': stat.S_ISREG(stats.st_mode),
         'permissions': oct(stats.st_mode)[-3:]
     }
     
     return format_file_info(info)
+
+
+FILES_INFO_MAX_PATHS = 1000
+# Batches smaller than this are stat-ed inline; larger ones on a thread pool,
+# which hides latency on network mounts
+FILES_INFO_PARALLEL_MIN_PATHS = 32
+
+
+def file_type_from_mode(mode: int) -> str:
+    """
+    Derive a file type name from st_mode.
+    
+    Args:
+        mode: st_mode of a stat result
+        
+    Returns:
+        "dir", "file", "symlink" or "other"
+    """
+    if stat.S_ISDIR(mode):
+        return "dir"
+    if stat.S_ISREG(mode):
+        return "file"
+    if stat.S_ISLNK(mode):
+        return "symlink"
+    return "other"
+
+
+def stat_file_row(path: str) -> List[str]:
+    """
+    Stat one path and format it as a row of the files info table.
+    
+    The path is lstat-ed, so a symlink is reported as one rather than as its target.
+    
+    Args:
+        path: The path to stat
+        
+    Returns:
+        Row cells: path, type, size, modified, permissions
+    """
+    try:
+        # A symlink is shown wherever it points, so only the link itself is validated
+        stats = os.lstat(check_link_path(path))
+    except (OSError, ValueError) as e:
+        return [path, "error", "-", "-", str(e)]
+    
+    file_type = file_type_from_mode(stats.st_mode)
+    size = format_size(stats.st_size) if file_type == "file" else "-"
+    modified = datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+    return [path, file_type, size, modified, oct(stats.st_mode)[-3:]]
+
+
+def format_files_info_table(rows: List[List[str]], total: int) -> str:
+    """
+    Format file metadata rows into a compact LLM-friendly table.
+    
+    Args:
+        rows: Row cells per path
+        total: Number of paths requested, if more than the rows shown
+        
+    Returns:
+        Formatted table
+    """
+    if not rows:
+        return "No matching files or directories."
+    
+    formatted_output = ["Path | Type | Size | Modified | Permissions"]
+    formatted_output.extend(" | ".join(row) for row in rows)
+    if total > len(rows):
+        formatted_output.append(f"[Showing {len(rows)} of {total} paths]")
+    return "\n".join(formatted_output)
+
+
+@file_tool
+def get_multiple_files_info(paths: List[str] = None, pattern: Optional[str] = None) -> str:
+    """
+    Get metadata of many files/directories in one call, as a table.
+    
+    Each path is stat-ed once. Paths that do not exist are reported in the table
+    rather than failing the call.
+    
+    Args:
+        paths: List of paths to file or directory
+        pattern: Glob selecting paths instead of, or in addition to, paths, e.g. "build/**/*.o" ("**" recurses)
+        
+    Returns:
+        Table with path, type, size, modification time and permissions
+    """
+    requested = list(paths or [])
+    if pattern:
+        pattern = expand_home(pattern)
+        # The part before the first wildcard must lie in the allowed directories
+        check_path(os.path.dirname(re.split(r'[*?\[]', pattern, maxsplit=1)[0]) or '.')
+        requested.extend(sorted(glob.iglob(pattern, recursive=True)))
+    requested = list(dict.fromkeys(requested))
+    shown = requested[:FILES_INFO_MAX_PATHS]
+    
+    if len(shown) < FILES_INFO_PARALLEL_MIN_PATHS:
+        rows = [stat_file_row(path) for path in shown]
+    else:
+        with ThreadPoolExecutor(max_workers=READ_MULTIPLE_FILES_MAX_WORKERS) as executor:
+            rows = list(executor.map(stat_file_row, shown))
+    
+    return format_files_info_table(rows, len(requested))
 ############# End of GET FILES INFO  #############
 
 ############# LIST ALLOWED DIRECTORIES  #############
@@ -613,7 +4022,7 @@ def format_allowed_directories(directories: List[str]) -> str:
     
     return "\n".join(formatted_output)
 
-@function_tool
+@file_tool
 def list_allowed_directories(allowed_dirs: List[str] = None) -> str:
     """
     List all directories the server is allowed to access.
@@ -625,11 +4034,55 @@ def list_allowed_directories(allowed_dirs: List[str] = None) -> str:
         Formatted string with allowed directories
     """
     if allowed_dirs is None:
-        # If no directories are provided, return an empty list
-        # In a real implementation, this might return system-defined allowed directories
-        directories = []
+        # Fall back to the directories the file tools are restricted to
+        directories = get_allowed_directories()
+        if not directories:
+            return "Access is not restricted to specific directories."
     else:
         directories = allowed_dirs
     
     return format_allowed_directories(directories)
-############# End of LIST ALLOWED DIRECTORIES  #############
\ No newline at end of file
+############# End of LIST ALLOWED DIRECTORIES  #############
+
+
+############# ASYNC FILE TOOLS  #############
+def async_file_tool(name: str):
+    """
+    Build the async variant of a file tool, running it on the I/O thread pool.
+    
+    The variant keeps the signature and docstring of the tool, so the model
+    sees the same schema under the name <tool>_async.
+    
+    Args:
+        name: Name of the registered file tool
+        
+    Returns:
+        The async FunctionTool
+    """
+    func = _file_tool_functions[name]
+    
+    @wraps(func)
+    async def wrapper(*args, **kwargs) -> str:
+        return await run_file_io(func, *args, **kwargs)
+    
+    return function_tool(wrapper, name_override=f"{name}_async", **_file_tool_options[name])
+
+
+read_file_async = async_file_tool("read_file")
+read_multiple_files_async = async_file_tool("read_multiple_files")
+write_file_async = async_file_tool("write_file")
+open_write_session_async = async_file_tool("open_write_session")
+close_write_session_async = async_file_tool("close_write_session")
+write_multiple_files_async = async_file_tool("write_multiple_files")
+edit_file_async = async_file_tool("edit_file")
+create_directory_async = async_file_tool("create_directory")
+list_directory_async = async_file_tool("list_directory")
+directory_tree_async = async_file_tool("directory_tree")
+move_file_async = async_file_tool("move_file")
+search_files_async = async_file_tool("search_files")
+file_find_by_name_async = async_file_tool("file_find_by_name")
+file_find_in_content_async = async_file_tool("file_find_in_content")
+get_file_info_async = async_file_tool("get_file_info")
+get_multiple_files_info_async = async_file_tool("get_multiple_files_info")
+list_allowed_directories_async = async_file_tool("list_allowed_directories")
+############# End of ASYNC FILE TOOLS  #############
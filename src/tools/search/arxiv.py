@@ -1,5 +1,4 @@
 import logging
-import time # time.sleep 不再需要，使用 asyncio.sleep
 import os
 import re # 用于清理文件名
 import asyncio # 用于异步操作和 sleep
@@ -15,6 +14,9 @@ from arxiv import ArxivError, UnexpectedEmptyPageError, HTTPError
 
 from dotenv import load_dotenv, find_dotenv
 
+from src.tools.search.singleflight import single_flight
+from src.tools.search.ratelimit import call_with_backoff, get_rate_limiter
+
 # --- 配置和全局变量 ---
 # 假设 DEFAULT_MAX_RETRIES 在别处定义或不再需要
 # DEFAULT_MAX_RETRIES = 3
@@ -127,81 +129,68 @@ async def run_sync_in_executor(func, *args):
     # 使用默认的 ThreadPoolExecutor
     return await loop.run_in_executor(None, func, *args)
 
-# --- arxiv_query 函数 (保持之前的版本或根据需要修改为 async) ---
+# --- arxiv_query 函数 (异步版本，同时发起的相同查询只请求一次) ---
 @function_tool
-def arxiv_query(query: str, max_results: int = 10, sort_by: Literal["relevance", "lastUpdatedDate", "submittedDate"] = "relevance", retries: int = 3, backoff_factor: float = 1.5) -> str:
+@single_flight
+async def arxiv_query(query: str, max_results: int = 10, sort_by: Literal["relevance", "lastUpdatedDate", "submittedDate"] = "relevance", retries: int = 3, backoff_factor: float = 1.5) -> str:
     """
-    使用 arXiv API 查询论文，并处理潜在的错误和重试。 (同步版本)
-    ... (之前的 arxiv_query 代码) ...
+    使用 arXiv API 查询论文，并处理潜在的错误和重试。 (异步版本)
+    阻塞的 arxiv 调用放入 executor 运行，不会阻塞事件循环。
     """
-    # ... (之前的 arxiv_query 代码，注意它仍然是同步的，使用 time.sleep) ...
-    # 如果你的应用主要是异步的，建议将此函数也改为 async，使用 asyncio.sleep 和 run_sync_in_executor
     search_params = arxiv.Search(
         query=query,
         max_results=max_results,
         sort_by=getattr(arxiv.SortCriterion, sort_by.capitalize()) # arxiv 库需要枚举类型
     )
 
-    #results_list: List[Dict[str, Any]] = []
-    last_exception: Exception | None = None
-
-    for attempt in range(retries + 1): # +1 因为第一次尝试不算重试
-        try:
-            # 注意：这里的 list(client.results(...)) 是同步阻塞调用
-            # 如果在异步环境中使用此函数，这可能会阻塞事件循环
-            results_generator = client.results(search_params)
-            fetched_results = list(results_generator) # 将生成器转换为列表以获取所有结果
-
-            if not fetched_results:
-                return "ArXiv query returned no results."
-
-            output_lines = []
-            for result in fetched_results:
-                categories_str = ", ".join(result.categories)
-                authors_str = ", ".join(author.name for author in result.authors)
-                paper_id = "N/A"
-                if result.pdf_url:
-                    try:
-                        paper_id = result.pdf_url.split('/')[-1].replace('.pdf', '')
-                    except Exception as extract_err:
-                        logging.warning(f"Could not extract paper_id from pdf_url '{result.pdf_url}': {extract_err}")
-
-                output_lines.append(
-                    f"--------------------\n" # 添加换行符
-                    f"Title: {result.title}\n"
-                    f"Paper ID: {paper_id}\n"
-                    f"Authors: {authors_str}\n"
-                    f"Published Date: {result.published.strftime('%Y-%m-%d')}\n"
-                    f"Categories: {categories_str}\n"
-                    f"Summary: {result.summary}\n"
-                    f"PDF URL: {result.pdf_url}\n"
-                    f"--------------------"
-                )
-            return "\n".join(output_lines)
-
-        except (HTTPError, UnexpectedEmptyPageError, ArxivError) as e:
-            last_exception = e
-            logging.warning(f"ArXiv query attempt {attempt + 1}/{retries + 1} failed: {type(e).__name__}: {e}")
-            if attempt < retries:
-                wait_time = backoff_factor * (2 ** attempt)
-                logging.info(f"Retrying query in {wait_time:.2f} seconds...")
-                # 这是同步 sleep，会阻塞
-                time.sleep(wait_time)
-            else:
-                logging.error(f"ArXiv query failed after {retries + 1} attempts.")
-                return f"ArXiv query failed after {retries} retries. Last error: {type(e).__name__}: {e}"
-        except Exception as e:
-            logging.exception(f"An unexpected error occurred during ArXiv query: {e}")
-            return f"An unexpected error occurred during ArXiv query: {type(e).__name__}: {e}"
-
-    error_msg = f"ArXiv query failed after {retries} retries."
-    if last_exception:
-        error_msg += f" Last error: {type(last_exception).__name__}: {last_exception}"
-    return error_msg
+    try:
+        # 请求经过 arxiv 限流器排队；失败时按带抖动的指数退避重试 (asyncio.sleep，不阻塞事件循环)
+        # list(client.results(...)) 是同步阻塞调用，放入 executor 运行
+        fetched_results = await call_with_backoff(
+            "arxiv",
+            lambda: run_sync_in_executor(lambda: list(client.results(search_params))),
+            retryable=lambda e: isinstance(e, (HTTPError, UnexpectedEmptyPageError, ArxivError)),
+            retries=retries,
+            base_delay=backoff_factor,
+        )
+    except (HTTPError, UnexpectedEmptyPageError, ArxivError) as e:
+        logging.error(f"ArXiv query failed after {retries + 1} attempts.")
+        return f"ArXiv query failed after {retries} retries. Last error: {type(e).__name__}: {e}"
+    except Exception as e:
+        logging.exception(f"An unexpected error occurred during ArXiv query: {e}")
+        return f"An unexpected error occurred during ArXiv query: {type(e).__name__}: {e}"
+
+    if not fetched_results:
+        return "ArXiv query returned no results."
+
+    output_lines = []
+    for result in fetched_results:
+        categories_str = ", ".join(result.categories)
+        authors_str = ", ".join(author.name for author in result.authors)
+        paper_id = "N/A"
+        if result.pdf_url:
+            try:
+                paper_id = result.pdf_url.split('/')[-1].replace('.pdf', '')
+            except Exception as extract_err:
+                logging.warning(f"Could not extract paper_id from pdf_url '{result.pdf_url}': {extract_err}")
+
+        output_lines.append(
+            f"--------------------\n" # 添加换行符
+            f"Title: {result.title}\n"
+            f"Paper ID: {paper_id}\n"
+            f"Authors: {authors_str}\n"
+            f"Published Date: {result.published.strftime('%Y-%m-%d')}\n"
+            f"Categories: {categories_str}\n"
+            f"Summary: {result.summary}\n"
+            f"PDF URL: {result.pdf_url}\n"
+            f"--------------------"
+        )
+    return "\n".join(output_lines)
 
 
 # --- arxiv_download 函数 (异步版本，单次重试) ---
 @function_tool # 如果是 agent tool, 取消注释
+@single_flight
 async def arxiv_download(paper_id: str) -> str:
     """
     根据论文 ID 下载 arXiv 论文 PDF 到指定目录。
@@ -235,8 +224,9 @@ async def arxiv_download(paper_id: str) -> str:
         # 使用 run_sync_in_executor 运行同步的 os.makedirs，虽然通常很快，但保持一致性
         await run_sync_in_executor(os.makedirs, target_dir, exist_ok=True)
 
-        # 2. 获取论文元数据 (同步调用，放入 executor)
+        # 2. 获取论文元数据 (同步调用，放入 executor)，先在 arxiv 限流器排队
         logging.debug(f"Fetching metadata for paper ID: {paper_id}")
+        await get_rate_limiter("arxiv").acquire()
         search = arxiv.Search(id_list=[paper_id])
         # client.results 是同步的，需要放入 executor
         results_iterator = await run_sync_in_executor(client.results, search)
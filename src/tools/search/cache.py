@@ -0,0 +1,262 @@
+"""
+CyanoManus Search Result Cache
+
+A module providing a TTL result cache shared by the search tools, so repeated
+queries within a research run don't hit the upstream APIs again.
+
+Results live in an in-memory LRU tier and, when SEARCH_CACHE_DB is set, in a
+SQLite disk tier that survives restarts and is shared between processes.
+Async callers use aget/aset, which run the disk tier on a worker thread so a
+locked database never stalls the event loop.
+
+HELPERS_AVAILABLE:
+1. normalize_query: Normalize a query string for use in a cache key
+2. make_cache_key: Build a stable key from a query and its parameters
+3. ResultCache: Two-tier (memory LRU + optional SQLite) TTL cache
+"""
+
+from dotenv import find_dotenv, load_dotenv
+
+import os
+import asyncio
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+############# INITIALIZE #############
+
+_ = load_dotenv(find_dotenv())
+
+# Path of the shared SQLite disk tier; empty disables it
+SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB", "")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+# Seconds between purges of expired rows from the disk tier
+SEARCH_CACHE_PURGE_INTERVAL = 300
+
+############# End of INITIALIZE #############
+
+
+############# CACHE KEYS #############
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share a cache entry.
+
+    Args:
+        query: The query string
+
+    Returns:
+        The query, case-folded and with whitespace collapsed
+    """
+    return " ".join(query.split()).casefold()
+
+
+def make_cache_key(**params: Any) -> str:
+    """
+    Build a stable cache key from call parameters.
+
+    Parameters that are None are dropped, so an explicit default and an
+    omitted argument map to the same key.
+
+    Args:
+        **params: The parameters identifying a call
+
+    Returns:
+        Hex digest identifying the parameters
+    """
+    relevant = {name: value for name, value in params.items() if value is not None}
+    encoded = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+############# End of CACHE KEYS #############
+
+
+############# RESULT CACHE #############
+class ResultCache:
+    """
+    TTL cache with an in-memory LRU tier and an optional SQLite disk tier.
+
+    Values must be JSON-serializable to reach the disk tier. Expired entries
+    are dropped lazily when they are read, and purged from the disk tier at
+    most every SEARCH_CACHE_PURGE_INTERVAL seconds.
+    
+    get/set touch the disk tier on the calling thread; async code should use
+    aget/aset instead.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, db_path: Optional[str] = SEARCH_CACHE_DB):
+        """
+        Args:
+            namespace: Name separating this cache's entries in the disk tier
+            max_entries: Entries kept in memory
+            db_path: SQLite file for the disk tier, or empty/None for memory only
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # The memory tier never waits on the disk tier, which may block on another process's lock
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.purged_at = 0.0
+
+    def connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use; a failure disables it for this cache."""
+        if self.db_path is None:
+            return None
+        if self.connection is None:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+                connection = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS results_expiry ON results (namespace, expires_at)")
+                self.connection = connection
+            except sqlite3.Error:
+                self.db_path = None
+                return None
+        return self.connection
+
+    def remember(self, key: str, expires_at: float, value: Any) -> None:
+        """Put an entry into the memory tier, evicting the least recently used ones."""
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_memory(self, key: str) -> Optional[Any]:
+        """Look up a fresh entry in the memory tier."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] > time.time():
+                self.entries.move_to_end(key)
+                return entry[1]
+            del self.entries[key]
+            return None
+
+    def get_disk(self, key: str) -> Optional[Any]:
+        """Look up a fresh entry in the disk tier, promoting it to the memory tier."""
+        with self.db_lock:
+            connection = self.connect()
+            if connection is None:
+                return None
+            try:
+                row = connection.execute(
+                    "SELECT value, expires_at FROM results WHERE namespace = ? AND key = ?", (self.namespace, key)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or row[1] <= time.time():
+            return None
+        value = json.loads(row[0])
+        self.remember(key, row[1], value)
+        return value
+
+    def set_disk(self, key: str, value: Any, expires_at: float) -> None:
+        """Store an entry in the disk tier, purging expired rows now and then."""
+        with self.db_lock:
+            connection = self.connect()
+            if connection is None:
+                return
+            try:
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO results (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.namespace, key, json.dumps(value, ensure_ascii=False, default=str), expires_at),
+                    )
+                    now = time.time()
+                    if now - self.purged_at >= SEARCH_CACHE_PURGE_INTERVAL:
+                        connection.execute(
+                            "DELETE FROM results WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+                        )
+                        self.purged_at = now
+            except (sqlite3.Error, TypeError, ValueError):
+                pass
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a fresh entry.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        value = self.get_memory(key)
+        if value is None and self.db_path is not None:
+            value = self.get_disk(key)
+        return value
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        Look up a fresh entry, reading the disk tier on a worker thread.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        value = self.get_memory(key)
+        if value is None and self.db_path is not None:
+            value = await asyncio.to_thread(self.get_disk, key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl: Seconds the value stays fresh
+        """
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self.remember(key, expires_at, value)
+        if self.db_path is not None:
+            self.set_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value in both tiers, writing the disk tier on a worker thread.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl: Seconds the value stays fresh
+        """
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self.remember(key, expires_at, value)
+        if self.db_path is not None:
+            await asyncio.to_thread(self.set_disk, key, value, expires_at)
+
+    def clear(self) -> None:
+        """Drop every entry of this cache from both tiers."""
+        with self.lock:
+            self.entries.clear()
+        with self.db_lock:
+            connection = self.connect()
+            if connection is not None:
+                try:
+                    with connection:
+                        connection.execute("DELETE FROM results WHERE namespace = ?", (self.namespace,))
+                except sqlite3.Error:
+                    pass
+
+############# End of RESULT CACHE #############
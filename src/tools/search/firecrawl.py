@@ -9,6 +9,8 @@ _ = load_dotenv(find_dotenv())
 
 from firecrawl import FirecrawlApp
 
+from src.tools.search.singleflight import single_flight
+
 # Ensure API key is loaded
 api_key = os.getenv("FIRECRAWL_API_KEY")
 if not api_key:
@@ -185,6 +187,7 @@ def _create_params_dict(**kwargs) -> Dict[str, Any]:
 # --- Tool Functions ---
 
 @function_tool
+@single_flight
 async def firecrawl_scrape(
     url: str,
     formats: Optional[List[str]] = ['markdown'], # Default as per original doc
@@ -249,6 +252,7 @@ async def firecrawl_scrape(
 
 
 @function_tool
+@single_flight
 async def firecrawl_map(
     url: str,
     search: Optional[str] = None,
@@ -382,6 +386,7 @@ async def firecrawl_crawl(
 
 
 @function_tool
+@single_flight
 async def firecrawl_search(
     query: str,
     # --- Search Page Options ---
@@ -0,0 +1,80 @@
+"""
+CyanoManus Shared HTTP Clients
+
+A module keeping one pooled httpx.AsyncClient per provider and event loop, so
+search tools reuse connections instead of opening a new pool for every request.
+
+httpx connections belong to the event loop that opened them, so every loop gets
+its own client. The client is closed when its loop shuts down: asyncio.run (and
+anything else calling loop.shutdown_asyncgens) finalizes a guard async generator
+that closes it, so short-lived loops do not leak connection pools.
+
+HELPERS_AVAILABLE:
+1. get_http_client: Pooled client of a provider for the running event loop
+"""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Tuple
+
+import httpx
+
+############# INITIALIZE #############
+
+# (provider, loop) -> (client, guard generator closing it at loop shutdown)
+_http_clients: Dict[Tuple[str, asyncio.AbstractEventLoop], Tuple[httpx.AsyncClient, AsyncIterator[None]]] = {}
+_http_clients_lock = threading.Lock()
+
+############# End of INITIALIZE #############
+
+
+############# HTTP CLIENTS #############
+async def close_on_loop_shutdown(key: Tuple[str, asyncio.AbstractEventLoop], client: httpx.AsyncClient) -> AsyncIterator[None]:
+    """
+    Guard generator that closes a client when the event loop shuts down.
+
+    Started once and then left suspended; the loop finalizes it in
+    shutdown_asyncgens, which runs the finally block inside the loop.
+
+    Args:
+        key: The client's key in _http_clients
+        client: The client to close
+    """
+    try:
+        yield
+    finally:
+        with _http_clients_lock:
+            if key in _http_clients and _http_clients[key][0] is client:
+                del _http_clients[key]
+        await client.aclose()
+
+
+async def get_http_client(provider: str, timeout: httpx.Timeout, limits: httpx.Limits) -> httpx.AsyncClient:
+    """
+    Get the pooled client of a provider for the running event loop, creating it on first use.
+
+    Args:
+        provider: Provider name, e.g. "openweather"
+        timeout: Timeouts of a new client
+        limits: Connection limits of a new client
+
+    Returns:
+        httpx.AsyncClient: The shared client
+    """
+    loop = asyncio.get_running_loop()
+    key = (provider, loop)
+    with _http_clients_lock:
+        # Loops closed without shutdown_asyncgens never ran their guard; drop their clients
+        for stale in [other for other in _http_clients if other[1].is_closed()]:
+            del _http_clients[stale]
+        entry = _http_clients.get(key)
+        if entry is not None and not entry[0].is_closed:
+            return entry[0]
+        client = httpx.AsyncClient(timeout=timeout, limits=limits)
+        guard = close_on_loop_shutdown(key, client)
+        _http_clients[key] = (client, guard)
+    # The first step registers the generator with the loop, which finalizes it at shutdown
+    await guard.__anext__()
+    return client
+
+############# End of HTTP CLIENTS #############
@@ -0,0 +1,242 @@
+"""
+CyanoManus Search Rate Limits
+
+A module pacing calls to the search APIs, so bursts of parallel tool calls
+queue up client-side instead of turning into cascades of 429 errors.
+
+Every provider has a token bucket (requests per second plus a burst size).
+Calls wait for a token, and failed calls are retried with jittered
+exponential backoff, honoring Retry-After when the server sends one.
+
+HELPERS_AVAILABLE:
+1. TokenBucket: Async token-bucket rate limiter
+2. get_rate_limiter: Shared limiter of a provider
+3. backoff_delay: Jittered exponential backoff delay
+4. retry_after_seconds: Read the Retry-After header of an HTTP error
+5. call_with_backoff: Run a call under a provider's limiter, retrying transient failures
+"""
+
+from dotenv import find_dotenv, load_dotenv
+
+import os
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+############# INITIALIZE #############
+
+_ = load_dotenv(find_dotenv())
+
+# (requests per second, burst) per provider; override the rate with <PROVIDER>_RATE_LIMIT
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "tavily": (2.0, 5),
+    "wolfram": (1.0, 2),
+    # arXiv asks API clients for at most one request every three seconds
+    "arxiv": (1 / 3, 1),
+    "openweather": (1.0, 5),
+}
+DEFAULT_RATE_LIMIT: Tuple[float, int] = (1.0, 1)
+
+BACKOFF_BASE_DELAY = 1.0
+BACKOFF_MAX_DELAY = 30.0
+BACKOFF_RETRIES = 4
+
+############# End of INITIALIZE #############
+
+
+############# TOKEN BUCKET #############
+class TokenBucket:
+    """
+    Token-bucket rate limiter for async callers.
+
+    A caller takes a token and, if the bucket is empty, sleeps until its token
+    would have been refilled, so waiting callers are served in arrival order
+    rather than rejected. The state is guarded by a thread lock, so one bucket
+    can be shared by several event loops.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens, i.e. calls allowed back to back
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, going into debt if none is left.
+
+        Returns:
+            Seconds the caller must wait before using its token
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    async def acquire(self) -> None:
+        """Wait until the caller may make its request."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every caller for a while, e.g. after the server sent Retry-After.
+
+        Args:
+            seconds: How long to pause
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """
+    Get the shared limiter of a provider, creating it on first use.
+
+    Args:
+        provider: Provider name, e.g. "tavily"
+
+    Returns:
+        The provider's TokenBucket
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            rate, burst = PROVIDER_RATE_LIMITS.get(provider, DEFAULT_RATE_LIMIT)
+            rate = float(os.getenv(f"{provider.upper()}_RATE_LIMIT", rate))
+            limiter = _rate_limiters[provider] = TokenBucket(rate, burst)
+        return limiter
+
+############# End of TOKEN BUCKET #############
+
+
+############# BACKOFF #############
+def backoff_delay(attempt: int, base_delay: float = BACKOFF_BASE_DELAY, max_delay: float = BACKOFF_MAX_DELAY) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Number of failed attempts so far, starting at 0
+        base_delay: Delay ceiling of the first retry in seconds
+        max_delay: Upper bound of the delay ceiling
+
+    Returns:
+        Seconds to wait, drawn uniformly below min(max_delay, base_delay * 2 ** attempt)
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header of a failed HTTP response.
+
+    Args:
+        error: The exception raised by the call
+
+    Returns:
+        Seconds to wait, or None if the error carries no Retry-After
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers or 'retry-after' not in headers:
+        return None
+
+    value = headers['retry-after'].strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Whether a failed call is worth retrying: rate limits, server errors and network failures.
+
+    Args:
+        error: The exception raised by the call
+
+    Returns:
+        True for HTTP 429/5xx, transport errors and timeouts
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+async def call_with_backoff(
+    provider: str,
+    call: Callable[[], Awaitable[Any]],
+    retryable: Callable[[BaseException], bool] = is_retryable_error,
+    retries: int = BACKOFF_RETRIES,
+    base_delay: float = BACKOFF_BASE_DELAY,
+    max_delay: float = BACKOFF_MAX_DELAY,
+) -> Any:
+    """
+    Run a call under the provider's rate limiter, retrying transient failures.
+
+    Each attempt first waits for a token. A failure that retryable accepts is
+    retried after the server's Retry-After (which also pauses the provider's
+    other callers) or else after a jittered exponential backoff. A Retry-After
+    longer than max_delay is not waited out: the error is raised at once.
+
+    Args:
+        provider: Provider name selecting the rate limiter
+        call: Function starting one attempt, returning an awaitable
+        retryable: Decides whether an exception is worth retrying
+        retries: Retries after the first attempt
+        base_delay: Backoff delay ceiling of the first retry in seconds
+        max_delay: Longest wait before a retry in seconds
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        Exception: The last error, once it is not retryable, retries are used up
+            or the server asks to wait longer than max_delay
+    """
+    limiter = get_rate_limiter(provider)
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= retries or not retryable(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is not None:
+                if delay > max_delay:
+                    raise
+                limiter.pause(delay)
+            else:
+                delay = backoff_delay(attempt, base_delay, max_delay)
+            logging.warning(f"{provider} call failed ({type(e).__name__}: {e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+############# End of BACKOFF #############
@@ -0,0 +1,60 @@
+"""
+CyanoManus Single-Flight Calls
+
+A module collapsing concurrent identical calls of an async tool into one.
+
+When several agents fire the same request at the same time, only the first
+call goes to the network; the others await its result.
+
+HELPERS_AVAILABLE:
+1. single_flight: Decorator sharing one in-flight call among identical concurrent calls
+"""
+
+import asyncio
+import inspect
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from src.tools.search.cache import make_cache_key
+
+
+############# SINGLE FLIGHT #############
+def single_flight(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Share one in-flight call among concurrent calls with the same arguments.
+
+    Arguments are bound to the signature with defaults applied, so calls that
+    spell the same request differently still match. The shared call is
+    shielded: a caller that is cancelled stops waiting without cancelling it
+    for the others. Place it below @function_tool, which keeps the signature:
+
+        @function_tool
+        @single_flight
+        async def tavily_extract(urls: List[str], ...) -> str:
+
+    Args:
+        func: The async function to wrap
+
+    Returns:
+        The wrapped async function
+    """
+    signature = inspect.signature(func)
+    in_flight: Dict[Tuple[int, str], asyncio.Task] = {}
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # Tasks belong to one event loop, so calls on different loops never share
+        key = (id(asyncio.get_running_loop()), make_cache_key(**bound.arguments))
+
+        task = in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            in_flight[key] = task
+            task.add_done_callback(lambda _: in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    return wrapper
+
+############# End of SINGLE FLIGHT #############
@@ -7,23 +7,31 @@ TOOLS_AVAILABLE:
 1. prompt_with_tavily_tools_instructions: Add Tavily tools usage instructions to prompt
 2. tavily_search: Real-time web search tool using Tavily API
 3. tavily_extract: Web content extraction tool for specific URLs
-4. prompt_with_get_weather_instructions: Add weather query tool instructions to prompt
-5. get_weather: Weather information retrieval tool using OpenWeather API
+4. tavily_multi_search: Run several searches in one call and merge them into one ranked result
+5. prompt_with_get_weather_instructions: Add weather query tool instructions to prompt
+6. get_weather: Weather information retrieval tool using OpenWeather API
 """
 
 from agents import function_tool
 
-from tavily import AsyncTavilyClient
+from tavily import AsyncTavilyClient, InvalidAPIKeyError, UsageLimitExceededError
 
 import httpx
 from httpx import HTTPStatusError
 
 import requests
 
-from typing import Literal, Optional, List, Union, Sequence, Dict
+from typing import Literal, Optional, List, Union, Sequence, Dict, Tuple
 
 from dotenv import find_dotenv, load_dotenv
 import os
+import asyncio
+import hashlib
+
+from src.tools.search.cache import ResultCache, make_cache_key, normalize_query
+from src.tools.search.singleflight import single_flight
+from src.tools.search.ratelimit import call_with_backoff, is_retryable_error
+from src.utils.budget import CHARS_PER_TOKEN, allocate_budget
 
 ############# INITIALIZE #############
 
@@ -38,17 +46,31 @@ async_tavily_client = AsyncTavilyClient(
     # env TAVILY_HTTPS_PROXY
 )
 
+# Seconds a result stays fresh: news moves fast, general knowledge slowly
+TAVILY_SEARCH_CACHE_TTL = {
+    "news": int(os.getenv("TAVILY_NEWS_CACHE_TTL", 15 * 60)),
+    "finance": int(os.getenv("TAVILY_FINANCE_CACHE_TTL", 15 * 60)),
+    "general": int(os.getenv("TAVILY_GENERAL_CACHE_TTL", 24 * 60 * 60)),
+}
+TAVILY_EXTRACT_CACHE_TTL = int(os.getenv("TAVILY_EXTRACT_CACHE_TTL", 24 * 60 * 60))
+
+tavily_search_cache = ResultCache("tavily_search")
+# Extracted pages: URL -> content hash, and content hash -> page text
+tavily_extract_url_cache = ResultCache("tavily_extract_url")
+tavily_extract_content_cache = ResultCache("tavily_extract_content")
+
 ############# End of INITIALIZE #############
 
 
 def get_all_tavily_tools():
-    return [tavily_search, tavily_extract]
+    return [tavily_search, tavily_extract, tavily_multi_search]
 
 ############# Tavily RECOMMAND INSTRUCTION SUFIX PROMPT #############
 TAVILY_TOOLS_PROMPT = """ 
 你可以使用如下两个强大的工具获得网络信息：
 `tavily_search` 使用此工具进行实时网络搜索，获取相关信息的概览。
 `tavily_extract` 使用此工具从特定URL提取完整内容，进行深入分析。
+`tavily_multi_search` 需要从多个角度搜索时，一次调用传入多个查询，结果会合并去重并排序。
 最佳实践：搭配使用两个工具。比如
 1. 信息收集流程：
    - 先使用 tavily_search 获取相关信息概览
@@ -75,13 +97,153 @@ def prompt_with_tavily_tools_instructions(instruction_prompt: str) -> str:
 ############# End of Tavily RECOMMAND INSTRUCTION SUFIX PROMPT #############
 
 
+############# TAVILY RESULT HELPERS #############
+
+# Raw page content is cut to fit this many tokens per tool result, split across sources
+TAVILY_MAX_CONTENT_TOKENS = 8000
+
+
+def tavily_response_to_dict(response) -> dict:
+    """Get the result dictionary of a Tavily client call without re-parsing it.
+    
+    Args:
+        response: What the client returned, a dict or a pydantic-style response object
+        
+    Returns:
+        dict: The response as a dictionary
+        
+    Raises:
+        TypeError: If the response cannot be turned into a dictionary
+    """
+    if isinstance(response, dict):
+        return response
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    if hasattr(response, "__dict__"):
+        return dict(vars(response))
+    raise TypeError(f"Unexpected Tavily response type: {type(response).__name__}")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring a paragraph or word boundary.
+    
+    Args:
+        text (str): Text to cut
+        max_tokens (int): Token allowance
+        
+    Returns:
+        str: The text, with a note on how much was cut if it did not fit
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit * 0.8:
+        cut = text.rfind(" ", 0, limit)
+    if cut < limit * 0.8:
+        cut = limit
+    return f"{text[:cut].rstrip()}\n[... truncated, showing {cut} of {len(text)} characters]"
+
+
+def budget_raw_contents(results: List[dict], max_tokens: int) -> List[str]:
+    """Truncate the raw_content of each result to its share of the token budget.
+    
+    Args:
+        results (List[dict]): Tavily results, with or without raw_content
+        max_tokens (int): Token budget shared by all raw contents
+        
+    Returns:
+        List[str]: Truncated raw content per result ('' when it has none)
+    """
+    contents = [result.get('raw_content') or '' for result in results]
+    allowances = allocate_budget([len(content) // CHARS_PER_TOKEN + 1 for content in contents], max_tokens)
+    return [truncate_to_tokens(content, allowance) if content else '' for content, allowance in zip(contents, allowances)]
+
+############# End of TAVILY RESULT HELPERS #############
+
+
 ############# TAVILY SEARCH #############
 
-def format_tavily_search_result(search_result: dict) -> str:
+TIME_RANGE_ALIASES = {"d": "day", "w": "week", "m": "month", "y": "year"}
+
+
+def format_tavily_error(error: Exception) -> str:
+    """Turn an exception raised by a Tavily call into an error message for the LLM.
+    
+    Args:
+        error (Exception): The exception
+        
+    Returns:
+        str: Error message
+    """
+    if isinstance(error, InvalidAPIKeyError):
+        return "Error: Invalid API key"
+
+    if isinstance(error, UsageLimitExceededError):
+        return "Error: Usage limit exceeded"
+
+    if isinstance(error, HTTPStatusError):
+        error_messages = {
+            401: "Invalid API key",
+            429: "Usage limit exceeded",
+        }
+        default_msg = f"API request failed with status {error.response.status_code}"
+        return f"Error: {error_messages.get(error.response.status_code, default_msg)}"
+
+    if isinstance(error, httpx.RequestError):
+        return f"Error: Network error - {str(error)}"
+
+    return f"Error: Unexpected error - {type(error).__name__}: {str(error)}"
+
+
+def is_retryable_tavily_error(error: BaseException) -> bool:
+    """Whether a failed Tavily call is worth retrying after a backoff.
+    
+    The client raises UsageLimitExceededError when the plan's quota is used up,
+    which retrying cannot fix; request pacing is left to the rate limiter.
+    
+    Args:
+        error (BaseException): The exception
+        
+    Returns:
+        bool: True for server errors and network failures
+    """
+    if isinstance(error, UsageLimitExceededError):
+        return False
+    return is_retryable_error(error)
+
+
+def tavily_search_cache_key(args: dict) -> str:
+    """Build the result cache key of a search from its arguments.
+    
+    The query is normalized, time range aliases are expanded and domain lists
+    are sorted, so equivalent searches share one entry. `days` only counts for news.
+    
+    Args:
+        args (dict): Arguments passed to AsyncTavilyClient.search
+        
+    Returns:
+        str: Cache key
+    """
+    params = dict(args)
+    params["query"] = normalize_query(params["query"])
+    params["time_range"] = TIME_RANGE_ALIASES.get(params.get("time_range"), params.get("time_range"))
+    params["include_domains"] = sorted(set(params.get("include_domains") or []))
+    params["exclude_domains"] = sorted(set(params.get("exclude_domains") or []))
+    if params.get("topic") != "news":
+        params.pop("days", None)
+    return make_cache_key(**params)
+
+
+def format_tavily_search_result(search_result: dict, max_tokens: int = TAVILY_MAX_CONTENT_TOKENS) -> str:
     """Format Tavily search results into a clear, structured text format optimized for LLM consumption.
     
+    Raw page content, when included, is truncated so all sources together stay within max_tokens.
+    
     Args:
         search_result (dict): Raw Tavily search result dictionary
+        max_tokens (int, optional): Token budget for raw content across all sources. Defaults to TAVILY_MAX_CONTENT_TOKENS
         
     Returns:
         str: Formatted search results as a structured string
@@ -95,7 +257,9 @@ def format_tavily_search_result(search_result: dict) -> str:
     
     # Add main search results
     formatted_parts.append("\nSearch Results:")
-    for idx, result in enumerate(search_result.get('results', []), 1):
+    results = search_result.get('results', [])
+    raw_contents = budget_raw_contents(results, max_tokens)
+    for idx, (result, raw_content) in enumerate(zip(results, raw_contents), 1):
         formatted_parts.extend([
             f"Title: \n{idx}. {result.get('title', 'No Title')}",
             f"URL: {result.get('url', 'No URL')}",
@@ -103,6 +267,8 @@ def format_tavily_search_result(search_result: dict) -> str:
             #f"Published Date: {result.get('published_date', 'N/A')}" if 'published_date' in result else "",
             f"Content: {result.get('content', 'No content available')}\n"
         ])
+        if raw_content:
+            formatted_parts.append(f"Raw Content:\n{raw_content}\n")
     
     # Add AI-generated answer if available
     if 'answer' in search_result and search_result['answer']:
@@ -125,6 +291,33 @@ def format_tavily_search_result(search_result: dict) -> str:
     
     return "\n".join(part for part in formatted_parts if part)
 
+@single_flight
+async def fetch_tavily_search(args: dict, timeout: int = 60) -> dict:
+    """Run one search through the result cache, sharing identical in-flight searches.
+    
+    Args:
+        args (dict): Arguments for AsyncTavilyClient.search
+        timeout (int, optional): Request timeout in seconds. Defaults to 60
+        
+    Returns:
+        dict: Raw Tavily search result
+    """
+    cache_key = tavily_search_cache_key(args)
+    cached = await tavily_search_cache.aget(cache_key)
+    if cached is not None:
+        return cached
+
+    # 添加timeout到客户端调用; 请求经过限流器，429 时退避重试
+    search_result = await call_with_backoff(
+        "tavily",
+        lambda: async_tavily_client.search(**args, timeout=timeout),
+        retryable=is_retryable_tavily_error,
+    )
+    result_dict = tavily_response_to_dict(search_result)
+    await tavily_search_cache.aset(cache_key, result_dict, TAVILY_SEARCH_CACHE_TTL.get(args.get("topic"), TAVILY_SEARCH_CACHE_TTL["general"]))
+    return result_dict
+
+
 @function_tool
 async def tavily_search(
     query: str, 
@@ -140,7 +333,8 @@ async def tavily_search(
     include_raw_content: bool = False,
     include_domains: Sequence[str] = None,
     exclude_domains: Sequence[str] = None,
-    timeout: int = 60
+    timeout: int = 60,
+    max_tokens: int = TAVILY_MAX_CONTENT_TOKENS
 ) -> str:
     """A powerful web search tool that provides comprehensive, real-time results using Tavily's AI search engine.
     
@@ -159,51 +353,222 @@ async def tavily_search(
         include_domains (Sequence[str], optional): List of domains to specifically include. Defaults to None
         exclude_domains (Sequence[str], optional): List of domains to specifically exclude. Defaults to None
         timeout (int, optional): Request timeout in seconds. Defaults to 60
+        max_tokens (int, optional): Approximate token budget for raw content, split across results. Defaults to 8000
 
     Returns:
         str: Formatted search results as string, or error message if the search fails
+        
+    Results are cached per normalized query and parameters, for 15 minutes
+    for news and finance and a day for general searches.
     """
-    # 处理可变默认参数（避免列表作为默认参数的陷阱）
-    include_domains = include_domains or []
-    exclude_domains = exclude_domains or []
-
-    # 自动捕获所有参数（排除特殊参数如timeout）
+    # 显式映射到 SDK 参数名（max_result -> max_results），并处理可变默认参数
     args = {
-        k: v for k, v in locals().items() 
-        if k not in ("timeout", "self", "__class__")  # 过滤不需要的参数
+        "query": query,
+        "time_range": time_range,
+        "search_depth": search_depth,
+        "topic": topic,
+        "days": days,
+        "max_results": max_result,
+        "chunks_per_source": chunks_per_source,
+        "include_images": include_images,
+        "include_image_descriptions": include_image_descriptions,
+        "include_answer": include_answer,
+        "include_raw_content": include_raw_content,
+        "include_domains": include_domains or [],
+        "exclude_domains": exclude_domains or [],
     }
 
     try:
-        # 添加timeout到客户端调用
-        search_result = await async_tavily_client.search(**args, timeout=timeout)
-        # Convert search result to dictionary if it's not already
-        result_dict = search_result if isinstance(search_result, dict) else eval(str(search_result))
-        return format_tavily_search_result(result_dict)
+        result_dict = await fetch_tavily_search(args, timeout)
+        return format_tavily_search_result(result_dict, max_tokens)
         #return result_dict
-    except HTTPStatusError as e:
-        error_messages = {
-            401: "Invalid API key",
-            429: "Usage limit exceeded",
-        }
-        default_msg = f"API request failed with status {e.response.status_code}"
-        return f"Error: {error_messages.get(e.response.status_code, default_msg)}"
-
-    except httpx.RequestError as e:
-        return f"Error: Network error - {str(e)}"
-
     except Exception as e:
-        return f"Error: Unexpected error - {type(e).__name__}: {str(e)}"
+        return format_tavily_error(e)
 
 ############# End of TAVILY SEARCH #############
 
 
+############# TAVILY MULTI SEARCH #############
+
+TAVILY_MULTI_SEARCH_MAX_QUERIES = 20
+TAVILY_MULTI_SEARCH_CONCURRENCY = 5
+
+
+def normalize_result_url(url: str) -> str:
+    """Reduce a result URL to a form that identifies the page across queries.
+    
+    Args:
+        url (str): Result URL
+        
+    Returns:
+        str: URL without fragment, trailing slash or scheme/host case differences
+    """
+    try:
+        parts = httpx.URL(url)
+    except httpx.InvalidURL:
+        return url
+    path = parts.path.rstrip("/") or "/"
+    query = f"?{parts.query.decode()}" if parts.query else ""
+    return f"{parts.host.lower()}{path}{query}"
+
+
+def merge_tavily_search_results(results_by_query: Dict[str, dict]) -> List[dict]:
+    """Merge the results of several searches, one entry per page.
+    
+    Pages are ranked by how many queries found them, then by their best score.
+    Each page keeps the title and content of its best-scoring hit.
+    
+    Args:
+        results_by_query (Dict[str, dict]): Raw Tavily search result per query
+        
+    Returns:
+        List[dict]: Merged results, best first, each with a 'queries' list
+    """
+    merged: Dict[str, dict] = {}
+    for query, search_result in results_by_query.items():
+        for result in search_result.get('results', []):
+            url = result.get('url')
+            if not url:
+                continue
+            key = normalize_result_url(url)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {**result, 'queries': [query]}
+                continue
+            if query not in entry['queries']:
+                entry['queries'].append(query)
+            if (result.get('score') or 0) > (entry.get('score') or 0):
+                entry.update({**result, 'queries': entry['queries']})
+
+    return sorted(merged.values(), key=lambda entry: (len(entry['queries']), entry.get('score') or 0), reverse=True)
+
+
+def format_tavily_multi_search_result(merged: List[dict], answers: Dict[str, str], errors: Dict[str, str], query_count: int) -> str:
+    """Format merged multi-query search results for LLM consumption.
+    
+    Args:
+        merged (List[dict]): Merged results from merge_tavily_search_results
+        answers (Dict[str, str]): AI-generated answer per query, if requested
+        errors (Dict[str, str]): Error message per failed query
+        query_count (int): Number of queries searched
+        
+    Returns:
+        str: Formatted search results as a structured string
+    """
+    formatted_parts = [f"\nSearch Results ({len(merged)} unique sources from {query_count} queries):"]
+    for idx, result in enumerate(merged, 1):
+        formatted_parts.extend([
+            f"Title: \n{idx}. {result.get('title', 'No Title')}",
+            f"URL: {result.get('url', 'No URL')}",
+            f"Found by: {'; '.join(result['queries'])}",
+            f"Content: {result.get('content', 'No content available')}\n"
+        ])
+
+    if answers:
+        formatted_parts.append("\nAI-Generated Answers:")
+        for query, answer in answers.items():
+            formatted_parts.extend([f"Q: {query}", f"A: {answer}\n"])
+
+    if errors:
+        formatted_parts.append("\nFailed Queries:")
+        for query, error in errors.items():
+            formatted_parts.append(f"- {query}: {error}")
+
+    return "\n".join(part for part in formatted_parts if part)
+
+
+@function_tool
+async def tavily_multi_search(
+    queries: List[str],
+    time_range: Literal["day", "d", "week", "w", "month","m", "year", "y"]=None,
+    search_depth: Literal["basic", "advanced"] = "basic",
+    topic: Literal["general", "news", "finance"] = "general",
+    days: int = 7,
+    max_result: int = 5,
+    include_answer: Union[bool, Literal["basic", "advanced"]] = False,
+    include_domains: Sequence[str] = None,
+    exclude_domains: Sequence[str] = None,
+    timeout: int = 60
+) -> str:
+    """Run several web searches at once and merge them into one ranked, deduplicated result.
+    
+    Use it instead of repeated tavily_search calls when a question needs several angles.
+    Pages found by more than one query are listed once, ranked higher.
+    
+    Args:
+        queries (List[str]): Search queries, at most 20
+        time_range (Literal["day", "d", "week", "w", "month","m", "year", "y"], optional): Time range for search results
+        search_depth (Literal["basic", "advanced"], optional): Depth of search - 'basic' or 'advanced'. Defaults to "basic"
+        topic (Literal["general", "news", "finance"], optional): Category of search determining which agents to use. Defaults to "general"
+        days (int, optional): Number of days back to include in results (only for 'news' topic). Defaults to 7
+        max_result (int, optional): Maximum number of search results per query. Defaults to 5
+        include_answer (Union[bool, Literal["basic", "advanced"]], optional): Include an AI-generated answer per query. Defaults to False
+        include_domains (Sequence[str], optional): List of domains to specifically include. Defaults to None
+        exclude_domains (Sequence[str], optional): List of domains to specifically exclude. Defaults to None
+        timeout (int, optional): Request timeout in seconds. Defaults to 60
+
+    Returns:
+        str: Merged search results as string, with failed queries listed separately
+    """
+    # Identical queries are searched once
+    unique_queries = list(dict.fromkeys(query.strip() for query in queries if query and query.strip()))
+    if not unique_queries:
+        return "Error: No queries given"
+    if len(unique_queries) > TAVILY_MULTI_SEARCH_MAX_QUERIES:
+        return f"Error: At most {TAVILY_MULTI_SEARCH_MAX_QUERIES} queries per call, got {len(unique_queries)}"
+
+    base_args = {
+        "time_range": time_range,
+        "search_depth": search_depth,
+        "topic": topic,
+        "days": days,
+        "max_results": max_result,
+        "chunks_per_source": 1,
+        "include_images": False,
+        "include_image_descriptions": False,
+        "include_answer": include_answer,
+        "include_raw_content": False,
+        "include_domains": include_domains or [],
+        "exclude_domains": exclude_domains or [],
+    }
+    semaphore = asyncio.Semaphore(TAVILY_MULTI_SEARCH_CONCURRENCY)
+
+    async def search_one(query: str) -> dict:
+        async with semaphore:
+            return await fetch_tavily_search({"query": query, **base_args}, timeout)
+
+    outcomes = await asyncio.gather(*(search_one(query) for query in unique_queries), return_exceptions=True)
+
+    results_by_query: Dict[str, dict] = {}
+    answers: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    for query, outcome in zip(unique_queries, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, Exception):
+                raise outcome
+            errors[query] = format_tavily_error(outcome)
+            continue
+        results_by_query[query] = outcome
+        if outcome.get('answer'):
+            answers[query] = outcome['answer']
+
+    merged = merge_tavily_search_results(results_by_query)
+    return format_tavily_multi_search_result(merged, answers, errors, len(unique_queries))
+
+############# End of TAVILY MULTI SEARCH #############
+
+
 ############# TAVILY EXTRACT #############
 
-def format_tavily_extract_result(extract_result: dict) -> str:
+def format_tavily_extract_result(extract_result: dict, max_tokens: int = TAVILY_MAX_CONTENT_TOKENS) -> str:
     """Format Tavily extract results into a clear, structured text format optimized for LLM consumption.
     
+    Each page's raw content is truncated to its share of max_tokens, so a few
+    huge pages cannot crowd out the rest or flood the context.
+    
     Args:
         extract_result (dict): Raw Tavily extract result dictionary
+        max_tokens (int, optional): Token budget for page content across all URLs. Defaults to TAVILY_MAX_CONTENT_TOKENS
         
     Returns:
         str: Formatted extraction results as a structured string
@@ -216,11 +581,12 @@ def format_tavily_extract_result(extract_result: dict) -> str:
     # Add successful extractions
     if 'results' in extract_result and extract_result['results']:
         formatted_parts.append("Successfully Extracted Content:")
-        for idx, result in enumerate(extract_result['results'], 1):
+        raw_contents = budget_raw_contents(extract_result['results'], max_tokens)
+        for idx, (result, raw_content) in enumerate(zip(extract_result['results'], raw_contents), 1):
             formatted_parts.extend([
                 f"\n{idx}. URL: {result.get('url', 'No URL')}",
                 f"Content:",
-                f"{result.get('raw_content', 'No content available')}"
+                f"{raw_content or 'No content available'}"
             ])
             
             # Add images if available
@@ -241,49 +607,221 @@ def format_tavily_extract_result(extract_result: dict) -> str:
     
     return "\n".join(formatted_parts)
 
+TAVILY_EXTRACT_CHUNK_SIZE = 5
+TAVILY_EXTRACT_CONCURRENCY = 4
+
+
+def tavily_extract_url_key(url: str, extract_depth: str, include_images: bool) -> str:
+    """Build the cache key of one extracted page.
+    
+    Args:
+        url (str): Page URL
+        extract_depth (str): Extraction depth the page was fetched with
+        include_images (bool): Whether images were extracted
+        
+    Returns:
+        str: Cache key
+    """
+    return make_cache_key(url=url, extract_depth=extract_depth, include_images=include_images)
+
+
+async def get_cached_page(url: str, extract_depth: str, include_images: bool) -> Optional[dict]:
+    """Look up an extracted page in the per-URL cache.
+    
+    Args:
+        url (str): Page URL
+        extract_depth (str): Extraction depth
+        include_images (bool): Whether images are wanted
+        
+    Returns:
+        Optional[dict]: The page as a Tavily extract result, or None if it is not cached
+    """
+    entry = await tavily_extract_url_cache.aget(tavily_extract_url_key(url, extract_depth, include_images))
+    if entry is None:
+        return None
+    raw_content = await tavily_extract_content_cache.aget(entry["content_hash"])
+    if raw_content is None:
+        return None
+    return {"url": url, "raw_content": raw_content, "images": entry.get("images") or [], "content_hash": entry["content_hash"]}
+
+
+async def cache_page(url: str, page: dict, extract_depth: str, include_images: bool) -> dict:
+    """Store an extracted page, its text once per distinct content.
+    
+    Args:
+        url (str): Requested URL the page is cached under
+        page (dict): One result of a Tavily extract call
+        extract_depth (str): Extraction depth
+        include_images (bool): Whether images were extracted
+        
+    Returns:
+        dict: The page under the requested URL, with its content_hash added
+    """
+    raw_content = page.get("raw_content") or ""
+    content_hash = hashlib.sha256(raw_content.encode("utf-8")).hexdigest()
+    await tavily_extract_content_cache.aset(content_hash, raw_content, TAVILY_EXTRACT_CACHE_TTL)
+    await tavily_extract_url_cache.aset(
+        tavily_extract_url_key(url, extract_depth, include_images),
+        {"content_hash": content_hash, "images": page.get("images") or []},
+        TAVILY_EXTRACT_CACHE_TTL,
+    )
+    # 与缓存命中时一致，按请求的 URL 展示页面
+    return {**page, "url": url, "content_hash": content_hash}
+
+
+def match_extracted_urls(requested: List[str], returned: List[str]) -> List[Optional[str]]:
+    """Map the URLs an extract call returned back to the requested URLs.
+    
+    Tavily may report a page under a normalized or redirected URL. Exact and
+    normalized matches (see normalize_result_url) are paired first; returned
+    URLs still unmatched are paired in order with the requested URLs left over.
+    
+    Args:
+        requested (List[str]): URLs sent to the extract call
+        returned (List[str]): URLs of the results and failed results, in that order
+        
+    Returns:
+        List[Optional[str]]: Requested URL of each returned URL, None where nothing is left to pair
+    """
+    matches: List[Optional[str]] = [None] * len(returned)
+    unclaimed = list(requested)
+    leftovers = []
+    for index, url in enumerate(returned):
+        key = normalize_result_url(url)
+        match = url if url in unclaimed else next((candidate for candidate in unclaimed if normalize_result_url(candidate) == key), None)
+        if match is None:
+            leftovers.append(index)
+            continue
+        unclaimed.remove(match)
+        matches[index] = match
+    # 重定向后的 URL 无法按字符串匹配，按顺序与剩余的请求 URL 配对
+    for index, match in zip(leftovers, unclaimed):
+        matches[index] = match
+    return matches
+
+
+async def extract_chunk(urls: List[str], extract_depth: str, include_images: bool, timeout: int) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """Extract one chunk of URLs and cache every page that succeeded.
+    
+    Args:
+        urls (List[str]): URLs of the chunk
+        extract_depth (str): Extraction depth
+        include_images (bool): Whether to extract images
+        timeout (int): Request timeout in seconds
+        
+    Returns:
+        Tuple[Dict[str, dict], Dict[str, str]]: Pages (carrying their content_hash) and
+            errors, both keyed by requested URL. URLs in neither got no answer.
+    """
+    extract_result = await call_with_backoff(
+        "tavily",
+        lambda: async_tavily_client.extract(
+            urls=urls,
+            extract_depth=extract_depth,
+            include_images=include_images,
+            timeout=timeout
+        ),
+        retryable=is_retryable_tavily_error,
+    )
+    result_dict = tavily_response_to_dict(extract_result)
+    results = [page for page in result_dict.get("results", []) if page.get("url")]
+    failed_results = result_dict.get("failed_results", [])
+    matches = match_extracted_urls(urls, [page["url"] for page in results] + [failed.get("url", "") for failed in failed_results])
+
+    pages: Dict[str, dict] = {}
+    for page, url in zip(results, matches):
+        if url is not None:
+            pages[url] = await cache_page(url, page, extract_depth, include_images)
+    failures = {
+        url: failed.get("error", "Unknown error")
+        for failed, url in zip(failed_results, matches[len(results):])
+        if url is not None and url not in pages
+    }
+    return pages, failures
+
+
 @function_tool
+@single_flight
 async def tavily_extract(
     urls: List[str],
     extract_depth: Literal["basic", "advanced"] = "basic",
     include_images: bool = False,
-    timeout: int = 60
+    timeout: int = 60,
+    max_tokens: int = TAVILY_MAX_CONTENT_TOKENS
 ) -> str:
     """A powerful web content extraction tool that retrieves and processes raw content from specified URLs.
     
+    URLs are extracted in concurrent chunks, so one slow page does not hold up
+    the others, and pages extracted earlier are served from cache. Whatever is
+    ready when the timeout expires is returned; the rest is listed as failed.
+    
     Args:
         urls (List[str]): List of URLs to extract content from
         extract_depth (Literal["basic", "advanced"], optional): Depth of extraction - 'basic' or 'advanced'. 
             Use 'advanced' for LinkedIn URLs or when explicitly specified. Defaults to "basic"
         include_images (bool, optional): Include extracted images in response. Defaults to False
         timeout (int, optional): Request timeout in seconds. Defaults to 60
+        max_tokens (int, optional): Approximate token budget for page content, split across URLs. Defaults to 8000
 
     Returns:
-        str: Formatted extraction results as string, or error message if the extraction fails
+        str: Formatted extraction results as string, with failed URLs listed separately
     """
-    try:
-        extract_result = await async_tavily_client.extract(
-            urls=urls,
-            extract_depth=extract_depth,
-            include_images=include_images,
-            timeout=timeout
-        )
-        # Convert extract result to dictionary if it's not already
-        result_dict = extract_result if isinstance(extract_result, dict) else eval(str(extract_result))
-        return format_tavily_extract_result(result_dict)
-        #return result_dict
-    except HTTPStatusError as e:
-        error_messages = {
-            401: "Invalid API key",
-            429: "Usage limit exceeded",
-        }
-        default_msg = f"API request failed with status {e.response.status_code}"
-        return f"Error: {error_messages.get(e.response.status_code, default_msg)}"
-
-    except httpx.RequestError as e:
-        return f"Error: Network error - {str(e)}"
-
-    except Exception as e:
-        return f"Error: Unexpected error - {type(e).__name__}: {str(e)}"
+    requested = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+    if not requested:
+        return "Error: No URLs given"
+
+    pages: Dict[str, dict] = {}
+    failures: Dict[str, str] = {}
+    missing = []
+    for url in requested:
+        cached = await get_cached_page(url, extract_depth, include_images)
+        if cached is not None:
+            pages[url] = cached
+        else:
+            missing.append(url)
+
+    semaphore = asyncio.Semaphore(TAVILY_EXTRACT_CONCURRENCY)
+
+    async def run_chunk(chunk: List[str]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        async with semaphore:
+            return await extract_chunk(chunk, extract_depth, include_images, timeout)
+
+    chunks = [missing[i:i + TAVILY_EXTRACT_CHUNK_SIZE] for i in range(0, len(missing), TAVILY_EXTRACT_CHUNK_SIZE)]
+    tasks = {asyncio.ensure_future(run_chunk(chunk)): chunk for chunk in chunks}
+    done, pending = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+
+    for task in pending:
+        task.cancel()
+        for url in tasks[task]:
+            failures[url] = f"Timed out after {timeout} seconds"
+    for task in done:
+        chunk = tasks[task]
+        if task.exception() is not None:
+            error = format_tavily_error(task.exception()).removeprefix("Error: ")
+            for url in chunk:
+                failures[url] = error
+            continue
+        chunk_pages, chunk_failures = task.result()
+        pages.update(chunk_pages)
+        failures.update(chunk_failures)
+        for url in chunk:
+            if url not in pages and url not in failures:
+                failures[url] = "No content returned"
+
+    # Pages with identical content (mirrors, redirects) are shown once
+    results = []
+    first_url_by_hash: Dict[str, str] = {}
+    for url in [url for url in requested if url in pages]:
+        page = pages[url]
+        first_url = first_url_by_hash.setdefault(page["content_hash"], url)
+        if first_url != url:
+            page = {**page, "raw_content": f"[Same content as {first_url}]"}
+        results.append(page)
+
+    return format_tavily_extract_result(
+        {"results": results, "failed_results": [{"url": url, "error": error} for url, error in failures.items()]},
+        max_tokens,
+    )
     
 ############# END of TAVILY EXTRACT #############
 
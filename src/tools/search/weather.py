@@ -6,6 +6,7 @@ A module providing weather tools.
 TOOLS_AVAILABLE:
 1. prompt_with_get_weather_instructions: Add weather query tool instructions to prompt
 2. get_weather: Weather information retrieval tool using OpenWeather API
+3. get_weather_batch: Weather of several locations in one call
 """
 
 from agents import function_tool
@@ -13,12 +14,16 @@ from agents import function_tool
 import httpx
 from httpx import HTTPStatusError
 
-import requests
-
-from typing import Dict
+from typing import Dict, List
 
 from dotenv import find_dotenv, load_dotenv
 import os
+import asyncio
+
+from src.tools.search.cache import ResultCache, make_cache_key, normalize_query
+from src.tools.search.singleflight import single_flight
+from src.tools.search.ratelimit import call_with_backoff
+from src.tools.search.httpclient import get_http_client
 
 ############# INITIALIZE #############
 
@@ -26,6 +31,16 @@ _ = load_dotenv(find_dotenv())
 
 openweather_api_key = os.getenv("OPENWEATHER_API_KEY")
 
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+# OpenWeather refreshes current conditions about every 10 minutes
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", 10 * 60))
+WEATHER_BATCH_MAX_LOCATIONS = 20
+
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+weather_cache = ResultCache("openweather")
+
 
 ############# End of INITIALIZE #############
 
@@ -35,6 +50,7 @@ openweather_api_key = os.getenv("OPENWEATHER_API_KEY")
 GET_WEATHER_TOOLS_PROMPT = """ 
 你可以使用如下工具获得天气信息：
 `get_weather` 输入英文城市名称，获得该城市的天气信息。
+`get_weather_batch` 需要多个城市的天气时（如旅行规划），一次调用传入所有英文城市名称。
 注意：
 1. 请确保搜索查询简洁明确，并选择适当的参数以获得最相关的结果。
 2. 根据用户的提问的语言，推测用户的使用的温度单位。比如中文用户，使用摄氏度。
@@ -107,6 +123,68 @@ def format_weather_data(weather_data: Dict) -> str:
     except KeyError as e:
         return f"Data parsing error: Missing key field {e}"
 
+@single_flight
+async def fetch_weather(loc: str, unit: str = "metric", lang: str = "en") -> Dict:
+    """Get the raw current weather of a location, served from cache while fresh.
+    
+    Args:
+        loc: str, the location of the weather
+        unit: str, the unit of the weather
+        lang: str, the language of the weather
+        
+    Returns:
+        Dict, raw json dict from openweather api
+        
+    Raises:
+        httpx.HTTPError: If the request fails
+    """
+    cache_key = make_cache_key(loc=normalize_query(loc), unit=unit, lang=lang)
+    cached = await weather_cache.aget(cache_key)
+    if cached is not None:
+        return cached
+
+    params = {
+        "q": loc,
+        "appid": openweather_api_key,
+        "units": unit,
+        "lang": lang
+    }
+
+    async def request() -> Dict:
+        http_client = await get_http_client("openweather", HTTP_TIMEOUT, HTTP_LIMITS)
+        response = await http_client.get(OPENWEATHER_URL, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    weather_data = await call_with_backoff("openweather", request)
+    await weather_cache.aset(cache_key, weather_data, WEATHER_CACHE_TTL)
+    return weather_data
+
+
+async def get_weather_text(loc: str, unit: str = "metric", lang: str = "en") -> str:
+    """Get the formatted weather of a location, turning failures into an error message.
+    
+    Args:
+        loc: str, the location of the weather
+        unit: str, the unit of the weather
+        lang: str, the language of the weather
+        
+    Returns:
+        str, the weather of the location
+    """
+    try:
+        return format_weather_data(await fetch_weather(loc, unit, lang))
+    except HTTPStatusError as e:
+        # the request url carries the api key, so report the api message instead of str(e)
+        try:
+            message = e.response.json().get('message', e.response.reason_phrase)
+        except ValueError:
+            message = e.response.reason_phrase
+        return format_weather_data(f"Get weather data of {loc} failed: HTTP {e.response.status_code} {message}")
+    except httpx.HTTPError as e:
+        return format_weather_data(f"Get weather data of {loc} failed: {type(e).__name__} {e}")
+
+
 @function_tool
 async def get_weather(loc: str, unit="metric", lang="en") -> str: 
     """Get Weather information from given location via OpenWeather API
@@ -117,21 +195,26 @@ async def get_weather(loc: str, unit="metric", lang="en") -> str:
     Returns:
         str, the weather of the location
     """
-    api_key = openweather_api_key
-    base_url = "http://api.openweathermap.org/data/2.5/weather"
-    try:
-        params = {
-            "q": loc,
-            "appid": api_key,
-            "units": unit,
-            "lang": lang
-        }
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        weather_data = response.json()
-        return format_weather_data(weather_data)
-    
-    except requests.exceptions.RequestException as e:
-        return format_weather_data(f"Get weather data of {loc} failed: {e}")
+    return await get_weather_text(loc, unit, lang)
+
+
+@function_tool
+async def get_weather_batch(locs: List[str], unit: str = "metric", lang: str = "en") -> str:
+    """Get Weather information for several locations at once via OpenWeather API, e.g. for a trip
+    Args:
+        locs: List[str], the locations of the weather, at most 20
+        unit: str, the unit of the weather, default is metric
+        lang: str, the language of the weather, default is en
+    Returns:
+        str, the weather of each location, separated by blank lines
+    """
+    unique_locs = list(dict.fromkeys(loc.strip() for loc in locs if loc and loc.strip()))
+    if not unique_locs:
+        return "Error: No locations given"
+    if len(unique_locs) > WEATHER_BATCH_MAX_LOCATIONS:
+        return f"Error: At most {WEATHER_BATCH_MAX_LOCATIONS} locations per call, got {len(unique_locs)}"
+
+    reports = await asyncio.gather(*(get_weather_text(loc, unit, lang) for loc in unique_locs))
+    return "\n\n".join(f"[{loc}]\n{report}" for loc, report in zip(unique_locs, reports))
 
 ############# End of GET WEATHER #############
\ No newline at end of file
@@ -1,11 +1,21 @@
-from wolframalpha import Client 
+from wolframalpha import Client, Document
 
 from agents import function_tool
 
-from typing import Literal 
+from typing import List, Literal, Optional
 
 from dotenv import load_dotenv, find_dotenv
 import os 
+import re
+import asyncio
+
+import httpx
+import xmltodict
+
+from src.tools.search.cache import ResultCache, make_cache_key, normalize_query
+from src.tools.search.singleflight import single_flight
+from src.tools.search.ratelimit import call_with_backoff
+from src.tools.search.httpclient import get_http_client
 
 _ = load_dotenv(find_dotenv()) # read local.env file 
 
@@ -14,6 +24,34 @@ appid = os.getenv("WOLFRAM_ALPHA_APPID")
 
 client = Client(appid)
 
+# 只格式化前几个 pod，请求时就只让引擎计算这些 pod
+WOLFRAME_MAX_PODS = 5
+
+# 数学计算、物理常数等确定性查询的结果长期缓存（SEARCH_CACHE_DB 设置时持久化到磁盘），其他查询短期缓存
+WOLFRAME_STATIC_CACHE_TTL = int(os.getenv("WOLFRAME_STATIC_CACHE_TTL", 30 * 24 * 3600))
+WOLFRAME_CACHE_TTL = int(os.getenv("WOLFRAME_CACHE_TTL", 600))
+
+wolframe_cache = ResultCache("wolfram")
+
+# 所有查询共用连接池（每个事件循环一个客户端），不再每次查询都重新建立连接
+HTTP_TIMEOUT = httpx.Timeout(client.timeout)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+# 含时效性词语的查询结果会随时间变化
+VOLATILE_QUERY_PATTERN = re.compile(
+    r"\b(now|today|tonight|tomorrow|yesterday|current|currently|latest|recent|live|next|last|this (?:week|month|year)"
+    r"|weather|forecast|price|prices|stock|stocks|exchange rate|time in|population|gdp|news)\b",
+    re.IGNORECASE,
+)
+DETERMINISTIC_QUERY_PATTERN = re.compile(
+    r"\d\s*[-+*/^=<>!%]\s*[\d(a-z]"
+    r"|\d\s*[a-z°]+\s+(?:to|in|into)\s+[a-z°]+"
+    r"|\b(integrate|integral|derivative|differentiate|solve|simplify|factor|expand|limit|sum|series|matrix"
+    r"|determinant|eigenvalues?|prime|gcd|lcm|sqrt|log|ln|sin|cos|tan|convert|constant|boiling point|melting point"
+    r"|atomic (?:mass|number|weight)|molar mass|speed of light|planck|avogadro|boltzmann|gravitational)\b",
+    re.IGNORECASE,
+)
+
 
 WOLFRAME_TOOLS_PROMPT = """ 
 Wolfram Alpha 是一个强大的计算知识引擎，能够提供精确的数值计算、事实性数据和专业领域知识。通过 wolframe_query 函数，你可以访问这个引擎的能力，增强你的回答准确性和权威性
@@ -90,11 +128,10 @@ def format_wolframe_response(res, error=None):
         return f"对于查询 {input_str}, Wolfram Alpha 未返回任何结果。"
     
     result = []
-    max_numpods = 5
     
     # 限制处理的 pod 数量并跳过错误的 pod
     for index, pod in enumerate(res.pods):
-        if index >= max_numpods:
+        if index >= WOLFRAME_MAX_PODS:
             break
             
         # 安全地获取 pod 的 error 属性
@@ -140,8 +177,94 @@ def format_wolframe_response(res, error=None):
     
     return "\n".join(result)
 
+
+def is_deterministic_query(query: str) -> bool:
+    """
+    判断查询结果是否不随时间变化（数学计算、物理常数、单位换算等），可以长期缓存。
+    
+    参数:
+        query: 查询语句
+        
+    返回:
+        True 表示结果可长期缓存
+    """
+    return not VOLATILE_QUERY_PATTERN.search(query) and bool(DETERMINISTIC_QUERY_PATTERN.search(query))
+
+
+def parse_wolframe_xml(content: bytes):
+    """
+    解析 Wolfram Alpha 返回的 XML，与 Client.aquery 的解析方式一致。
+    
+    参数:
+        content: 响应体
+        
+    返回:
+        queryresult 对象
+    """
+    doc = xmltodict.parse(content, postprocessor=Document.make)
+    if 'error' in doc:
+        error = doc['error']
+        raise ValueError(f"Error {error['@status']}: {error['@message']}")
+    return doc['queryresult']
+
+
+async def fetch_wolframe_result(query: str, pod_ids: Optional[List[str]] = None):
+    """
+    请求 Wolfram Alpha 并在线程中解析 XML，避免阻塞事件循环。
+    
+    只请求纯文本格式，不让引擎生成随后会被丢弃的图片；指定 pod_ids 时只计算这些 pod，
+    否则只计算前 WOLFRAME_MAX_PODS 个 pod。
+    
+    参数:
+        query: 要查询的问题
+        pod_ids: 只返回这些 id 的 pod，例如 ["Result", "DecimalApproximation"]
+        
+    返回:
+        queryresult 对象
+    """
+    params = [('appid', client.app_id), ('input', query), ('format', 'plaintext')]
+    if pod_ids:
+        params.extend(('includepodid', pod_id) for pod_id in pod_ids)
+    else:
+        params.append(('podindex', ','.join(str(index) for index in range(1, WOLFRAME_MAX_PODS + 1))))
+
+    http_client = await get_http_client("wolfram", HTTP_TIMEOUT, HTTP_LIMITS)
+    response = await http_client.get(client.url, params=params)
+    response.raise_for_status()
+    return await asyncio.to_thread(parse_wolframe_xml, response.content)
+
+
+@single_flight
+async def cached_wolframe_query(query: str, pod_ids: Optional[List[str]] = None, retries: int = 3) -> str:
+    """
+    执行查询并格式化结果，确定性查询长期缓存，其他查询短期缓存。
+    
+    参数:
+        query: 要查询的问题
+        pod_ids: 只返回这些 id 的 pod
+        retries: 重试次数
+        
+    返回:
+        格式化后的查询结果字符串
+    """
+    pod_ids = sorted(set(pod_ids)) if pod_ids else None
+    cache_key = make_cache_key(query=normalize_query(query), pod_ids=pod_ids)
+    cached = await wolframe_cache.aget(cache_key)
+    if cached is not None:
+        return cached
+
+    # 请求经过 wolfram 限流器排队，网络错误、429 和 5xx 按带抖动的指数退避重试
+    res = await call_with_backoff("wolfram", lambda: fetch_wolframe_result(query, pod_ids), retries=max(retries - 1, 0))
+    formatted = format_wolframe_response(res)
+    # 只缓存有结果的响应；res.pods 是迭代器，总为真值，因此看 numpods
+    if int(getattr(res, 'numpods', 0) or 0) > 0:
+        ttl = WOLFRAME_STATIC_CACHE_TTL if is_deterministic_query(query) else WOLFRAME_CACHE_TTL
+        await wolframe_cache.aset(cache_key, formatted, ttl)
+    return formatted
+
+
 @function_tool
-def wolframe_query(query: str, retries: int = 3) -> str: 
+async def wolframe_query(query: str, pod_ids: Optional[List[str]] = None, retries: int = 3) -> str: 
     """
     执行 Wolfram Alpha 查询并返回格式化的结果。
     
@@ -174,25 +297,16 @@ def wolframe_query(query: str, retries: int = 3) -> str:
     
     参数:
         query: 要查询的问题
+        pod_ids: 可选，只返回这些 id 的 pod 以加快查询，例如 ["Result"]、["DecimalApproximation"]；默认返回前 5 个 pod
         retries: 重试次数，默认为3
         
     返回:
         格式化后的查询结果字符串
     """
-    attempt = 0
-    last_error = None
-    
-    while attempt < retries:
-        try:
-            res = client.query(query)
-            return format_wolframe_response(res)
-        except Exception as e:
-            last_error = str(e)
-            attempt += 1
-            if attempt >= retries:
-                break
-    
-    return format_wolframe_response(None, error=last_error)
+    try:
+        return await cached_wolframe_query(query, pod_ids, retries)
+    except Exception as e:
+        return format_wolframe_response(None, error=str(e))
         
 
                 
@@ -0,0 +1,39 @@
+"""
+CyanoManus Output Budgets
+A module of helpers that keep tool results within a size budget.
+
+HELPERS_AVAILABLE:
+1. CHARS_PER_TOKEN: Rough size of a token in characters
+2. allocate_budget: Split a budget fairly across items (max-min fairness)
+"""
+
+from typing import List
+
+# Rough size of a token in characters, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def allocate_budget(sizes: List[int], budget: int) -> List[int]:
+    """
+    Split a budget fairly across items (max-min fairness).
+
+    Small items are kept whole, and whatever they leave unused is shared
+    evenly among the larger ones.
+
+    Args:
+        sizes: Size of each item, in the unit of the budget (bytes, tokens, ...)
+        budget: Total amount that may be used
+
+    Returns:
+        Allowance of each item, in the order of sizes
+    """
+    allowances = [0] * len(sizes)
+    remaining = budget
+
+    order = sorted(range(len(sizes)), key=sizes.__getitem__)
+    for rank, i in enumerate(order):
+        share = remaining // (len(sizes) - rank)
+        allowances[i] = min(sizes[i], share)
+        remaining -= allowances[i]
+
+    return allowances
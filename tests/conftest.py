@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+import pytest
+from agents.tool_context import ToolContext
+
+from src.tools.file_management import file_sys
+
+
+@pytest.fixture
+def allowed_dir(tmp_path):
+    """Restrict the file tools to a fresh temporary directory."""
+    file_sys.set_allowed_directories([str(tmp_path)])
+    yield tmp_path
+    file_sys.set_allowed_directories([])
+
+
+@pytest.fixture
+def tool():
+    """Look up the undecorated function of a file tool by name."""
+    return file_sys._file_tool_functions.__getitem__
+
+
+@pytest.fixture
+def invoke_tool():
+    """Call a FunctionTool the way an agent run does, with JSON arguments."""
+    def invoke(function_tool, **kwargs):
+        arguments = json.dumps(kwargs)
+        context = ToolContext(None, tool_name=function_tool.name, tool_call_id="test", tool_arguments=arguments)
+        return asyncio.run(function_tool.on_invoke_tool(context, arguments))
+    return invoke
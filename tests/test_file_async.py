@@ -0,0 +1,43 @@
+import asyncio
+import contextvars
+import threading
+
+from src.tools.file_management import file_sys
+
+
+############# ASYNC FILE TOOLS #############
+def test_every_file_tool_has_an_async_variant():
+    for name in file_sys._file_tool_functions:
+        sync_tool = getattr(file_sys, name)
+        async_tool = getattr(file_sys, f"{name}_async")
+        assert async_tool.name == f"{name}_async"
+        # Same parameters; only the schema title carries the tool name
+        assert async_tool.params_json_schema["properties"] == sync_tool.params_json_schema["properties"]
+        assert async_tool.strict_json_schema == sync_tool.strict_json_schema
+
+
+def test_run_file_io_uses_the_io_pool_and_keeps_context():
+    request_id = contextvars.ContextVar("request_id")
+    
+    def blocking():
+        return threading.current_thread().name, request_id.get()
+    
+    async def main():
+        request_id.set("r1")
+        return await file_sys.run_file_io(blocking)
+    
+    thread_name, value = asyncio.run(main())
+    assert thread_name.startswith("file-io") and value == "r1"
+
+
+def test_run_file_io_runs_tools_concurrently(tool, allowed_dir):
+    for n in range(8):
+        (allowed_dir / f"{n}.txt").write_text(f"file {n}")
+    read_file = tool("read_file")
+    
+    async def main():
+        return await asyncio.gather(*(file_sys.run_file_io(read_file, str(allowed_dir / f"{n}.txt")) for n in range(8)))
+    
+    assert asyncio.run(main()) == [f"file {n}" for n in range(8)]
+
+############# End of ASYNC FILE TOOLS #############
@@ -0,0 +1,161 @@
+import random
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+def apply(content, edits):
+    spans = file_sys.locate_edits(content, edits)
+    if spans is None:
+        return file_sys.apply_edits_sequentially(content, edits)
+    return file_sys.splice_edits(content, spans)
+
+
+############# LOCATE AND SPLICE EDITS #############
+def test_splice_matches_sequential_application():
+    rng = random.Random(1)
+    vocab = ["a", "b", "c", "  a", "d  ", "x = 1", "    x = 1", ""]
+    for _ in range(3000):
+        lines = [rng.choice(vocab) for _ in range(rng.randint(1, 12))]
+        content = "\n".join(lines)
+        edits = []
+        for _ in range(rng.randint(1, 3)):
+            k = rng.randint(1, 3)
+            if rng.random() < 0.5 and len(lines) >= k:
+                i = rng.randint(0, len(lines) - k)
+                old = "\n".join(line.strip() if rng.random() < 0.5 else line for line in lines[i:i + k])
+            else:
+                old = "\n".join(rng.choice(vocab) for _ in range(k))
+            new = "\n".join(rng.choice(vocab + ["NEW", "b\nc"]) for _ in range(rng.randint(0, 2)))
+            edits.append({"oldText": old, "newText": new})
+        try:
+            expected = file_sys.apply_edits_sequentially(content, edits)
+        except ValueError:
+            expected = ValueError
+        try:
+            result = apply(content, edits)
+        except ValueError:
+            result = ValueError
+        assert result == expected, (content, edits)
+
+
+def test_independent_edits_are_spliced():
+    content = "".join(f"line {n}\n" for n in range(20_000))
+    edits = [{"oldText": f"line {n}\n", "newText": f"LINE {n}\n"} for n in range(10, 20_000, 100)]
+    spans = file_sys.locate_edits(content, edits)
+    assert spans is not None and len(spans) == len(edits)
+    assert file_sys.splice_edits(content, spans) == file_sys.apply_edits_sequentially(content, edits)
+
+
+def test_dependent_edits_fall_back_to_sequential():
+    content = "alpha\nbeta\n"
+    edits = [{"oldText": "alpha", "newText": "gamma"}, {"oldText": "gamma\nbeta", "newText": "delta"}]
+    assert file_sys.locate_edits(content, edits) is None
+    assert apply(content, edits) == "delta\n"
+
+
+def test_overlapping_edits_fall_back_to_sequential():
+    content = "one two three"
+    edits = [{"oldText": "one two", "newText": "1 2"}, {"oldText": "two three", "newText": "2 3"}]
+    assert file_sys.locate_edits(content, edits) is None
+    with pytest.raises(ValueError):
+        apply(content, edits)
+
+
+def test_whitespace_insensitive_match_keeps_indentation():
+    content = "def f():\n    return 1\n"
+    edits = [{"oldText": "return 1 ", "newText": "return 2"}]
+    assert apply(content, edits) == "def f():\n    return 2\n"
+
+
+def test_span_cap_falls_back_to_sequential(monkeypatch):
+    monkeypatch.setattr(file_sys, "LOCATE_EDITS_MAX_SPANS", 3)
+    content = "x\n" * 10
+    edits = [{"oldText": "x", "newText": "y"}]
+    assert file_sys.locate_edits(content, edits) is None
+    assert apply(content, edits) == "y\n" * 10
+
+
+def test_new_text_may_feed():
+    assert not file_sys.new_text_may_feed("123", "abc")
+    assert file_sys.new_text_may_feed("xa", "abc")
+    assert file_sys.new_text_may_feed("  ", "abc")
+    assert file_sys.new_text_may_feed("", "abc")
+
+
+def test_edit_file_tool(tool, allowed_dir):
+    path = allowed_dir / "code.py"
+    path.write_text("a = 1\nb = 2\n")
+    edit_file = tool("edit_file")
+    
+    preview = edit_file(str(path), [{"oldText": "b = 2", "newText": "b = 3"}], dry_run=True)
+    assert "-b = 2\n+b = 3" in preview
+    assert path.read_text() == "a = 1\nb = 2\n"
+    
+    edit_file(str(path), [{"oldText": "b = 2", "newText": "b = 3"}])
+    assert path.read_text() == "a = 1\nb = 3\n"
+    with pytest.raises(ValueError):
+        edit_file(str(path), [{"oldText": "missing", "newText": ""}])
+
+############# End of LOCATE AND SPLICE EDITS #############
+
+
+############# EDIT DIFF #############
+def apply_opcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def test_patience_opcodes_rebuild_the_new_lines():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [rng.choice("abcdefg") for _ in range(rng.randint(0, 30))]
+        b = [rng.choice("abcdefg") for _ in range(rng.randint(0, 30))]
+        assert apply_opcodes(a, b, file_sys.patience_opcodes(a, b)) == b
+
+
+def test_patience_opcodes_on_repeated_lines_are_fast():
+    a = ["}"] * 50_000 + ["unique"]
+    b = ["}"] * 50_000 + ["changed"]
+    opcodes = file_sys.patience_opcodes(a, b)
+    assert apply_opcodes(a, b, opcodes) == b
+
+
+def test_unified_diff_format():
+    original = "".join(f"{n}\n" for n in range(20))
+    modified = original.replace("10\n", "ten\n")
+    assert file_sys.create_unified_diff(original, modified, "f") == "\n".join([
+        "--- f (original)",
+        "+++ f (modified)",
+        "@@ -8,7 +8,7 @@",
+        " 7", " 8", " 9",
+        "-10",
+        "+ten",
+        " 11", " 12", " 13",
+    ])
+    assert file_sys.create_unified_diff(original, original) == ""
+
+
+def test_unified_diff_is_capped():
+    original = "".join(f"{n}\n" for n in range(1000))
+    modified = "".join(f"x{n}\n" for n in range(1000))
+    diff = file_sys.create_unified_diff(original, modified, "f", max_lines=50)
+    assert len(diff.splitlines()) == 2 + 50 + 1
+    assert diff.endswith("... [Diff truncated after 50 lines]")
+
+
+def test_edit_diff_matches_whole_file_diff():
+    content = "".join(f"line {n}\n" for n in range(200))
+    edits = [{"oldText": "line 5\n", "newText": "five\n"}, {"oldText": "line 150\n", "newText": ""}]
+    spans = file_sys.locate_edits(content, edits)
+    modified = file_sys.splice_edits(content, spans)
+    assert file_sys.create_edit_diff(content, spans, "f") == file_sys.create_unified_diff(content, modified, "f")
+
+############# End of EDIT DIFF #############
@@ -0,0 +1,147 @@
+import os
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+############# LIST DIRECTORY #############
+@pytest.fixture
+def listing(allowed_dir):
+    for name, size in [("b.csv", 300), ("a.csv", 100), ("c.txt", 200)]:
+        (allowed_dir / name).write_bytes(b"x" * size)
+        os.utime(allowed_dir / name, (1_000_000 + size, 1_000_000 + size))
+    (allowed_dir / "sub").mkdir()
+    return allowed_dir
+
+
+def test_list_directory_sorting_and_filters(tool, listing):
+    list_directory = tool("list_directory")
+    assert list_directory(str(listing)) == "[FILE] a.csv\n[FILE] b.csv\n[FILE] c.txt\n[DIR] sub"
+    assert list_directory(str(listing), entry_type="files", sort_by="size", reverse=True) == "[FILE] b.csv\n[FILE] c.txt\n[FILE] a.csv"
+    assert list_directory(str(listing), entry_type="files", sort_by="mtime") == "[FILE] a.csv\n[FILE] c.txt\n[FILE] b.csv"
+    assert list_directory(str(listing), pattern="*.csv") == "[FILE] a.csv\n[FILE] b.csv"
+    assert list_directory(str(listing), entry_type="dirs") == "[DIR] sub"
+
+
+def test_list_directory_pages(tool, listing):
+    list_directory = tool("list_directory")
+    assert list_directory(str(listing), limit=2) == "[FILE] a.csv\n[FILE] b.csv\n[Showing entries 1-2 of 4; more available with offset=2]"
+    assert list_directory(str(listing), offset=2, limit=2) == "[FILE] c.txt\n[DIR] sub\n[Showing entries 3-4 of 4]"
+    unsorted = list_directory(str(listing), sort_by="none", limit=1)
+    assert unsorted.endswith("[Showing entries 1-1; more available with offset=1]")
+
+
+def test_list_directory_details(tool, listing):
+    lines = tool("list_directory")(str(listing), pattern="a.csv", show_details=True).split("  ")
+    assert lines[0] == "[FILE] a.csv" and lines[1] == "100 bytes"
+
+
+def test_list_directory_rejects_negative_paging(tool, listing):
+    with pytest.raises(ValueError, match="non-negative"):
+        tool("list_directory")(str(listing), offset=-1)
+    with pytest.raises(ValueError, match="non-negative"):
+        tool("list_directory")(str(listing), limit=-1)
+
+############# End of LIST DIRECTORY #############
+
+
+############# DIRECTORY TREE #############
+@pytest.fixture
+def tree(allowed_dir):
+    for relative in ["src/pkg/mod.py", "src/main.py", "README.md", "node_modules/x/index.js"]:
+        path = allowed_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    (allowed_dir / "data").mkdir()
+    for n in range(30):
+        (allowed_dir / "data" / f"{n}.csv").write_text("")
+    return allowed_dir
+
+
+def test_directory_tree_layout(tool, tree):
+    output = tool("directory_tree")(str(tree), exclude_patterns=["node_modules", "data"])
+    assert output.splitlines() == [
+        f"{tree}/",
+        "  src/",
+        "    pkg/",
+        "      mod.py",
+        "    main.py",
+        "  README.md",
+    ]
+
+
+def test_directory_tree_collapses_large_directories(tree):
+    output = file_sys.build_directory_tree(str(tree), ["node_modules"], collapse_threshold=10)
+    assert "  data/ [30 files, 0 dirs, collapsed]" in output.splitlines()
+
+
+def test_directory_tree_depth_and_budget(tree):
+    output = file_sys.build_directory_tree(str(tree), ["node_modules", "data"], max_depth=1)
+    assert output.splitlines() == [f"{tree}/", "  src/", "  README.md"]
+    
+    output = file_sys.build_directory_tree(str(tree), max_entries=3)
+    lines = output.splitlines()
+    # Breadth-first: the budget goes to the top level before anything below it
+    assert lines[1:4] == ["  data/ [not expanded]", "  node_modules/ [not expanded]", "  src/ [not expanded]"]
+    assert lines[-1].startswith("[Budget reached after 3 entries")
+
+
+def test_directory_tree_missing_path(tool, allowed_dir):
+    with pytest.raises(FileNotFoundError):
+        tool("directory_tree")(str(allowed_dir / "missing"))
+    (allowed_dir / "file").write_text("")
+    with pytest.raises(NotADirectoryError):
+        tool("directory_tree")(str(allowed_dir / "file"))
+
+############# End of DIRECTORY TREE #############
+
+
+############# FILES INFO #############
+@pytest.fixture
+def links(allowed_dir, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "secret").write_text("x")
+    (allowed_dir / "file.txt").write_text("hello")
+    (allowed_dir / "dir").mkdir()
+    (allowed_dir / "link").symlink_to(outside / "secret")
+    (allowed_dir / "dangling").symlink_to(allowed_dir / "gone")
+    return allowed_dir, outside
+
+
+def test_stat_file_row_types(links):
+    root, _ = links
+    assert file_sys.stat_file_row(str(root / "file.txt"))[1:3] == ["file", "5 bytes"]
+    assert file_sys.stat_file_row(str(root / "dir"))[1:3] == ["dir", "-"]
+    assert file_sys.stat_file_row(str(root / "dangling"))[1] == "symlink"
+
+
+def test_symlink_row_does_not_validate_the_target(links):
+    root, outside = links
+    assert file_sys.stat_file_row(str(root / "link"))[1] == "symlink"
+    row = file_sys.stat_file_row(str(outside / "secret"))
+    assert row[1] == "error" and "outside allowed directories" in row[4]
+
+
+def test_get_multiple_files_info(tool, links):
+    root, _ = links
+    output = tool("get_multiple_files_info")([str(root / "file.txt"), str(root / "missing")], pattern=str(root / "**" / "*.txt"))
+    lines = output.splitlines()
+    assert lines[0] == "Path | Type | Size | Modified | Permissions"
+    # file.txt came from both the paths and the pattern, and is listed once
+    assert len(lines) == 3
+    assert lines[2].startswith(f"{root / 'missing'} | error")
+    with pytest.raises(ValueError):
+        tool("get_multiple_files_info")(pattern="/etc/*.conf")
+
+
+def test_get_multiple_files_info_caps_and_parallel_rows(tool, allowed_dir, monkeypatch):
+    monkeypatch.setattr(file_sys, "FILES_INFO_MAX_PATHS", 40)
+    for n in range(50):
+        (allowed_dir / f"{n:02}.txt").write_text("")
+    output = tool("get_multiple_files_info")(pattern=str(allowed_dir / "*.txt"))
+    lines = output.splitlines()
+    assert lines[1].startswith(str(allowed_dir / "00.txt")) and lines[40].startswith(str(allowed_dir / "39.txt"))
+    assert lines[-1] == "[Showing 40 of 50 paths]"
+
+############# End of FILES INFO #############
@@ -0,0 +1,114 @@
+import errno
+import os
+import time
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+############# MOVE ACROSS FILESYSTEMS #############
+@pytest.fixture
+def source_tree(allowed_dir):
+    root = allowed_dir / "source"
+    (root / "sub" / "deep").mkdir(parents=True)
+    (root / "a.txt").write_text("a" * 1000)
+    (root / "sub" / "b.bin").write_bytes(os.urandom(300_000))
+    (root / "sub" / "deep" / "c.txt").write_text("c")
+    (root / "link").symlink_to("a.txt")
+    os.utime(root / "sub" / "deep" / "c.txt", (1_000_000, 1_000_000))
+    return root
+
+
+def snapshot(root):
+    result = {}
+    for dir_path, _, file_names in os.walk(root):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            relative = os.path.relpath(path, root)
+            result[relative] = os.readlink(path) if os.path.islink(path) else open(path, "rb").read()
+    return result
+
+
+def test_move_tree_copies_everything(source_tree, allowed_dir):
+    expected = snapshot(source_tree)
+    destination = allowed_dir / "destination"
+    copied = file_sys.move_across_devices(str(source_tree), str(destination))
+    assert copied == 301_001
+    assert snapshot(destination) == expected
+    assert os.path.islink(destination / "link")
+    assert os.stat(destination / "sub" / "deep" / "c.txt").st_mtime == 1_000_000
+    assert not source_tree.exists()
+
+
+def test_failed_copy_keeps_source_and_cancels_the_rest(source_tree, allowed_dir, monkeypatch):
+    for n in range(40):
+        (source_tree / "sub" / "deep" / f"{n}.txt").write_text("x")
+    (source_tree / "bad.txt").write_text("bad")
+    expected = snapshot(source_tree)
+    
+    copy = file_sys.copy_file_zero_copy
+    started = []
+    
+    def failing_copy(source, destination, progress):
+        started.append(source)
+        if source.endswith("bad.txt"):
+            raise OSError(errno.EIO, "read error")
+        time.sleep(0.01)
+        return copy(source, destination, progress)
+    
+    monkeypatch.setattr(file_sys, "copy_file_zero_copy", failing_copy)
+    monkeypatch.setattr(file_sys, "MOVE_MAX_WORKERS", 2)
+    destination = allowed_dir / "destination"
+    with pytest.raises(OSError, match="read error"):
+        file_sys.move_across_devices(str(source_tree), str(destination))
+    assert not destination.exists()
+    assert snapshot(source_tree) == expected
+    # Copies queued behind the failure never started
+    assert len(started) < 10
+
+
+def test_cancelled_copy_stops(allowed_dir):
+    source = allowed_dir / "big.bin"
+    source.write_bytes(b"x" * 100)
+    progress = file_sys.CopyProgress(100, "big.bin")
+    progress.cancelled.set()
+    with pytest.raises(OSError) as error:
+        file_sys.copy_file_zero_copy(str(source), str(allowed_dir / "copy.bin"), progress)
+    assert error.value.errno == errno.ECANCELED
+
+
+def test_zero_copy_falls_back_when_unsupported(allowed_dir, monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+    
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+    source = allowed_dir / "data.bin"
+    data = os.urandom(100_000)
+    source.write_bytes(data)
+    progress = file_sys.CopyProgress(len(data), "data.bin")
+    assert file_sys.copy_file_zero_copy(str(source), str(allowed_dir / "copy.bin"), progress) == len(data)
+    assert (allowed_dir / "copy.bin").read_bytes() == data and progress.copied == len(data)
+
+
+def test_move_file_falls_back_on_exdev(tool, source_tree, allowed_dir, monkeypatch):
+    def cross_device(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    
+    monkeypatch.setattr(os, "rename", cross_device)
+    destination = allowed_dir / "moved"
+    message = tool("move_file")(str(source_tree / "a.txt"), str(destination))
+    assert "copied across filesystems" in message
+    assert destination.read_text() == "a" * 1000 and not (source_tree / "a.txt").exists()
+
+
+def test_move_file_validation(tool, source_tree, allowed_dir):
+    with pytest.raises(FileExistsError):
+        tool("move_file")(str(source_tree / "a.txt"), str(source_tree / "sub" / "deep" / "c.txt"))
+    with pytest.raises(FileNotFoundError):
+        tool("move_file")(str(allowed_dir / "missing"), str(allowed_dir / "other"))
+    with pytest.raises(ValueError):
+        tool("move_file")(str(source_tree / "a.txt"), "/tmp/outside-allowed.txt")
+
+############# End of MOVE ACROSS FILESYSTEMS #############
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+############# ALLOWED DIRECTORIES #############
+@pytest.fixture
+def outside(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("outside")
+    (directory / "secret.txt").write_text("secret")
+    return directory
+
+
+def test_paths_below_allowed_directories(allowed_dir):
+    (allowed_dir / "sub").mkdir()
+    assert file_sys.check_path(str(allowed_dir / "sub")) == os.path.realpath(allowed_dir / "sub")
+    # New files resolve through their parent
+    assert file_sys.check_path(str(allowed_dir / "sub" / "new.txt")) == os.path.join(os.path.realpath(allowed_dir / "sub"), "new.txt")
+    assert file_sys.check_path(str(allowed_dir / "sub" / ".." / "sub")) == os.path.realpath(allowed_dir / "sub")
+
+
+def test_sibling_with_common_prefix_is_denied(allowed_dir):
+    sibling = str(allowed_dir) + "2"
+    with pytest.raises(ValueError, match="outside allowed directories"):
+        file_sys.check_path(os.path.join(sibling, "x"))
+    with pytest.raises(ValueError, match="outside allowed directories"):
+        file_sys.check_path(str(allowed_dir / ".." / "elsewhere"))
+
+
+def test_symlink_escape_is_denied(allowed_dir, outside):
+    (allowed_dir / "escape").symlink_to(outside)
+    with pytest.raises(ValueError, match="symlink target outside"):
+        file_sys.check_path(str(allowed_dir / "escape" / "secret.txt"))
+    with pytest.raises(ValueError, match="parent directory outside"):
+        file_sys.check_path(str(allowed_dir / "escape" / "new.txt"))
+
+
+def test_cached_resolution_is_revalidated(allowed_dir, outside):
+    directory = allowed_dir / "data"
+    directory.mkdir()
+    (directory / "secret.txt").write_text("mine")
+    assert file_sys.check_path(str(directory / "secret.txt")) == os.path.realpath(directory / "secret.txt")
+    
+    # Swap the directory for a symlink pointing outside; the cached resolution must not be reused
+    shutil.rmtree(directory)
+    directory.symlink_to(outside)
+    with pytest.raises(ValueError, match="symlink target outside"):
+        file_sys.check_path(str(directory / "secret.txt"))
+
+
+def test_unrestricted_paths_are_only_expanded():
+    file_sys.set_allowed_directories([])
+    assert file_sys.check_path("~/notes.txt") == os.path.join(os.path.expanduser("~"), "notes.txt")
+    assert file_sys.check_path("relative/x") == "relative/x"
+
+
+def test_list_allowed_directories(tool, allowed_dir):
+    assert str(allowed_dir) in tool("list_allowed_directories")()
+
+############# End of ALLOWED DIRECTORIES #############
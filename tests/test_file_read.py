@@ -0,0 +1,220 @@
+from collections import OrderedDict
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+############# RANGED READS #############
+@pytest.fixture
+def numbered_file(allowed_dir):
+    path = allowed_dir / "lines.txt"
+    path.write_text("".join(f"line {n}\n" for n in range(1, 3001)))
+    return str(path)
+
+
+def test_line_range_across_index_checkpoints(numbered_file):
+    # Lines 1020-1030 straddle the first LINE_INDEX_STRIDE checkpoint
+    assert file_sys.read_line_range(numbered_file, 1020, 1030) == "".join(f"line {n}\n" for n in range(1020, 1031))
+
+
+def test_line_range_past_end_is_empty(numbered_file):
+    assert file_sys.read_line_range(numbered_file, 5000, 5001) == ""
+    assert file_sys.read_line_range(numbered_file, 2999) == "line 2999\nline 3000\n"
+
+
+def test_head_and_tail(numbered_file):
+    assert file_sys.read_head(numbered_file, 2) == "line 1\nline 2\n"
+    assert file_sys.read_tail(numbered_file, 2) == "line 2999\nline 3000\n"
+    assert file_sys.read_head(numbered_file, 0) == ""
+    assert file_sys.read_tail(numbered_file, 0) == ""
+
+
+def test_tail_without_trailing_newline(allowed_dir):
+    path = allowed_dir / "f.txt"
+    path.write_bytes(b"a\nb\nc")
+    assert file_sys.read_tail(str(path), 2) == "b\nc"
+    assert file_sys.read_tail(str(path), 10) == "a\nb\nc"
+
+
+def test_ranged_reads_translate_crlf(allowed_dir):
+    path = allowed_dir / "crlf.txt"
+    path.write_bytes(b"a\r\nb\r\nc\r\nd\r\n")
+    whole = file_sys.read_text_cached(str(path))
+    assert whole == "a\nb\nc\nd\n"
+    assert file_sys.read_line_range(str(path), 2, 3) == "b\nc\n"
+    assert file_sys.read_head(str(path), 2) == "a\nb\n"
+    assert file_sys.read_tail(str(path), 2) == "c\nd\n"
+
+
+def test_empty_file(allowed_dir):
+    path = allowed_dir / "empty.txt"
+    path.write_bytes(b"")
+    assert file_sys.read_line_range(str(path), 1) == ""
+    assert file_sys.read_head(str(path), 3) == ""
+    assert file_sys.read_tail(str(path), 3) == ""
+
+
+def test_byte_range(numbered_file):
+    assert file_sys.read_byte_range(numbered_file, 0, 6) == "line 1"
+    with pytest.raises(ValueError):
+        file_sys.read_byte_range(numbered_file, -1)
+
+
+def test_read_file_modes(tool, numbered_file):
+    read_file = tool("read_file")
+    assert read_file(numbered_file, start_line=2, end_line=2) == "line 2\n"
+    assert read_file(numbered_file, head=1) == "line 1\n"
+    assert read_file(numbered_file, tail=1) == "line 3000\n"
+    with pytest.raises(ValueError):
+        read_file(numbered_file, head=1, tail=1)
+    with pytest.raises(ValueError):
+        read_file(numbered_file, start_line=3, end_line=2)
+
+
+def test_utf16_line_range_uses_decoded_text(tool, allowed_dir):
+    path = allowed_dir / "wide.txt"
+    path.write_bytes("één\ntwee\ndrie\n".encode("utf-16"))
+    assert tool("read_file")(str(path), start_line=2, end_line=3) == "twee\ndrie\n"
+
+############# End of RANGED READS #############
+
+
+############# READ MULTIPLE FILES #############
+def test_read_multiple_files_keeps_request_order(allowed_dir):
+    paths = []
+    for n in range(20):
+        path = allowed_dir / f"f{n}.txt"
+        # Larger files first, so they tend to finish last
+        path.write_text("x" * (20 - n) * 10_000)
+        paths.append(str(path))
+    blocks = file_sys.read_multiple_files_results(paths)
+    assert [block.splitlines()[0] for block in blocks] == [f"File: {path}" for path in paths]
+
+
+def test_read_multiple_files_shares_budget(allowed_dir):
+    small = allowed_dir / "small.txt"
+    big = allowed_dir / "big.txt"
+    small.write_text("s" * 100)
+    big.write_text("b" * 10_000)
+    small_block, big_block = file_sys.read_multiple_files_results([str(small), str(big)], max_total_bytes=1000)
+    assert "s" * 100 in small_block and "Truncated" not in small_block
+    assert "b" * 900 in big_block and "b" * 901 not in big_block
+    assert "[Truncated: showing first 900 of 10000 bytes]" in big_block
+
+
+def test_read_multiple_files_reports_errors_in_place(allowed_dir):
+    good = allowed_dir / "good.txt"
+    good.write_text("ok")
+    blocks = file_sys.read_multiple_files_results([str(allowed_dir / "missing.txt"), str(good), "/etc/passwd"])
+    assert "[ERROR]" in blocks[0]
+    assert "ok" in blocks[1]
+    assert "[ERROR]" in blocks[2] and "outside allowed directories" in blocks[2]
+
+############# End of READ MULTIPLE FILES #############
+
+
+############# CONTENT CACHE #############
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(file_sys, "_content_cache", OrderedDict())
+    monkeypatch.setattr(file_sys, "_content_cache_bytes", 0)
+
+
+def test_content_cache_serves_unchanged_files(allowed_dir, empty_cache, monkeypatch):
+    path = allowed_dir / "cached.txt"
+    path.write_text("one\r\ntwo\n")
+    assert file_sys.read_text_cached(str(path)) == "one\ntwo\n"
+    assert str(path) in file_sys._content_cache
+    
+    # A hit does not open the file
+    monkeypatch.setattr(file_sys, "open", lambda *args, **kwargs: pytest.fail("file was read"), raising=False)
+    assert file_sys.read_text_cached(str(path)) == "one\ntwo\n"
+
+
+def test_content_cache_notices_changes(allowed_dir, empty_cache):
+    path = allowed_dir / "changing.txt"
+    path.write_text("before")
+    assert file_sys.read_text_cached(str(path)) == "before"
+    path.write_text("after, longer")
+    assert file_sys.read_text_cached(str(path)) == "after, longer"
+
+
+def test_lossy_entries_only_serve_their_error_handler(allowed_dir, empty_cache):
+    path = allowed_dir / "invalid.txt"
+    path.write_bytes(b"ok \xff")
+    assert file_sys.read_text_cached(str(path), errors="replace") == "ok �"
+    with pytest.raises(UnicodeDecodeError):
+        file_sys.read_text_cached(str(path))
+
+
+def test_content_cache_evicts_least_recently_used(allowed_dir, empty_cache, monkeypatch):
+    monkeypatch.setattr(file_sys, "CONTENT_CACHE_MAX_BYTES", 250)
+    paths = []
+    for n in range(3):
+        path = allowed_dir / f"{n}.txt"
+        path.write_text(str(n) * 100)
+        paths.append(str(path))
+        file_sys.read_text_cached(str(path))
+    assert list(file_sys._content_cache) == paths[1:]
+    assert file_sys._content_cache_bytes == 200
+
+
+def test_large_files_are_not_cached(allowed_dir, empty_cache, monkeypatch):
+    monkeypatch.setattr(file_sys, "CONTENT_CACHE_MAX_FILE_BYTES", 10)
+    path = allowed_dir / "large.txt"
+    path.write_text("x" * 11)
+    assert file_sys.read_text_cached(str(path)) == "x" * 11
+    assert not file_sys._content_cache
+
+
+def test_writes_update_the_cache(tool, allowed_dir, empty_cache):
+    path = allowed_dir / "written.txt"
+    tool("write_file")(str(path), "fresh\n")
+    assert file_sys._content_cache[str(path)].text == "fresh\n"
+    tool("write_file")(str(path), "crlf\r\n")
+    assert str(path) not in file_sys._content_cache
+    assert file_sys.read_text_cached(str(path)) == "crlf\n"
+
+############# End of CONTENT CACHE #############
+
+
+############# SNIFFING #############
+@pytest.mark.parametrize("text, encoding, expected", [
+    ("plain ascii", "ascii", "utf-8"),
+    ("naïve café crème", "utf-8", "utf-8"),
+    ("naïve résumé, voilà", "cp1252", "cp1252"),
+    ("Straße Größe Übung", "cp1252", "cp1252"),
+    ("café", "cp1252", "cp1252"),
+    ("你好，世界！这是一个测试。", "gbk", "gb18030"),
+    ("# 注释\nx = 1  # 初始化\n", "gbk", "gb18030"),
+    ("繁體中文測試", "gb18030", "gb18030"),
+])
+def test_guess_encoding(text, encoding, expected):
+    assert file_sys.guess_encoding(text.encode(encoding), complete=True) == expected
+
+
+def test_sniff_file_kinds(allowed_dir):
+    cases = {
+        "doc.pdf": (b"%PDF-1.7\n...", (True, "binary", "PDF document")),
+        "bom.txt": ("\ufeffhello".encode("utf-8"), (False, "utf-8-sig", None)),
+        "wide.txt": ("hello".encode("utf-16"), (False, "utf-16", None)),
+        "nul.dat": (b"abc\0def", (True, "binary", None)),
+        "ctrl.dat": (bytes(range(1, 8)) * 10, (True, "binary", None)),
+        "empty.txt": (b"", (False, "utf-8", None)),
+    }
+    for name, (data, expected) in cases.items():
+        (allowed_dir / name).write_bytes(data)
+        assert tuple(file_sys.sniff_file(str(allowed_dir / name))) == expected, name
+
+
+def test_read_file_decodes_legacy_encodings_and_describes_binaries(tool, allowed_dir):
+    (allowed_dir / "latin.txt").write_bytes("naïve résumé\n".encode("cp1252"))
+    (allowed_dir / "chinese.txt").write_bytes("你好，世界\n".encode("gbk"))
+    (allowed_dir / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 10)
+    read_file = tool("read_file")
+    assert read_file(str(allowed_dir / "latin.txt")) == "naïve résumé\n"
+    assert read_file(str(allowed_dir / "chinese.txt")) == "你好，世界\n"
+    assert read_file(str(allowed_dir / "image.png")) == "[Binary file: image.png, PNG image, 18 bytes; contents not shown]"
+
+############# End of SNIFFING #############
@@ -0,0 +1,196 @@
+import os
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+@pytest.fixture
+def project(allowed_dir):
+    for relative in [
+        "src/app.py",
+        "src/util/helpers.py",
+        "src/util/deep/more/config.py",
+        "node_modules/lib/index.js",
+        "node_modules/lib/app.py",
+        "build/out/app.py",
+        "docs/App.md",
+    ]:
+        path = allowed_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relative)
+    return allowed_dir
+
+
+def relative_paths(root, paths):
+    return sorted(os.path.relpath(path, root) for path in paths)
+
+
+############# WALKING SEARCH #############
+def test_find_matching_paths_is_case_insensitive(project):
+    results, truncated = file_sys.find_matching_paths(str(project), "app")
+    assert relative_paths(project, results) == [
+        "build/out/app.py", "docs/App.md", "node_modules/lib/app.py", "src/app.py",
+    ]
+    assert not truncated
+
+
+def test_find_matching_paths_prunes_excluded_subtrees(project, monkeypatch):
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or scandir(path))
+    results, _ = file_sys.find_matching_paths(str(project), ".py", exclude_patterns=["node_modules", "**/util/**"])
+    assert relative_paths(project, results) == ["build/out/app.py", "src/app.py"]
+    assert not any("node_modules" in path or "util" in path for path in listed)
+
+
+def test_find_matching_paths_depth_and_limit(project):
+    results, _ = file_sys.find_matching_paths(str(project), ".py", max_depth=2)
+    assert relative_paths(project, results) == ["src/app.py"]
+    results, truncated = file_sys.find_matching_paths(str(project), ".py", max_results=2)
+    assert len(results) == 2 and truncated
+
+
+def test_find_matching_paths_glob(project):
+    results, _ = file_sys.find_matching_paths(str(project), "*.MD", use_glob=True)
+    assert relative_paths(project, results) == ["docs/App.md"]
+
+
+def test_find_matching_paths_missing_directory(allowed_dir):
+    with pytest.raises(FileNotFoundError):
+        file_sys.find_matching_paths(str(allowed_dir / "missing"), "x")
+
+############# End of WALKING SEARCH #############
+
+
+############# FILE NAME INDEX #############
+@pytest.fixture
+def index_dir(tmp_path_factory, monkeypatch):
+    """Keep index databases out of the home directory and start without cached indexes."""
+    monkeypatch.setattr(file_sys, "FILE_INDEX_DIR", str(tmp_path_factory.mktemp("index")))
+    monkeypatch.setattr(file_sys, "_file_indexes", {})
+
+
+def test_index_refresh_picks_up_changes(project, index_dir):
+    index = file_sys.FileNameIndex(str(project))
+    index.refresh()
+    assert relative_paths(project, index.query(str(project), "helpers")[0]) == ["src/util/helpers.py"]
+    
+    (project / "src" / "util" / "helpers.py").unlink()
+    (project / "src" / "util" / "new_helpers.py").write_text("")
+    index.refresh()
+    assert relative_paths(project, index.query(str(project), "helpers")[0]) == ["src/util/new_helpers.py"]
+
+
+def test_index_query_stays_in_subtree(project, index_dir):
+    (project / "src2").mkdir()
+    (project / "src2" / "app.py").write_text("")
+    (project / "SRC").mkdir()
+    (project / "SRC" / "app.py").write_text("")
+    index = file_sys.FileNameIndex(str(project))
+    index.refresh()
+    results, _ = index.query(str(project / "src"), "app")
+    assert relative_paths(project, results) == ["src/app.py"]
+
+
+def test_index_query_case_glob_depth_and_limit(project, index_dir):
+    index = file_sys.FileNameIndex(str(project))
+    index.refresh()
+    assert relative_paths(project, index.query(str(project), "APP.MD")[0]) == ["docs/App.md"]
+    assert relative_paths(project, index.query(str(project), "*.md", use_glob=True)[0]) == ["docs/App.md"]
+    assert relative_paths(project, index.query(str(project / "src"), ".py", max_depth=1)[0]) == ["src/app.py"]
+    # A literal % or _ in the pattern is not a LIKE wildcard
+    assert index.query(str(project), "%")[0] == []
+    results, truncated = index.query(str(project), ".py", max_results=2)
+    assert len(results) == 2 and truncated
+
+
+def test_index_refresh_stats_only_the_searched_subtree(project, index_dir, monkeypatch):
+    index = file_sys.FileNameIndex(str(project))
+    stated = []
+    stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: stated.append(path) or stat(path, *args, **kwargs))
+    index.refresh(str(project / "src"), max_depth=1)
+    assert stated == [str(project / "src")]
+
+
+def test_search_files_returns_requested_paths(tool, project, index_dir, tmp_path_factory):
+    link = tmp_path_factory.mktemp("links") / "project"
+    link.symlink_to(project)
+    file_sys.set_allowed_directories([str(project), str(link.parent)])
+    output = tool("search_files")(str(link), "helpers")
+    assert f"1. {link}/src/util/helpers.py" in output
+    output = tool("file_find_by_name")(str(project), "*.md")
+    assert f"1. {project}/docs/App.md" in output
+
+
+def test_search_files_with_excludes_uses_walker(tool, project, index_dir):
+    output = tool("search_files")(str(project), "app", exclude_patterns=["node_modules"])
+    assert "node_modules" not in output and "src/app.py" in output
+    assert file_sys._file_indexes == {}
+
+############# End of FILE NAME INDEX #############
+
+
+############# FIND IN CONTENT #############
+@pytest.fixture
+def sources(allowed_dir):
+    (allowed_dir / "a.py").write_text("import os\n\ndef main():\n    return TODO\n\nprint('done')\n")
+    (allowed_dir / "b.txt").write_text("Äpfel und Birnen\ntodo later\n")
+    (allowed_dir / "data.bin").write_bytes(b"\x00\x01TODO\x02" * 10)
+    (allowed_dir / "skip").mkdir()
+    (allowed_dir / "skip" / "c.py").write_text("TODO\n")
+    return allowed_dir
+
+
+def test_find_in_content_reports_lines_with_context(sources):
+    results, truncated = file_sys.find_in_content(str(sources), "TODO", exclude_patterns=["skip"], context_lines=1)
+    assert results == [(str(sources / "a.py"), [(3, "def main():", False), (4, "    return TODO", True), (5, "", False)])]
+    assert not truncated
+
+
+def test_find_in_content_case_insensitive_non_ascii(sources):
+    results, _ = file_sys.find_in_content(str(sources), "äPFEL", case_sensitive=False, context_lines=0)
+    assert results == [(str(sources / "b.txt"), [(1, "Äpfel und Birnen", True)])]
+    results, _ = file_sys.find_in_content(str(sources), "todo", case_sensitive=False, include_pattern="*.txt", context_lines=0)
+    assert results == [(str(sources / "b.txt"), [(2, "todo later", True)])]
+
+
+def test_find_in_content_regex_and_validation(sources):
+    results, _ = file_sys.find_in_content(str(sources), r"^def \w+", is_regex=True, context_lines=0)
+    assert results == [(str(sources / "a.py"), [(3, "def main():", True)])]
+    with pytest.raises(ValueError):
+        file_sys.find_in_content(str(sources), "(", is_regex=True)
+    with pytest.raises(ValueError):
+        file_sys.find_in_content(str(sources), "")
+
+
+def test_find_in_content_limit(allowed_dir):
+    (allowed_dir / "many.txt").write_text("hit\n" * 50)
+    results, truncated = file_sys.find_in_content(str(allowed_dir), "hit", context_lines=0, max_results=10)
+    assert len(results[0][1]) == 10 and truncated
+
+
+def test_find_in_content_process_pool_keeps_walk_order(allowed_dir, monkeypatch):
+    for n in range(12):
+        (allowed_dir / f"f{n:02}.txt").write_text(f"needle {n}\n")
+    expected, _ = file_sys.find_in_content(str(allowed_dir), "needle", context_lines=0)
+    
+    monkeypatch.setattr(file_sys, "CONTENT_SEARCH_PROCESS_MIN_FILES", 1)
+    monkeypatch.setattr(file_sys, "CONTENT_SEARCH_BATCH_SIZE", 2)
+    monkeypatch.setattr(file_sys, "_content_search_executor", None)
+    try:
+        results, truncated = file_sys.find_in_content(str(allowed_dir), "needle", context_lines=0)
+    finally:
+        file_sys._content_search_executor.shutdown()
+    assert results == expected and len(results) == 12 and not truncated
+
+
+def test_file_find_in_content_tool(tool, sources):
+    output = tool("file_find_in_content")(str(sources), "TODO", context_lines=0)
+    assert output.startswith("Found 2 matching lines in 2 files:")
+    assert "4:     return TODO" in output
+    with pytest.raises(ValueError):
+        tool("file_find_in_content")("/etc", "root")
+
+############# End of FIND IN CONTENT #############
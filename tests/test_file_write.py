@@ -0,0 +1,131 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from src.tools.file_management import file_sys
+
+
+############# ATOMIC WRITES #############
+def test_write_file_replaces_atomically(tool, allowed_dir):
+    path = allowed_dir / "notes.txt"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    tool("write_file")(str(path), "new")
+    assert path.read_text() == "new"
+    # The replacement keeps the mode of the file it replaced, and leaves no temporary file behind
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(allowed_dir) == ["notes.txt"]
+
+
+def test_write_file_writes_through_symlinks(tool, allowed_dir):
+    target = allowed_dir / "target.txt"
+    target.write_text("old")
+    link = allowed_dir / "link.txt"
+    link.symlink_to(target)
+    tool("write_file")(str(link), "new", fsync=False)
+    assert link.is_symlink() and target.read_text() == "new"
+
+
+def test_failed_write_keeps_the_old_file(allowed_dir, monkeypatch):
+    path = allowed_dir / "keep.txt"
+    path.write_text("old")
+    monkeypatch.setattr(os, "replace", lambda *args: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError):
+        file_sys.atomic_write_text(str(path), "new")
+    assert path.read_text() == "old"
+    assert os.listdir(allowed_dir) == ["keep.txt"]
+
+
+def test_write_multiple_files(tool, allowed_dir):
+    (allowed_dir / "pkg").mkdir()
+    files = [{"path": str(allowed_dir / "pkg" / f"m{n}.py"), "content": f"x = {n}\n"} for n in range(20)]
+    assert tool("write_multiple_files")(files) == "Successfully wrote 20 files"
+    assert sorted(os.listdir(allowed_dir / "pkg")) == sorted(f"m{n}.py" for n in range(20))
+    assert (allowed_dir / "pkg" / "m7.py").read_text() == "x = 7\n"
+    # The content cache serves the new content
+    assert file_sys.read_text_cached(str(allowed_dir / "pkg" / "m7.py")) == "x = 7\n"
+
+
+def test_write_multiple_files_failure_leaves_no_temporary_files(allowed_dir):
+    files = [(str(allowed_dir / "a.txt"), "a"), (str(allowed_dir / "missing" / "b.txt"), "b")]
+    with pytest.raises(OSError):
+        file_sys.atomic_write_files(files)
+    assert os.listdir(allowed_dir) == []
+
+
+def test_write_multiple_files_rejects_paths_outside(tool, allowed_dir):
+    with pytest.raises(ValueError):
+        tool("write_multiple_files")([{"path": "/tmp/outside-allowed.txt", "content": ""}])
+
+############# End of ATOMIC WRITES #############
+
+
+############# APPEND AND CHUNKED WRITES #############
+def test_append_and_at_offset(tool, allowed_dir):
+    path = allowed_dir / "log.txt"
+    write_file = tool("write_file")
+    assert write_file(str(path), "hello\n", mode="append") == f"Successfully wrote 6 bytes to {path} (append)"
+    write_file(str(path), "world\n", mode="append", fsync=False)
+    write_file(str(path), "HE", mode="at_offset", offset=0)
+    assert path.read_text() == "HEllo\nworld\n"
+    with pytest.raises(ValueError):
+        write_file(str(path), "x", mode="at_offset")
+    with pytest.raises(ValueError):
+        write_file(str(path), "x", mode="prepend")
+
+
+def test_append_invalidates_the_content_cache(tool, allowed_dir):
+    path = allowed_dir / "cached.txt"
+    tool("write_file")(str(path), "one\n")
+    assert file_sys.read_text_cached(str(path)) == "one\n"
+    tool("write_file")(str(path), "two\n", mode="append")
+    assert file_sys.read_text_cached(str(path)) == "one\ntwo\n"
+
+
+def test_write_session_concurrent_appends(tool, allowed_dir):
+    path = allowed_dir / "session.txt"
+    message = tool("open_write_session")(str(path), truncate=True)
+    session_id = message.split()[3]
+    
+    def append_lines(n):
+        for k in range(50):
+            tool("write_file")(str(path), f"{n}:{k}\n", mode="append", session_id=session_id, fsync=False)
+    
+    threads = [threading.Thread(target=append_lines, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tool("close_write_session")(session_id)
+    
+    # No append overwrote another
+    assert sorted(path.read_text().splitlines()) == sorted(f"{n}:{k}" for n in range(4) for k in range(50))
+
+
+def test_write_session_at_offset(tool, allowed_dir):
+    path = allowed_dir / "patch.txt"
+    path.write_text("abcdef")
+    session_id = tool("open_write_session")(str(path)).split()[3]
+    tool("write_file")(str(path), "XY", mode="at_offset", offset=2, session_id=session_id)
+    tool("write_file")(str(path), "!", mode="append", session_id=session_id)
+    tool("close_write_session")(session_id)
+    assert path.read_text() == "abXYef!"
+
+
+def test_write_session_validation(tool, allowed_dir):
+    path = allowed_dir / "a.txt"
+    other = allowed_dir / "b.txt"
+    session_id = tool("open_write_session")(str(path)).split()[3]
+    with pytest.raises(ValueError):
+        tool("write_file")(str(other), "x", mode="append", session_id=session_id)
+    with pytest.raises(ValueError):
+        tool("write_file")(str(path), "x", session_id=session_id)
+    tool("close_write_session")(session_id)
+    with pytest.raises(ValueError):
+        tool("close_write_session")(session_id)
+    with pytest.raises(ValueError):
+        tool("write_file")(str(path), "x", mode="append", session_id=session_id)
+
+############# End of APPEND AND CHUNKED WRITES #############
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools.search import cache as cache_module
+from src.tools.search.cache import ResultCache, make_cache_key, normalize_query
+from src.tools.search.tavily import tavily_search_cache_key
+
+
+############# CACHE KEYS #############
+def test_normalize_query():
+    assert normalize_query("  Python   ASYNCIO\tTutorial ") == "python asyncio tutorial"
+
+
+def test_make_cache_key_ignores_order_and_none():
+    assert make_cache_key(query="q", depth="basic") == make_cache_key(depth="basic", query="q", days=None)
+    assert make_cache_key(query="q", depth="basic") != make_cache_key(query="q", depth="advanced")
+
+
+def test_equivalent_tavily_searches_share_a_key():
+    base = {"query": "Rust  Async", "time_range": "w", "topic": "general", "days": 3,
+            "include_domains": ["b.com", "a.com"], "exclude_domains": []}
+    same = {"query": "rust async", "time_range": "week", "topic": "general", "days": 7,
+            "include_domains": ["a.com", "b.com", "a.com"], "exclude_domains": None}
+    assert tavily_search_cache_key(base) == tavily_search_cache_key(same)
+    # days only counts for news
+    assert tavily_search_cache_key({**base, "topic": "news"}) != tavily_search_cache_key({**same, "topic": "news"})
+
+############# End of CACHE KEYS #############
+
+
+############# MEMORY TIER #############
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_entries_expire(clock):
+    cache = ResultCache("test", db_path=None)
+    cache.set("k", {"v": 1}, ttl=10)
+    assert cache.get("k") == {"v": 1}
+    clock[0] += 10
+    assert cache.get("k") is None
+    assert "k" not in cache.entries
+
+
+def test_non_positive_ttl_is_not_stored():
+    cache = ResultCache("test", db_path=None)
+    cache.set("k", 1, ttl=0)
+    asyncio.run(cache.aset("a", 1, ttl=-1))
+    assert not cache.entries
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache("test", max_entries=2, db_path=None)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl=60)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+
+############# End of MEMORY TIER #############
+
+
+############# DISK TIER #############
+def test_disk_tier_survives_new_instances(tmp_path):
+    db_path = str(tmp_path / "cache" / "results.db")
+    ResultCache("search", db_path=db_path).set("k", {"results": [1, 2]}, ttl=60)
+    fresh = ResultCache("search", db_path=db_path)
+    assert fresh.get("k") == {"results": [1, 2]}
+    # A disk hit is promoted to the memory tier
+    assert "k" in fresh.entries
+
+
+def test_namespaces_are_separate(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    search = ResultCache("search", db_path=db_path)
+    extract = ResultCache("extract", db_path=db_path)
+    search.set("k", "search", ttl=60)
+    extract.set("k", "extract", ttl=60)
+    assert ResultCache("search", db_path=db_path).get("k") == "search"
+    extract.clear()
+    assert ResultCache("extract", db_path=db_path).get("k") is None
+    assert ResultCache("search", db_path=db_path).get("k") == "search"
+
+
+def test_expired_disk_rows_are_missed_and_purged(tmp_path, clock):
+    db_path = str(tmp_path / "results.db")
+    cache = ResultCache("search", db_path=db_path)
+    cache.set("old", 1, ttl=10)
+    clock[0] += cache_module.SEARCH_CACHE_PURGE_INTERVAL
+    assert ResultCache("search", db_path=db_path).get("old") is None
+    cache.set("new", 2, ttl=10)
+    rows = cache.connect().execute("SELECT key FROM results").fetchall()
+    assert rows == [("new",)]
+
+
+def test_async_access_uses_the_disk_tier(tmp_path):
+    db_path = str(tmp_path / "results.db")
+
+    async def roundtrip():
+        await ResultCache("search", db_path=db_path).aset("k", ["value"], ttl=60)
+        return await ResultCache("search", db_path=db_path).aget("k")
+
+    assert asyncio.run(roundtrip()) == ["value"]
+
+
+def test_unusable_database_falls_back_to_memory(tmp_path):
+    # A directory cannot be opened as a database
+    cache = ResultCache("search", db_path=str(tmp_path))
+    cache.set("k", 1, ttl=60)
+    assert cache.get("k") == 1
+    assert cache.db_path is None
+
+############# End of DISK TIER #############
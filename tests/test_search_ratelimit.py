@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from tavily import UsageLimitExceededError
+
+from src.tools.search import ratelimit
+from src.tools.search.ratelimit import TokenBucket, backoff_delay, call_with_backoff, is_retryable_error, retry_after_seconds
+from src.tools.search.tavily import is_retryable_tavily_error
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_rate_limiters", {})
+    # The "test" provider never waits for tokens, so only backoff sleeps are seen
+    monkeypatch.setitem(ratelimit.PROVIDER_RATE_LIMITS, "test", (1000.0, 100))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting them out."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(ratelimit, "asyncio", SimpleNamespace(sleep=sleep))
+    return delays
+
+
+def http_error(status, headers=None):
+    request = httpx.Request("GET", "https://api.example.com")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"status {status}", request=request, response=response)
+
+
+############# TOKEN BUCKET #############
+def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=10.0, burst=3)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1, abs=0.01)
+    assert waits[4] == pytest.approx(0.2, abs=0.01)
+
+
+def test_bucket_pause_holds_back_callers():
+    bucket = TokenBucket(rate=10.0, burst=3)
+    bucket.pause(2.0)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.01)
+
+
+def test_acquire_queues_callers_in_order():
+    bucket = TokenBucket(rate=50.0, burst=1)
+    finished = []
+
+    async def caller(n):
+        await bucket.acquire()
+        finished.append(n)
+
+    async def main():
+        await asyncio.gather(*(caller(n) for n in range(4)))
+
+    asyncio.run(main())
+    assert finished == [0, 1, 2, 3]
+
+
+def test_limiters_are_shared_per_provider(monkeypatch):
+    monkeypatch.setenv("TAVILY_RATE_LIMIT", "7")
+    limiter = ratelimit.get_rate_limiter("tavily")
+    assert ratelimit.get_rate_limiter("tavily") is limiter
+    assert (limiter.rate, limiter.burst) == (7.0, 5)
+    assert ratelimit.get_rate_limiter("unknown").rate == ratelimit.DEFAULT_RATE_LIMIT[0]
+
+############# End of TOKEN BUCKET #############
+
+
+############# BACKOFF #############
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, 1.0, 8.0) <= min(8.0, 2 ** attempt) for attempt in range(10) for _ in range(20))
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(http_error(429, {"Retry-After": "3"})) == 3.0
+    assert retry_after_seconds(http_error(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(http_error(429, {"Retry-After": "soon"})) is None
+    assert retry_after_seconds(http_error(429)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_retryable_errors():
+    assert is_retryable_error(http_error(429))
+    assert is_retryable_error(http_error(503))
+    assert not is_retryable_error(http_error(404))
+    assert is_retryable_error(httpx.ConnectError("refused"))
+    assert not is_retryable_error(ValueError())
+    assert not is_retryable_tavily_error(UsageLimitExceededError("quota"))
+    assert is_retryable_tavily_error(http_error(502))
+
+
+def test_transient_failures_are_retried(sleeps):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise http_error(503)
+        return "ok"
+
+    assert asyncio.run(call_with_backoff("test", call, base_delay=1.0)) == "ok"
+    assert len(attempts) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 2.0 for delay in sleeps)
+
+
+def test_retries_are_limited(sleeps):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise http_error(500)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call_with_backoff("test", call, retries=2))
+    assert len(attempts) == 3
+
+
+def test_permanent_failures_are_not_retried(sleeps):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise http_error(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call_with_backoff("test", call))
+    assert len(attempts) == 1 and not sleeps
+
+
+def test_retry_after_is_honored_and_pauses_the_provider(sleeps):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise http_error(429, {"Retry-After": "2"})
+        return "ok"
+
+    assert asyncio.run(call_with_backoff("test", call)) == "ok"
+    assert sleeps[0] == 2.0
+    assert ratelimit.get_rate_limiter("test").paused_until > 0
+
+
+def test_long_retry_after_raises_at_once(sleeps):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise http_error(429, {"Retry-After": "3600"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call_with_backoff("test", call, max_delay=30.0))
+    assert len(attempts) == 1 and not sleeps
+
+############# End of BACKOFF #############
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from src.tools.search.singleflight import single_flight
+
+
+@pytest.fixture
+def counted():
+    calls = []
+
+    @single_flight
+    async def fetch(query: str, depth: str = "basic") -> str:
+        calls.append((query, depth))
+        await asyncio.sleep(0.05)
+        return f"{query}:{depth}"
+
+    return fetch, calls
+
+
+def test_identical_concurrent_calls_run_once(counted):
+    fetch, calls = counted
+
+    async def main():
+        return await asyncio.gather(fetch("q"), fetch("q", "basic"), fetch(query="q", depth="basic"))
+
+    assert asyncio.run(main()) == ["q:basic"] * 3
+    assert calls == [("q", "basic")]
+
+
+def test_different_arguments_run_separately(counted):
+    fetch, calls = counted
+
+    async def main():
+        return await asyncio.gather(fetch("q"), fetch("q", "advanced"), fetch("other"))
+
+    assert asyncio.run(main()) == ["q:basic", "q:advanced", "other:basic"]
+    assert len(calls) == 3
+
+
+def test_sequential_calls_are_not_shared(counted):
+    fetch, calls = counted
+
+    async def main():
+        await fetch("q")
+        await fetch("q")
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call(counted):
+    fetch, calls = counted
+
+    async def main():
+        first = asyncio.ensure_future(fetch("q"))
+        second = asyncio.ensure_future(fetch("q"))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "q:basic"
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_caller():
+    calls = []
+
+    @single_flight
+    async def fail(query: str) -> str:
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(fail("q"), fail("q"), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["upstream down"] * 2
+    assert calls == ["q"]
+
@@ -0,0 +1,259 @@
+import asyncio
+
+import pytest
+
+from src.tools.search import ratelimit, tavily
+from src.tools.search.cache import ResultCache
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    """Replace the Tavily search API with canned results, recording every call."""
+    calls = []
+    responses = {}
+
+    async def search(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        response = responses.get(kwargs["query"])
+        if isinstance(response, Exception):
+            raise response
+        return response or {"query": kwargs["query"], "results": []}
+
+    monkeypatch.setattr(tavily.async_tavily_client, "search", search)
+    monkeypatch.setattr(tavily, "tavily_search_cache", ResultCache("tavily_search", db_path=None))
+    monkeypatch.setattr(ratelimit, "_rate_limiters", {})
+    return responses, calls
+
+
+def hit(url, score, title=None):
+    return {"url": url, "title": title or url, "content": f"about {url}", "score": score}
+
+
+############# TAVILY SEARCH #############
+def test_search_sends_max_results(fake_search, invoke_tool):
+    responses, calls = fake_search
+    responses["rust"] = {"results": [hit("https://a.com/", 0.9, "A")]}
+    output = invoke_tool(tavily.tavily_search, query="rust", max_result=3, time_range="w")
+    assert "1. A" in output and "https://a.com/" in output
+    assert calls[0]["max_results"] == 3
+    assert calls[0]["include_domains"] == [] and calls[0]["exclude_domains"] == []
+    assert "max_result" not in calls[0]
+
+
+def test_search_results_are_cached(fake_search, invoke_tool):
+    responses, calls = fake_search
+    responses["rust"] = {"results": [hit("https://a.com/", 0.9)]}
+    first = invoke_tool(tavily.tavily_search, query="rust", time_range="w")
+    second = invoke_tool(tavily.tavily_search, query="  RUST ", time_range="week")
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_search_errors_are_reported(fake_search, invoke_tool):
+    responses, calls = fake_search
+    responses["rust"] = tavily.UsageLimitExceededError("quota")
+    assert invoke_tool(tavily.tavily_search, query="rust") == "Error: Usage limit exceeded"
+    # Quota errors are not retried
+    assert len(calls) == 1
+
+############# End of TAVILY SEARCH #############
+
+
+############# TAVILY MULTI SEARCH #############
+def test_normalize_result_url():
+    assert tavily.normalize_result_url("https://Example.com/a/#top") == "example.com/a"
+    assert tavily.normalize_result_url("http://example.com/a?x=1") == "example.com/a?x=1"
+    assert tavily.normalize_result_url("https://example.com") == "example.com/"
+
+
+def test_merge_ranks_pages_found_by_more_queries_first():
+    merged = tavily.merge_tavily_search_results({
+        "q1": {"results": [hit("https://a.com/x", 0.9, "A1"), hit("https://b.com/", 0.5)]},
+        "q2": {"results": [hit("https://b.com", 0.6), hit("https://A.com/x/", 0.95, "A2")]},
+        "q3": {"results": [hit("https://c.com/", 0.99), {"title": "no url"}]},
+    })
+    assert [entry["url"] for entry in merged] == ["https://A.com/x/", "https://b.com", "https://c.com/"]
+    # The best-scoring hit supplies title and content
+    assert merged[0]["title"] == "A2"
+    assert merged[0]["queries"] == ["q1", "q2"]
+
+
+def test_multi_search_dedupes_queries_and_lists_failures(fake_search, invoke_tool):
+    responses, calls = fake_search
+    responses["rust"] = {"results": [hit("https://a.com/", 0.9)], "answer": "a language"}
+    responses["go"] = {"results": [hit("https://a.com", 0.8), hit("https://b.com/", 0.7)]}
+    responses["zig"] = tavily.InvalidAPIKeyError("bad key")
+    output = invoke_tool(tavily.tavily_multi_search, queries=["rust", " rust ", "go", "zig", ""], max_result=4)
+    assert sorted(call["query"] for call in calls) == ["go", "rust", "zig"]
+    assert all(call["max_results"] == 4 for call in calls)
+    assert "Search Results (2 unique sources from 3 queries):" in output
+    assert "Found by: rust; go" in output
+    assert "Q: rust\nA: a language" in output
+    assert "- zig: Error: Invalid API key" in output
+
+
+def test_multi_search_limits_concurrency(fake_search, invoke_tool, monkeypatch):
+    responses, calls = fake_search
+    monkeypatch.setattr(tavily, "TAVILY_MULTI_SEARCH_CONCURRENCY", 2)
+    monkeypatch.setattr(ratelimit, "PROVIDER_RATE_LIMITS", {"tavily": (1000.0, 100)})
+    running = []
+    peak = []
+
+    async def search(**kwargs):
+        running.append(kwargs["query"])
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(kwargs["query"])
+        return {"results": []}
+
+    monkeypatch.setattr(tavily.async_tavily_client, "search", search)
+    invoke_tool(tavily.tavily_multi_search, queries=[f"q{n}" for n in range(6)])
+    assert max(peak) == 2
+
+
+def test_multi_search_rejects_bad_query_lists(invoke_tool, monkeypatch):
+    monkeypatch.setattr(tavily, "TAVILY_MULTI_SEARCH_MAX_QUERIES", 2)
+    assert invoke_tool(tavily.tavily_multi_search, queries=[" ", ""]) == "Error: No queries given"
+    assert invoke_tool(tavily.tavily_multi_search, queries=["a", "b", "c"]) == "Error: At most 2 queries per call, got 3"
+
+############# End of TAVILY MULTI SEARCH #############
+
+
+############# TAVILY RESULT HELPERS #############
+def test_response_to_dict_uses_the_response_object():
+    class Model:
+        def model_dump(self):
+            return {"results": ["model"]}
+
+    class Plain:
+        def __init__(self):
+            self.results = ["plain"]
+
+    response = {"results": []}
+    assert tavily.tavily_response_to_dict(response) is response
+    assert tavily.tavily_response_to_dict(Model()) == {"results": ["model"]}
+    assert tavily.tavily_response_to_dict(Plain()) == {"results": ["plain"]}
+    with pytest.raises(TypeError):
+        tavily.tavily_response_to_dict("{'results': []}")
+
+
+def test_truncate_to_tokens_prefers_boundaries():
+    assert tavily.truncate_to_tokens("short", 10) == "short"
+    paragraphs = "a" * 30 + "\n" + "b" * 30
+    assert tavily.truncate_to_tokens(paragraphs, 9) == "a" * 30 + "\n[... truncated, showing 30 of 61 characters]"
+    words = " ".join(["word"] * 20)
+    assert tavily.truncate_to_tokens(words, 5).startswith("word word word word\n[... truncated, showing 19 of 99")
+    assert tavily.truncate_to_tokens("x" * 100, 5) == "x" * 20 + "\n[... truncated, showing 20 of 100 characters]"
+
+
+def test_raw_contents_share_the_budget():
+    results = [{"raw_content": "s" * 40}, {"raw_content": "b" * 4000}, {"content": "no raw content"}]
+    small, big, missing = tavily.budget_raw_contents(results, 100)
+    assert small == "s" * 40
+    assert big.startswith("b" * 300) and "b" * 400 not in big
+    assert missing == ""
+
+
+def test_formatters_stay_within_the_budget():
+    pages = [{"url": f"https://{n}.com/", "title": str(n), "content": "c", "raw_content": "x" * 100_000} for n in range(4)]
+    search = tavily.format_tavily_search_result({"results": pages}, max_tokens=1000)
+    extract = tavily.format_tavily_extract_result({"results": pages}, max_tokens=1000)
+    for output in (search, extract):
+        assert len(output) < 1000 * tavily.CHARS_PER_TOKEN + 1000
+        assert output.count("[... truncated, showing 1000 of 100000 characters]") == 4
+
+############# End of TAVILY RESULT HELPERS #############
+
+
+############# TAVILY EXTRACT #############
+@pytest.fixture
+def fake_extract(monkeypatch):
+    """Replace the Tavily extract API with canned pages, recording every call."""
+    calls = []
+    pages = {}
+    redirects = {}
+
+    async def extract(urls, **kwargs):
+        calls.append(list(urls))
+        results, failed_results = [], []
+        for url in urls:
+            if url in pages:
+                results.append({"url": redirects.get(url, url), "raw_content": pages[url], "images": []})
+            else:
+                failed_results.append({"url": url, "error": "Page not found"})
+        return {"results": results, "failed_results": failed_results}
+
+    monkeypatch.setattr(tavily.async_tavily_client, "extract", extract)
+    monkeypatch.setattr(tavily, "tavily_extract_url_cache", ResultCache("tavily_extract_url", db_path=None))
+    monkeypatch.setattr(tavily, "tavily_extract_content_cache", ResultCache("tavily_extract_content", db_path=None))
+    monkeypatch.setattr(ratelimit, "_rate_limiters", {})
+    monkeypatch.setitem(ratelimit.PROVIDER_RATE_LIMITS, "tavily", (1000.0, 100))
+    return pages, redirects, calls
+
+
+def test_match_extracted_urls():
+    requested = ["https://a.com/x", "http://short.link/1", "https://c.com/"]
+    returned = ["https://landing.example/page", "https://A.com/x/", "https://c.com/"]
+    assert tavily.match_extracted_urls(requested, returned) == ["http://short.link/1", "https://a.com/x", "https://c.com/"]
+    assert tavily.match_extracted_urls(["https://a.com/"], ["https://b.com/", "https://c.com/"]) == ["https://a.com/", None]
+
+
+def test_extract_maps_redirects_and_failures_to_requested_urls(fake_extract, invoke_tool):
+    pages, redirects, calls = fake_extract
+    pages["https://a.com/x"] = "page a"
+    pages["http://short.link/1"] = "page b"
+    redirects["https://a.com/x"] = "https://A.com/x/"
+    redirects["http://short.link/1"] = "https://landing.example/page"
+    output = invoke_tool(tavily.tavily_extract, urls=["https://a.com/x", "http://short.link/1", "https://gone.com/"])
+    assert "1. URL: https://a.com/x\nContent:\npage a" in output
+    assert "2. URL: http://short.link/1\nContent:\npage b" in output
+    assert "Failed Extractions:\n\n1. URL: https://gone.com/\nError: Page not found" in output
+    assert "landing.example" not in output
+
+
+def test_extracted_pages_are_cached_per_url(fake_extract, invoke_tool):
+    pages, redirects, calls = fake_extract
+    pages["https://a.com/"] = "page a"
+    pages["https://b.com/"] = "page b"
+    invoke_tool(tavily.tavily_extract, urls=["https://a.com/"])
+    output = invoke_tool(tavily.tavily_extract, urls=["https://a.com/", "https://b.com/"])
+    assert calls == [["https://a.com/"], ["https://b.com/"]]
+    assert "page a" in output and "page b" in output
+
+
+def test_identical_pages_are_shown_once(fake_extract, invoke_tool):
+    pages, redirects, calls = fake_extract
+    pages["https://a.com/"] = pages["https://mirror.a.com/"] = "same text"
+    output = invoke_tool(tavily.tavily_extract, urls=["https://a.com/", "https://mirror.a.com/"])
+    assert output.count("same text") == 1
+    assert "[Same content as https://a.com/]" in output
+
+
+def test_extract_splits_urls_into_chunks(fake_extract, invoke_tool, monkeypatch):
+    pages, redirects, calls = fake_extract
+    monkeypatch.setattr(tavily, "TAVILY_EXTRACT_CHUNK_SIZE", 2)
+    urls = [f"https://{n}.com/" for n in range(5)]
+    pages.update({url: f"page {url}" for url in urls})
+    output = invoke_tool(tavily.tavily_extract, urls=urls + [urls[0]])
+    assert sorted(map(len, calls)) == [1, 2, 2]
+    assert [line for line in output.splitlines() if "URL:" in line] == [f"{n + 1}. URL: {url}" for n, url in enumerate(urls)]
+
+
+def test_failed_chunks_do_not_hide_the_others(fake_extract, invoke_tool, monkeypatch):
+    pages, redirects, calls = fake_extract
+    monkeypatch.setattr(tavily, "TAVILY_EXTRACT_CHUNK_SIZE", 1)
+    pages["https://a.com/"] = "page a"
+    real_extract = tavily.async_tavily_client.extract
+
+    async def extract(urls, **kwargs):
+        if urls == ["https://b.com/"]:
+            raise tavily.InvalidAPIKeyError("bad key")
+        return await real_extract(urls, **kwargs)
+
+    monkeypatch.setattr(tavily.async_tavily_client, "extract", extract)
+    output = invoke_tool(tavily.tavily_extract, urls=["https://a.com/", "https://b.com/"])
+    assert "page a" in output
+    assert "URL: https://b.com/\nError: Invalid API key" in output
+
+############# END of TAVILY EXTRACT #############
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.tools.search import httpclient, ratelimit, weather
+from src.tools.search.cache import ResultCache
+
+TIMEOUT = httpx.Timeout(5.0)
+LIMITS = httpx.Limits(max_connections=5)
+
+
+############# HTTP CLIENTS #############
+def test_client_is_reused_within_a_loop():
+    async def main():
+        first = await httpclient.get_http_client("test", TIMEOUT, LIMITS)
+        second = await httpclient.get_http_client("test", TIMEOUT, LIMITS)
+        other = await httpclient.get_http_client("other", TIMEOUT, LIMITS)
+        return first, second, other
+
+    first, second, other = asyncio.run(main())
+    assert first is second and first is not other
+
+
+def test_clients_are_closed_when_their_loop_shuts_down():
+    async def main():
+        return await httpclient.get_http_client("test", TIMEOUT, LIMITS)
+
+    first = asyncio.run(main())
+    second = asyncio.run(main())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert not httpclient._http_clients
+
+
+def test_clients_of_loops_closed_without_shutdown_are_dropped():
+    loop = asyncio.new_event_loop()
+    stale = loop.run_until_complete(httpclient.get_http_client("test", TIMEOUT, LIMITS))
+    loop.close()
+
+    async def main():
+        return await httpclient.get_http_client("test", TIMEOUT, LIMITS)
+
+    assert asyncio.run(main()) is not stale
+    assert not httpclient._http_clients
+
+############# End of HTTP CLIENTS #############
+
+
+############# GET WEATHER #############
+def weather_data(city):
+    return {
+        "cod": 200, "name": city, "sys": {"country": "CN"}, "weather": [{"description": "clear sky"}],
+        "main": {"temp": 21.5, "feels_like": 20.0, "temp_min": 18.0, "temp_max": 24.0, "humidity": 40, "pressure": 1012},
+        "wind": {"speed": 3.2, "deg": 90}, "visibility": 10000,
+    }
+
+
+@pytest.fixture
+def openweather(monkeypatch):
+    """Serve OpenWeather requests from a mock transport, recording the requested cities."""
+    requests = []
+
+    def handle(request):
+        city = request.url.params["q"]
+        requests.append(city)
+        if city == "Atlantis":
+            return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+        return httpx.Response(200, json=weather_data(city))
+
+    async def get_http_client(provider, timeout, limits):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+    monkeypatch.setattr(weather, "get_http_client", get_http_client)
+    monkeypatch.setattr(weather, "weather_cache", ResultCache("openweather", db_path=None))
+    monkeypatch.setattr(ratelimit, "_rate_limiters", {})
+    monkeypatch.setitem(ratelimit.PROVIDER_RATE_LIMITS, "openweather", (1000.0, 100))
+    return requests
+
+
+def test_get_weather_formats_the_response(openweather, invoke_tool):
+    output = invoke_tool(weather.get_weather, loc="Shanghai")
+    assert "📍 Location: Shanghai, CN" in output
+    assert "🌡️ Temperature: 21.5°C (feels like 20.0°C)" in output
+    assert "👀 Visibility: 10.0 km" in output
+
+
+def test_weather_is_cached_per_normalized_location(openweather, invoke_tool):
+    invoke_tool(weather.get_weather, loc="Shanghai")
+    invoke_tool(weather.get_weather, loc=" shanghai ")
+    invoke_tool(weather.get_weather, loc="Shanghai", unit="imperial")
+    assert openweather == ["Shanghai", "Shanghai"]
+
+
+def test_http_errors_report_the_api_message(openweather, invoke_tool):
+    output = invoke_tool(weather.get_weather, loc="Atlantis")
+    assert output == "Error: Get weather data of Atlantis failed: HTTP 404 city not found"
+    assert "appid" not in output
+
+
+def test_weather_batch(openweather, invoke_tool):
+    output = invoke_tool(weather.get_weather_batch, locs=["Beijing", "Atlantis", "Beijing", " "])
+    assert sorted(openweather) == ["Atlantis", "Beijing"]
+    beijing, atlantis = output.split("\n\n")
+    assert beijing.startswith("[Beijing]\n📍 Location: Beijing, CN")
+    assert atlantis == "[Atlantis]\nError: Get weather data of Atlantis failed: HTTP 404 city not found"
+    assert invoke_tool(weather.get_weather_batch, locs=[]) == "Error: No locations given"
+
+############# End of GET WEATHER #############
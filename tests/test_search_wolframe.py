@@ -0,0 +1,120 @@
+import time
+
+import httpx
+import pytest
+
+from src.tools.search import ratelimit, wolframe
+from src.tools.search.cache import ResultCache
+
+RESULT_XML = b"""<?xml version='1.0' encoding='UTF-8'?>
+<queryresult success='true' error='false' numpods='2' inputstring='2+2'>
+ <pod title='Input' scanner='Identity' id='Input' error='false' numsubpods='1'>
+  <subpod title=''><plaintext>2 + 2</plaintext></subpod>
+ </pod>
+ <pod title='Result' scanner='Simplification' id='Result' error='false' numsubpods='1'>
+  <subpod title=''><plaintext>4</plaintext></subpod>
+ </pod>
+</queryresult>"""
+
+EMPTY_XML = b"""<?xml version='1.0' encoding='UTF-8'?>
+<queryresult success='false' error='false' numpods='0' inputstring='gibberish'></queryresult>"""
+
+ERROR_XML = b"""<?xml version='1.0' encoding='UTF-8'?>
+<queryresult success='false' error='true' numpods='0'><error><code>1</code><msg>Invalid appid</msg></error></queryresult>"""
+
+
+############# QUERY CLASSIFICATION #############
+@pytest.mark.parametrize("query, expected", [
+    ("2+2", True),
+    ("integrate x^2 sin^3 x dx", True),
+    ("50 km to miles", True),
+    ("boiling point of mercury", True),
+    ("speed of light", True),
+    ("GDP of France", False),
+    ("weather in Paris", False),
+    ("current price of gold", False),
+    ("convert 100 USD to EUR today", False),
+    ("countries with the largest child population", False),
+])
+def test_is_deterministic_query(query, expected):
+    assert wolframe.is_deterministic_query(query) is expected
+
+############# End of QUERY CLASSIFICATION #############
+
+
+############# XML PARSING #############
+def test_parse_and_format_result():
+    res = wolframe.parse_wolframe_xml(RESULT_XML)
+    assert wolframe.format_wolframe_response(res) == (
+        "# title: Input\nScanner: Identity, ID: Input\n2 + 2\n"
+        "# title: Result\nScanner: Simplification, ID: Result\n4"
+    )
+
+
+def test_empty_result_is_reported():
+    res = wolframe.parse_wolframe_xml(EMPTY_XML)
+    assert wolframe.format_wolframe_response(res) == "对于查询 gibberish, Wolfram Alpha 未返回任何结果。"
+
+############# End of XML PARSING #############
+
+
+############# CACHED QUERY #############
+@pytest.fixture
+def wolfram_api(monkeypatch):
+    """Serve Wolfram Alpha requests from a mock transport, recording the query parameters."""
+    requests = []
+    responses = {}
+
+    def handle(request):
+        params = request.url.params
+        requests.append(params)
+        return httpx.Response(200, content=responses.get(params["input"], RESULT_XML))
+
+    async def get_http_client(provider, timeout, limits):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+    monkeypatch.setattr(wolframe, "get_http_client", get_http_client)
+    monkeypatch.setattr(wolframe, "wolframe_cache", ResultCache("wolfram", db_path=None))
+    monkeypatch.setattr(ratelimit, "_rate_limiters", {})
+    monkeypatch.setitem(ratelimit.PROVIDER_RATE_LIMITS, "wolfram", (1000.0, 100))
+    return responses, requests
+
+
+def test_requests_ask_for_plaintext_pods_only(wolfram_api, invoke_tool):
+    responses, requests = wolfram_api
+    invoke_tool(wolframe.wolframe_query, query="2+2")
+    invoke_tool(wolframe.wolframe_query, query="3+3", pod_ids=["Result", "Input"])
+    assert requests[0]["format"] == "plaintext"
+    assert requests[0]["podindex"] == "1,2,3,4,5"
+    assert requests[1].get_list("includepodid") == ["Input", "Result"]
+    assert "podindex" not in requests[1]
+
+
+def test_deterministic_queries_are_cached_longer(wolfram_api, invoke_tool):
+    responses, requests = wolfram_api
+    assert invoke_tool(wolframe.wolframe_query, query="2+2").endswith("\n4")
+    assert invoke_tool(wolframe.wolframe_query, query=" 2+2 ").endswith("\n4")
+    invoke_tool(wolframe.wolframe_query, query="GDP of France")
+    assert len(requests) == 2
+
+    expiry = sorted(expires_at - time.time() for expires_at, _ in wolframe.wolframe_cache.entries.values())
+    assert expiry[0] == pytest.approx(wolframe.WOLFRAME_CACHE_TTL, abs=5)
+    assert expiry[1] == pytest.approx(wolframe.WOLFRAME_STATIC_CACHE_TTL, abs=5)
+
+
+def test_empty_results_are_not_cached(wolfram_api, invoke_tool):
+    responses, requests = wolfram_api
+    responses["gibberish"] = EMPTY_XML
+    invoke_tool(wolframe.wolframe_query, query="gibberish")
+    invoke_tool(wolframe.wolframe_query, query="gibberish")
+    assert len(requests) == 2
+
+
+def test_api_errors_are_reported(wolfram_api, invoke_tool):
+    responses, requests = wolfram_api
+    responses["2+2"] = ERROR_XML
+    assert invoke_tool(wolframe.wolframe_query, query="2+2") == "Wolfram Alpha 查询错误: Error 1: Invalid appid"
+    # Errors in the response body are not retried
+    assert len(requests) == 1
+
+############# End of CACHED QUERY #############